@@ -0,0 +1,107 @@
+"""partition event and problem_log by created_at
+
+Revision ID: b3d95e1f0a62
+Revises: 8f41b2c7d9e0
+Create Date: 2025-10-23 16:12:07.554180
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d95e1f0a62'
+down_revision = '8f41b2c7d9e0'
+branch_labels = None
+depends_on = None
+
+PREMAKE_DAYS = 7
+
+INDEXES = {
+    'problem_log': [
+        ('ix_problem_log_tenant_id_id', ['tenant_id', 'id'], None),
+        ('ix_problem_log_tenant_queue_id', ['tenant_id', 'queue', 'id'], None),
+        ('ix_problem_log_tenant_error_code_id', ['tenant_id', 'error_code', 'id'], None),
+        ('ix_problem_log_tenant_task_type_id', ['tenant_id', 'task_type', 'id'], None),
+        ('ix_problem_log_open', ['tenant_id', 'id'], 'user_decision IS NULL'),
+        ('ix_problem_log_created_at', ['created_at'], None),
+    ],
+    'event': [
+        ('ix_event_tenant_id', ['tenant_id'], None),
+        ('ix_event_type', ['type'], None),
+    ],
+}
+
+
+def _create_indexes(table):
+    for name, cols, where in INDEXES[table]:
+        kw = {'postgresql_where': sa.text(where)} if where else {}
+        op.create_index(name, table, cols, unique=False, **kw)
+
+
+def _drop_indexes(table, on):
+    for name, _cols, _where in INDEXES[table]:
+        op.drop_index(name, table_name=on)
+
+
+def _foreign_keys(table):
+    op.create_foreign_key(f'{table}_tenant_id_fkey', table, 'tenant', ['tenant_id'], ['tenant_id'], ondelete='RESTRICT')
+    op.create_foreign_key(f'{table}_document_id_fkey', table, 'document', ['document_id'], ['id'], ondelete='SET NULL')
+
+
+def _partition(table):
+    # The existing table is attached as-is as the partition for everything up to the end of
+    # today (no rows are copied); the maintenance actor drops it once it falls out of
+    # retention. New rows land in daily partitions.
+    legacy = f'{table}_legacy'
+    bind = op.get_bind()
+    op.rename_table(table, legacy)
+    _drop_indexes(table, legacy)
+    op.drop_constraint(f'{table}_pkey', legacy, type_='primary')
+    op.drop_constraint(f'{table}_tenant_id_fkey', legacy, type_='foreignkey')
+    op.drop_constraint(f'{table}_document_id_fkey', legacy, type_='foreignkey')
+
+    op.execute(f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    op.create_primary_key(f'{table}_pkey', table, ['id', 'created_at'])
+    _foreign_keys(table)
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+    cutoff = bind.execute(
+        sa.text(
+            f"SELECT date_trunc('day', greatest(max(created_at), now() at time zone 'utc')) + interval '1 day' FROM {legacy}"
+        )
+    ).scalar()
+    op.execute(f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ('{cutoff:%Y-%m-%d}')")
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    for i in range(PREMAKE_DAYS):
+        day = cutoff + timedelta(days=i)
+        op.execute(
+            f"CREATE TABLE {table}_p{day:%Y%m%d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{day + timedelta(days=1):%Y-%m-%d}')"
+        )
+    # created on the parent, so every partition (legacy included) gets them
+    _create_indexes(table)
+
+
+def _unpartition(table):
+    flat = f'{table}_flat'
+    op.execute(f'CREATE TABLE {flat} (LIKE {table} INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO {flat} SELECT * FROM {table}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {flat}.id')
+    op.drop_table(table)
+    op.rename_table(flat, table)
+    op.create_primary_key(f'{table}_pkey', table, ['id'])
+    _foreign_keys(table)
+    _create_indexes(table)
+
+
+def upgrade():
+    _partition('problem_log')
+    _partition('event')
+
+
+def downgrade():
+    _unpartition('event')
+    _unpartition('problem_log')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Load test for DB-backed API routes.
+#
+#   http:     hammer a running API, e.g. --url http://localhost:8000/problems/?limit=20
+#   sessions: in-process, a fresh engine per request (the old get_sessionmaker) against the
+#             shared engine registry, both running the /problems query
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+
+def run(fn: Callable[[], None], concurrency: int, duration: float) -> dict:
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def _loop() -> None:
+        local: List[float] = []
+        failed = 0
+        while time.monotonic() < stop:
+            t0 = time.perf_counter()
+            try:
+                fn()
+            except Exception:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for _ in range(concurrency):
+            ex.submit(_loop)
+    elapsed = time.monotonic() - t0
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+    }
+
+
+def http_request(url: str) -> Callable[[], None]:
+    def _fn() -> None:
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            resp.read()
+
+    return _fn
+
+
+def session_requests(limit: int):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from src.core.infrastructure.persistence.sqlalchemy.repositories import ProblemLogRepository
+    from src.core.infrastructure.persistence.sqlalchemy.session import database_url, get_sessionmaker
+
+    def per_request_engine() -> None:
+        engine = create_engine(database_url(), future=True)
+        try:
+            with sessionmaker(bind=engine, future=True)() as s:
+                ProblemLogRepository(s).list(limit=limit)
+        finally:
+            engine.dispose()
+
+    def shared_registry() -> None:
+        with get_sessionmaker()() as s:
+            ProblemLogRepository(s).list(limit=limit)
+
+    return {"per_request_engine": per_request_engine, "shared_registry": shared_registry}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="API / session load test")
+    ap.add_argument("--mode", choices=["http", "sessions"], default="http")
+    ap.add_argument("--url", default="http://localhost:8000/problems/?limit=20")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=15.0)
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    results = {}
+    if args.mode == "http":
+        results[args.url] = run(http_request(args.url), args.concurrency, args.duration)
+    else:
+        for name, fn in session_requests(args.limit).items():
+            results[name] = run(fn, args.concurrency, args.duration)
+    print(json.dumps({"concurrency": args.concurrency, "duration_s": args.duration, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
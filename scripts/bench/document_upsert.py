@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Rows/sec of document registration against DATABASE_URL (Postgres):
+#   per_row:     SELECT then INSERT/UPDATE + flush per document (the old upsert_by_idempotency)
+#   upsert_many: INSERT ... ON CONFLICT in chunks
+#   staging:     COPY into a temp table + one set-based merge (the migrate_* loader)
+# Each mode runs twice over the same keys: first pass inserts, second pass updates.
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import delete, select
+
+from src.core.infrastructure.persistence.sqlalchemy.models import Document, Tenant
+from src.core.infrastructure.persistence.sqlalchemy.repositories import DocumentRepository
+from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+from src.core.infrastructure.persistence.sqlalchemy.staging import load_documents
+
+TENANT = "bench"
+
+
+def make_rows(n: int, prefix: str, status=None) -> list:
+    return [
+        {
+            "tenant_id": TENANT,
+            "idempotency_key": f"{prefix}-{i}",
+            "title": f"doc {i}",
+            "mime": "application/pdf",
+            "size": 1000 + i,
+            "storage_ref": f"bench/{prefix}/{i}.pdf",
+            "status": status,
+        }
+        for i in range(n)
+    ]
+
+
+def per_row(s, rows: list) -> None:
+    for r in rows:
+        row = s.scalars(
+            select(Document).where(Document.tenant_id == r["tenant_id"], Document.idempotency_key == r["idempotency_key"])
+        ).first()
+        if row is None:
+            s.add(Document(**{k: v for k, v in r.items() if v is not None}, status=r["status"] or "registered"))
+        else:
+            for k, v in r.items():
+                if v is not None:
+                    setattr(row, k, v)
+        s.flush()
+    s.commit()
+
+
+def bulk(s, rows: list, batch_size: int) -> None:
+    DocumentRepository(s).upsert_many(rows, batch_size=batch_size)
+    s.commit()
+
+
+def staged(s, rows: list) -> None:
+    load_documents(s, rows)
+    s.commit()
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark document upserts")
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--batch-size", type=int, default=1000)
+    args = ap.parse_args()
+
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        if s.get(Tenant, TENANT) is None:
+            s.add(Tenant(tenant_id=TENANT, name=TENANT))
+            s.commit()
+
+    results = {}
+    run = uuid.uuid4().hex[:8]
+    modes = {
+        "per_row": lambda s, rows: per_row(s, rows),
+        "upsert_many": lambda s, rows: bulk(s, rows, args.batch_size),
+        "staging": staged,
+    }
+    try:
+        for name, fn in modes.items():
+            rows = make_rows(args.rows, f"{run}-{name}")
+            with SessionLocal() as s:
+                insert_s = timed(lambda: fn(s, rows))
+            with SessionLocal() as s:
+                update_s = timed(lambda: fn(s, make_rows(args.rows, f"{run}-{name}", status="indexed")))
+            results[name] = {
+                "insert_rows_per_sec": round(args.rows / insert_s, 1),
+                "update_rows_per_sec": round(args.rows / update_s, 1),
+            }
+    finally:
+        with SessionLocal() as s:
+            s.execute(delete(Document).where(Document.tenant_id == TENANT, Document.idempotency_key.like(f"{run}-%")))
+            s.commit()
+    print(json.dumps({"rows": args.rows, "batch_size": args.batch_size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# Discrete-event simulation of one worker pool under mixed small/large OCR load.
+# Compares plain FIFO consumption, strict priority and the WeightedFairPolicy used by the
+# WeightedFairScheduler middleware; reports small/large latency percentiles.
+import argparse
+import heapq
+import json
+import random
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from src.core.infrastructure.messaging.scheduling import WeightedFairPolicy
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+
+
+def workload(args, rng: random.Random) -> List[Tuple[float, str, float]]:
+    jobs = []
+    for klass, rate, mean in (("small", args.small_rate, args.small_service), ("large", args.large_rate, args.large_service)):
+        t = 0.0
+        while True:
+            t += rng.expovariate(rate)
+            if t > args.duration:
+                break
+            jobs.append((t, klass, rng.expovariate(1.0 / mean)))
+    return sorted(jobs)
+
+
+def simulate(mode: str, jobs: List[Tuple[float, str, float]], args) -> Dict[str, float]:
+    policy = WeightedFairPolicy(["small", "large"], {"small": args.small_weight, "large": 1.0}, args.max_wait * 1000)
+    waiting: Dict[str, Deque[Tuple[float, float]]] = {"small": deque(), "large": deque()}
+    latency: Dict[str, List[float]] = {"small": [], "large": []}
+    events: List[Tuple[float, int, str, tuple]] = []
+    seq = 0
+    for arrived, klass, service in jobs:
+        events.append((arrived, seq, "arrive", (klass, service)))
+        seq += 1
+    heapq.heapify(events)
+    free = args.workers
+    large_eligible_at = 0.0
+    deferrals = 0
+
+    def pick(now: float):
+        # returns (class, charged virtual cost) of the job to start, or None
+        nonlocal large_eligible_at, deferrals
+        small, large = waiting["small"], waiting["large"]
+        if mode == "fifo":
+            if small and (not large or small[0][0] <= large[0][0]):
+                return "small", 0.0
+            return ("large", 0.0) if large else None
+        if mode == "priority":
+            return ("small", 0.0) if small else (("large", 0.0) if large else None)
+        # wfq: the middleware only ever holds back the large class
+        if large and now >= large_eligible_at:
+            age_ms = (now - large[0][0]) * 1000
+            admitted = policy.admit("large", age_ms, {"small": len(small)})
+            if admitted:
+                return "large", admitted[1]
+            deferrals += 1
+            large_eligible_at = now + args.defer_ms / 1000.0
+        if small:
+            return "small", policy.start("small")
+        return None
+
+    now = 0.0
+    while events:
+        now, _s, kind, payload = heapq.heappop(events)
+        if kind == "arrive":
+            klass, service = payload
+            waiting[klass].append((now, service))
+        elif kind == "done":
+            klass, arrived, service, charged = payload
+            latency[klass].append(now - arrived)
+            if mode == "wfq":
+                policy.complete(klass, service, charged)
+            free += 1
+        while free > 0:
+            picked = pick(now)
+            if picked is None:
+                break
+            klass, charged = picked
+            arrived, service = waiting[klass].popleft()
+            free -= 1
+            heapq.heappush(events, (now + service, seq, "done", (klass, arrived, service, charged)))
+            seq += 1
+        if mode == "wfq" and waiting["large"] and free > 0 and large_eligible_at > now:
+            # wake up when the deferred large job becomes visible again
+            heapq.heappush(events, (large_eligible_at, seq, "tick", ()))
+            seq += 1
+
+    out: Dict[str, float] = {"mode": mode, "deferrals": deferrals}
+    for klass in ("small", "large"):
+        out[f"{klass}_n"] = len(latency[klass])
+        for p in (50, 95, 99):
+            out[f"{klass}_p{p}_s"] = round(percentile(latency[klass], p), 2)
+        out[f"{klass}_max_s"] = round(max(latency[klass] or [0.0]), 2)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulate small-job latency under mixed load per scheduling mode")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=3600.0, help="simulated seconds of arrivals")
+    ap.add_argument("--small-rate", type=float, default=2.0, help="small jobs per second")
+    ap.add_argument("--small-service", type=float, default=2.0, help="mean small job seconds")
+    ap.add_argument("--large-rate", type=float, default=0.04, help="large jobs per second")
+    ap.add_argument("--large-service", type=float, default=60.0, help="mean large job seconds")
+    ap.add_argument("--small-weight", type=float, default=4.0)
+    ap.add_argument("--max-wait", type=float, default=300.0, help="starvation bound for large jobs, seconds")
+    ap.add_argument("--defer-ms", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--modes", nargs="*", default=["fifo", "priority", "wfq"])
+    args = ap.parse_args()
+
+    jobs = workload(args, random.Random(args.seed))
+    load = (args.small_rate * args.small_service + args.large_rate * args.large_service) / args.workers
+    print(json.dumps({"jobs": len(jobs), "offered_load": round(load, 2)}))
+    for mode in args.modes:
+        print(json.dumps(simulate(mode, jobs, args)))
+
+
+if __name__ == "__main__":
+    main()
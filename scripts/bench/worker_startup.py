@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Cold-start import time and RSS of src.worker_app.main per worker profile.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from src.worker_app.profiles import PROFILES
+
+PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+{pre}import src.worker_app.main  # noqa
+dt = time.perf_counter() - t0
+heavy = [m for m in ("boto3", "botocore", "sqlalchemy", "fitz", "pymupdf", "pytesseract", "PIL") if m in sys.modules]
+print(json.dumps({
+    "import_s": dt,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    "modules": len(sys.modules),
+    "heavy": heavy,
+}))
+"""
+
+
+def probe(profile: str, eager: bool) -> dict:
+    env = dict(os.environ, WORKER_PROFILE=profile, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("WORKER_QUEUES", None)
+    # eager baseline: what every process paid before profiles / lazy imports
+    pre = "import src.core.application.services.ocr, boto3, fitz\n" if eager else ""
+    code = PROBE.replace("{pre}", pre)
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark worker cold start per profile")
+    ap.add_argument("--profiles", nargs="*", default=list(PROFILES))
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--eager-baseline", action="store_true", help="also measure with heavy deps imported up front")
+    args = ap.parse_args()
+
+    rows = []
+    variants = [("lazy", False)] + ([("eager", True)] if args.eager_baseline else [])
+    for profile in args.profiles:
+        for label, eager in variants:
+            samples = [probe(profile, eager) for _ in range(args.runs)]
+            rows.append({
+                "profile": profile,
+                "mode": label,
+                "import_ms_median": round(statistics.median(s["import_s"] for s in samples) * 1000, 1),
+                "rss_mb_median": round(statistics.median(s["rss_mb"] for s in samples), 1),
+                "modules": samples[-1]["modules"],
+                "heavy_loaded": samples[-1]["heavy"],
+            })
+    print(json.dumps({"runs": args.runs, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+REP = Path("doc/etl/etl_report.jsonl")
+CHECKPOINT_DIR = Path(os.getenv("ETL_CHECKPOINT_DIR", "doc/etl/checkpoints"))
+HWM_PATH = Path(os.getenv("ETL_HWM_PATH", "doc/etl/hwm.json"))
+DELTA_DIR = Path(os.getenv("ETL_DELTA_DIR", "doc/etl/export/delta"))
+
+# Shared by the ETL scripts and run_etl.py. A stage's checkpoint is one JSON file
+# (<CHECKPOINT_DIR>/<stage>.json) so stages running in parallel never write the same file:
+#   status   running | done | failed
+#   offset   input byte offset fully committed so far (resumable stages)
+#   total    input size in bytes, mtime   input mtime (ns), rows   rows committed so far
+#
+# High-water marks for delta sync live in HWM_PATH, keyed by source ("sqlite:<table>",
+# "s3:<bucket>/<prefix>"): "marks" is what the target already holds, "pending" what an
+# export has written but the migrate stages have not loaded yet. run_etl promotes pending
+# marks with commit_hwm() once a run finished without failures.
+
+
+def _open(p: Path):
+    # export_old_db --gzip writes .jsonl.gz; offsets are positions in the uncompressed stream
+    return gzip.open(p, "rb") if p.suffix == ".gz" else p.open("rb")
+
+
+def input_size(p: Path) -> int:
+    if p.suffix != ".gz":
+        return p.stat().st_size
+    with gzip.open(p, "rb") as f:
+        return f.seek(0, os.SEEK_END)
+
+
+def iter_jsonl_offsets(p: Path, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    # yields (offset just past the record, record); bad lines are skipped
+    with _open(p) as f:
+        if start:
+            f.seek(start)
+        offset = start
+        for line in f:
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield offset, json.loads(line)
+            except Exception:
+                continue
+
+
+def iter_jsonl(p: Path) -> Iterator[dict]:
+    for _offset, rec in iter_jsonl_offsets(p):
+        yield rec
+
+
+def log(entry: dict) -> None:
+    REP.parent.mkdir(parents=True, exist_ok=True)
+    with REP.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def ensure_tenant(s, tenant_id: str):
+    from src.core.infrastructure.persistence.sqlalchemy.repositories import TenantRepository
+
+    return TenantRepository(s).ensure(tenant_id)
+
+
+def checkpoint_path(stage: str) -> Path:
+    return CHECKPOINT_DIR / f"{stage}.json"
+
+
+def load_checkpoint(stage: str) -> Dict:
+    p = checkpoint_path(stage)
+    if not p.exists():
+        return {}
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def save_checkpoint(stage: str, **fields) -> Dict:
+    cp = load_checkpoint(stage)
+    cp.update(fields)
+    cp["updated_at"] = datetime.utcnow().isoformat()
+    p = checkpoint_path(stage)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cp, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+    return cp
+
+
+def staged_load(
+    path: Path,
+    to_row: Callable[[dict], Optional[dict]],
+    loader: Callable,
+    stage: str,
+    resume: bool = False,
+    chunk_rows: Optional[int] = None,
+    before_chunk: Optional[Callable] = None,
+) -> Dict[str, int]:
+    # Feeds the JSONL through a staging loader (persistence/sqlalchemy/staging.py) in
+    # chunks of ETL_CHUNK_ROWS, committing and checkpointing the input offset after each,
+    # so a re-run with --resume continues after the last committed chunk.
+    from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+
+    chunk_rows = chunk_rows or int(os.getenv("ETL_CHUNK_ROWS", "200000"))
+    total, mtime = input_size(path), path.stat().st_mtime_ns
+    cp = load_checkpoint(stage) if resume else {}
+    # an offset is only meaningful in the very file it was taken from
+    same_input = (cp.get("input"), cp.get("total"), cp.get("mtime")) == (str(path), total, mtime)
+    start = cp.get("offset", 0) if same_input and cp.get("status") != "done" else 0
+    totals = {"staged": cp.get("rows", 0) if start else 0, "created": 0, "updated": 0}
+    save_checkpoint(
+        stage, status="running", input=str(path), total=total, mtime=mtime, offset=start, rows=totals["staged"]
+    )
+
+    records = iter_jsonl_offsets(path, start)
+    last = {"offset": start}
+
+    def chunk() -> Iterator[dict]:
+        n = 0
+        for offset, rec in records:
+            last["offset"] = offset
+            row = to_row(rec)
+            if row is None:
+                continue
+            yield row
+            n += 1
+            if n >= chunk_rows:
+                return
+
+    SessionLocal = get_sessionmaker()
+    while True:
+        before = last["offset"]
+        with SessionLocal() as s:
+            if before_chunk is not None:
+                before_chunk(s)
+            res = loader(s, chunk())
+            s.commit()
+        for k in totals:
+            totals[k] += res[k]
+        save_checkpoint(stage, offset=last["offset"], rows=totals["staged"])
+        if last["offset"] == before or res["staged"] < chunk_rows:
+            break
+    save_checkpoint(stage, status="done")
+    return totals
+
+
+def load_hwm() -> Dict:
+    if not HWM_PATH.exists():
+        return {"marks": {}, "pending": {}}
+    try:
+        state = json.loads(HWM_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        state = {}
+    state.setdefault("marks", {})
+    state.setdefault("pending", {})
+    return state
+
+
+def _save_hwm(state: Dict) -> None:
+    state["updated_at"] = datetime.utcnow().isoformat()
+    HWM_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = HWM_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, HWM_PATH)
+
+
+def get_hwm(source: str) -> Dict:
+    return load_hwm()["marks"].get(source, {})
+
+
+def set_hwm(source: str, mark: Dict, pending: bool = False) -> None:
+    state = load_hwm()
+    state["pending" if pending else "marks"][source] = mark
+    if not pending:
+        state["pending"].pop(source, None)
+    _save_hwm(state)
+
+
+def commit_hwm() -> Dict:
+    state = load_hwm()
+    promoted = state["pending"]
+    if promoted:
+        state["marks"].update(promoted)
+        state["pending"] = {}
+        _save_hwm(state)
+    return promoted
+
+
+def delta_input(p: Path) -> Path:
+    # export_old_db --delta writes <DELTA_DIR>/<table>.jsonl, one file per table and run
+    return DELTA_DIR / p.name.replace(".gz", "")
@@ -2,28 +2,238 @@
 import os
 import sys
 import json
+import gzip
+import time
 import argparse
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from scripts.etl.common import DELTA_DIR, get_hwm, set_hwm
+
 DEF_OUT = "doc/etl/export"
+UPDATED_COLUMN = os.getenv("EXPORT_UPDATED_COLUMN", "updated_at")
 
+# Tables are exported in parallel, one process and one read-only connection each, in
+# rowid order with fetchmany batches. After every batch the table's watermark
+# (<out>/.<table>.watermark.json: last rowid, rows, byte offset) is persisted, so --resume
+# truncates the file back to the last complete batch and continues after that rowid.
+# With --gzip every batch is written as its own gzip member (the concatenation is still a
+# valid .gz file), which keeps the byte offset a safe resume point.
+#
+# Every export records the table's high-water mark (max rowid, max updated_at) as pending
+# in hwm.json (see common.py). --delta exports only rows past the committed mark (new
+# rowids, or an updated_at at or after the mark) into <ETL_DELTA_DIR>/<table>.jsonl for
+# the migrate scripts' --delta mode.
 
-def export_table(cur, table: str, out_dir: Path, limit: int | None = None) -> dict:
-    out_dir.mkdir(parents=True, exist_ok=True)
+
+def connect_ro(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    con.execute("PRAGMA query_only = 1")
+    return con
+
+
+def list_tables(con: sqlite3.Connection) -> list:
+    rows = con.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'").fetchall()
+    return [r[0] for r in rows]
+
+
+def _watermark_path(out_dir: Path, table: str) -> Path:
+    return out_dir / f".{table}.watermark.json"
+
+
+def load_watermark(out_dir: Path, table: str) -> dict | None:
+    p = _watermark_path(out_dir, table)
+    if not p.exists():
+        return None
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def save_watermark(out_dir: Path, table: str, wm: dict) -> None:
+    p = _watermark_path(out_dir, table)
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps(wm), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def _has_column(con: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(r[1] == column for r in con.execute(f'PRAGMA table_info("{table}")'))
+
+
+def _max_value(current, values):
+    vals = [v for v in values if v is not None]
+    if current is not None:
+        vals.append(current)
+    return max(vals) if vals else None
+
+
+def _has_rowid(con: sqlite3.Connection, table: str) -> bool:
+    try:
+        con.execute(f'SELECT rowid FROM "{table}" LIMIT 0')
+        return True
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID tables: exported in one go, no resume
+        return False
+
+
+def export_table(
+    sqlite_path: str,
+    table: str,
+    out_dir: Path,
+    limit: int | None = None,
+    batch_size: int = 5000,
+    compress: bool = False,
+    resume: bool = False,
+) -> dict:
+    t0 = time.perf_counter()
+    out_path = out_dir / f"{table}.jsonl{'.gz' if compress else ''}"
+    con = connect_ro(sqlite_path)
+    try:
+        keyed = _has_rowid(con, table)
+        wm = load_watermark(out_dir, table) if (resume and keyed) else None
+        if wm and (wm.get("gzip") != compress or not out_path.exists()):
+            wm = None
+        if wm and wm.get("done"):
+            return {
+                "table": table,
+                "rows": wm["rows"],
+                "path": str(out_path),
+                "skipped": "done",
+                "mark": {"rowid": wm["rowid"], "updated_at": wm.get("updated_at")},
+            }
+        start_rowid = wm["rowid"] if wm else None
+        count = wm["rows"] if wm else 0
+        max_updated = wm.get("updated_at") if wm else None
+
+        q = f'SELECT rowid, * FROM "{table}"' if keyed else f'SELECT * FROM "{table}"'
+        params: tuple = ()
+        if start_rowid is not None:
+            q += " WHERE rowid > ?"
+            params = (start_rowid,)
+        if keyed:
+            q += " ORDER BY rowid"
+        if limit:
+            q += f" LIMIT {max(0, int(limit) - count)}"
+        cur = con.execute(q, params)
+        cols = [d[0] for d in cur.description][1 if keyed else 0:]
+        ui = cols.index(UPDATED_COLUMN) + 1 if (keyed and UPDATED_COLUMN in cols) else None
+        level = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+        with out_path.open("r+b" if wm else "wb", buffering=1024 * 1024) as f:
+            if wm:
+                f.seek(wm["offset"])
+                f.truncate()
+            last_rowid = start_rowid
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                if keyed:
+                    last_rowid = rows[-1][0]
+                    if ui is not None:
+                        max_updated = _max_value(max_updated, (row[ui] for row in rows))
+                    lines = [json.dumps(dict(zip(cols, row[1:])), ensure_ascii=False) for row in rows]
+                else:
+                    lines = [json.dumps(dict(zip(cols, row)), ensure_ascii=False) for row in rows]
+                data = ("\n".join(lines) + "\n").encode("utf-8")
+                f.write(gzip.compress(data, compresslevel=level) if compress else data)
+                count += len(rows)
+                if keyed:
+                    f.flush()
+                    save_watermark(
+                        out_dir,
+                        table,
+                        {
+                            "rowid": last_rowid,
+                            "updated_at": max_updated,
+                            "rows": count,
+                            "offset": f.tell(),
+                            "gzip": compress,
+                            "done": False,
+                        },
+                    )
+            f.flush()
+            if keyed:
+                save_watermark(
+                    out_dir,
+                    table,
+                    {
+                        "rowid": last_rowid,
+                        "updated_at": max_updated,
+                        "rows": count,
+                        "offset": f.tell(),
+                        "gzip": compress,
+                        "done": True,
+                    },
+                )
+    finally:
+        con.close()
+    elapsed = time.perf_counter() - t0
+    info = {"table": table, "rows": count, "path": str(out_path), "seconds": round(elapsed, 2)}
+    if start_rowid is not None:
+        info["resumed_after_rowid"] = start_rowid
+    if keyed and not limit:
+        info["mark"] = {"rowid": last_rowid, "updated_at": max_updated}
+    return info
+
+
+def export_delta(sqlite_path: str, table: str, out_dir: Path, since: dict, batch_size: int = 5000) -> dict:
+    t0 = time.perf_counter()
     out_path = out_dir / f"{table}.jsonl"
-    count = 0
-    cols = [r[1] for r in cur.execute(f"PRAGMA table_info({table})").fetchall()]
-    q = f"SELECT * FROM {table}"
-    if limit:
-        q += f" LIMIT {int(limit)}"
-    for row in cur.execute(q):
-        obj = {k: row[i] for i, k in enumerate(cols)}
-        out_path.write_text("", encoding="utf-8") if count == 0 else None
-        with out_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-        count += 1
-    return {"table": table, "rows": count, "path": str(out_path)}
+    con = connect_ro(sqlite_path)
+    try:
+        # WITHOUT ROWID tables have nothing to track changes by, so every delta round carries
+        # them whole; the migrate stages only count rows that actually change
+        keyed = _has_rowid(con, table)
+        since_rowid = since.get("rowid") if keyed else None
+        since_updated = since.get("updated_at") if keyed else None
+        q = f'SELECT rowid, * FROM "{table}"' if keyed else f'SELECT * FROM "{table}"'
+        params: list = []
+        if since_rowid is not None:
+            q += " WHERE rowid > ?"
+            params.append(since_rowid)
+            if since_updated is not None and _has_column(con, table, UPDATED_COLUMN):
+                # text timestamps / one-second clocks: re-read the mark's own value, the
+                # upserts downstream are idempotent
+                q += f' OR "{UPDATED_COLUMN}" >= ?'
+                params.append(since_updated)
+        # without a committed mark the delta is the whole table
+        cur = con.execute(q + " ORDER BY rowid" if keyed else q, params)
+        cols = [d[0] for d in cur.description][1 if keyed else 0:]
+        ui = cols.index(UPDATED_COLUMN) + 1 if (keyed and UPDATED_COLUMN in cols) else None
+        count = 0
+        max_rowid, max_updated = since_rowid, since_updated
+        with out_path.open("wb", buffering=1024 * 1024) as f:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                if keyed:
+                    max_rowid = _max_value(max_rowid, (rows[-1][0],))
+                    if ui is not None:
+                        max_updated = _max_value(max_updated, (row[ui] for row in rows))
+                    lines = [json.dumps(dict(zip(cols, row[1:])), ensure_ascii=False) for row in rows]
+                else:
+                    lines = [json.dumps(dict(zip(cols, row)), ensure_ascii=False) for row in rows]
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+                count += len(rows)
+    finally:
+        con.close()
+    info = {
+        "table": table,
+        "rows": count,
+        "path": str(out_path),
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    if keyed:
+        info["since"] = since
+        info["mark"] = {"rowid": max_rowid, "updated_at": max_updated}
+    else:
+        info["full"] = "no rowid to track"
+    return info
 
 
 def main():
@@ -32,6 +242,11 @@ def main():
     ap.add_argument("--out", default=DEF_OUT, help="Output directory for JSONL files")
     ap.add_argument("--tables", nargs="*", help="Specific tables to export")
     ap.add_argument("--limit", type=int, default=None, help="Limit rows per table")
+    ap.add_argument("--batch-size", type=int, default=int(os.getenv("ETL_BATCH_SIZE", "5000")), help="Rows per fetchmany")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("EXPORT_WORKERS", "4")), help="Tables exported in parallel")
+    ap.add_argument("--gzip", action="store_true", help="Write <table>.jsonl.gz")
+    ap.add_argument("--resume", action="store_true", help="Continue from the persisted rowid watermarks")
+    ap.add_argument("--delta", action="store_true", help="Export only rows past the committed high-water marks")
     ap.add_argument("--dry-run", action="store_true")
     args = ap.parse_args()
 
@@ -39,29 +254,49 @@ def main():
         print("ERR: --sqlite or OLD_SQLITE_PATH required", file=sys.stderr)
         sys.exit(2)
 
-    out_dir = Path(args.out)
+    out_dir = DELTA_DIR if args.delta else Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    con = sqlite3.connect(args.sqlite)
-    cur = con.cursor()
-
-    tables = args.tables
-    if not tables:
-        tables = [r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()]
+    con = connect_ro(args.sqlite)
+    tables = args.tables or list_tables(con)
+    con.close()
 
     if args.dry_run:
         print(json.dumps({"sqlite": args.sqlite, "tables": tables}, ensure_ascii=False, indent=2))
         return
 
+    t0 = time.perf_counter()
     report = []
-    for t in tables:
-        try:
-            info = export_table(cur, t, out_dir, args.limit)
-            report.append(info)
-        except Exception as e:
-            report.append({"table": t, "error": str(e)})
-
-    print(json.dumps({"export": report}, ensure_ascii=False, indent=2))
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(tables) or 1))) as pool:
+        if args.delta:
+            futures = {
+                pool.submit(export_delta, args.sqlite, t, out_dir, get_hwm(f"sqlite:{t}"), args.batch_size): t
+                for t in tables
+            }
+        else:
+            futures = {
+                pool.submit(
+                    export_table, args.sqlite, t, out_dir, args.limit, args.batch_size, args.gzip, args.resume
+                ): t
+                for t in tables
+            }
+        for fut in as_completed(futures):
+            try:
+                report.append(fut.result())
+            except Exception as e:
+                report.append({"table": futures[fut], "error": str(e)})
+    report.sort(key=lambda r: tables.index(r["table"]))
+    for r in report:
+        if r.get("mark"):
+            set_hwm(f"sqlite:{r['table']}", r["mark"], pending=True)
+    out = {"export": report, "seconds": round(time.perf_counter() - t0, 2)}
+    if args.delta:
+        # rows re-read at the boundary are not changes: the migrate stages report "delta"
+        out["exported"] = sum(r.get("rows", 0) for r in report)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    if any("error" in r for r in report):
+        # run_etl must not load a partial export (or read a failed delta as empty)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
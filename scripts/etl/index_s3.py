@@ -3,27 +3,88 @@ import os
 import sys
 import json
 import argparse
-from pathlib import Path
+from datetime import datetime
 
 from sqlalchemy import select
 
-from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+from src.core.infrastructure.persistence.sqlalchemy.session import get_read_sessionmaker, get_sessionmaker
 from src.core.infrastructure.persistence.sqlalchemy.models import StorageObject
 from src.core.infrastructure.storage.s3_client import create_s3_client
+from scripts.etl.common import get_hwm, log, set_hwm
 
-REP = Path("doc/etl/etl_report.jsonl")
 
+def _apply_listing(s, bucket: str, listed: dict, dry_run: bool) -> tuple:
+    # returns (rows changed, keys that have a storage_object row)
+    changed = 0
+    matched = set()
+    rows = s.scalars(select(StorageObject).where(StorageObject.key.in_(list(listed)))).all()
+    for so in rows:
+        if (so.bucket or bucket) != bucket:
+            continue
+        matched.add(so.key)
+        s3_size, s3_etag = listed[so.key][:2]
+        if so.size == s3_size and (so.etag or "") == s3_etag:
+            continue
+        changed += 1
+        if dry_run:
+            log({
+                "kind": "s3_list",
+                "bucket": bucket,
+                "key": so.key,
+                "s3_size": s3_size,
+                "s3_etag": s3_etag,
+                "would_update": True,
+            })
+        else:
+            so.size = s3_size
+            so.etag = s3_etag
+    return changed, matched
 
-def log(entry: dict):
-    REP.parent.mkdir(parents=True, exist_ok=True)
-    with REP.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+def index_delta(s3, s, bucket: str, prefix: str, dry_run: bool) -> dict:
+    # ListObjectsV2 returns size and ETag for 1000 keys per call, so only objects modified
+    # at or after the committed LastModified mark are compared. LastModified has one-second
+    # resolution, so the mark's own second is read again (the update is idempotent). The new
+    # mark is pending until run_etl commits the round, and never passes an object that has
+    # no storage_object row yet, so it is compared again once the row exists.
+    source = f"s3:{bucket}/{prefix}"
+    since = get_hwm(source).get("last_modified")
+    since_dt = datetime.fromisoformat(since) if since else None
+    mark = since_dt
+    waiting = None
+    seen = 0
+    updated = 0
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        listed = {}
+        for obj in page.get("Contents", []):
+            modified = obj["LastModified"]
+            if since_dt is not None and modified < since_dt:
+                continue
+            listed[obj["Key"]] = (int(obj.get("Size", 0)), obj.get("ETag", "").strip('"'), modified)
+            mark = modified if mark is None else max(mark, modified)
+        if not listed:
+            continue
+        seen += len(listed)
+        changed, matched = _apply_listing(s, bucket, listed, dry_run)
+        updated += changed
+        for key in listed.keys() - matched:
+            modified = listed[key][2]
+            waiting = modified if waiting is None else min(waiting, modified)
+        if not dry_run:
+            s.commit()
+    if waiting is not None:
+        mark = waiting
+    if not dry_run and mark is not None:
+        set_hwm(source, {"last_modified": mark.isoformat()}, pending=True)
+    # only real changes count towards run_etl --until-empty
+    return {"indexed": seen, "updated": updated, "delta": updated, "since": since}
 
 
 def main():
     ap = argparse.ArgumentParser(description="Index S3 (HEAD) and sync to storage_object")
     ap.add_argument("--prefix", default=os.getenv("S3_PREFIX", ""))
     ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--delta", action="store_true", help="Only objects modified since the committed mark")
     ap.add_argument("--dry-run", action="store_true")
     args = ap.parse_args()
 
@@ -33,7 +94,12 @@ def main():
         print("ERR: S3_BUCKET is not set", file=sys.stderr)
         sys.exit(2)
 
-    SessionLocal = get_sessionmaker()
+    SessionLocal = get_read_sessionmaker() if args.dry_run else get_sessionmaker()
+    if args.delta:
+        with SessionLocal() as s:
+            print(json.dumps(index_delta(s3, s, bucket, args.prefix, args.dry_run)))
+        return
+
     total = 0
     updated = 0
     with SessionLocal() as s:
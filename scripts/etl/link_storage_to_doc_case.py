@@ -1,45 +1,74 @@
 #!/usr/bin/env python3
+import os
 import json
+import time
 import argparse
-from sqlalchemy import select
-from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
-from src.core.infrastructure.persistence.sqlalchemy.models import StorageObject, Document
+from sqlalchemy import text
+from src.core.infrastructure.persistence.sqlalchemy.session import get_read_sessionmaker, get_sessionmaker
+
+# Each storage object is linked to the document whose storage_ref equals its key (lowest
+# document id wins) and takes over that document's case. Runs set-based over keyset
+# chunks of storage_object ids, one index lookup (ix_document_storage_ref) per object;
+# only objects whose link actually changes are counted and updated.
+_MATCH = """
+    SELECT s.id, d.id AS document_id, d.case_pk
+    FROM storage_object s
+    CROSS JOIN LATERAL (
+        SELECT id, case_pk FROM document WHERE storage_ref = s.key ORDER BY id LIMIT 1
+    ) d
+    WHERE s.id > :lo AND s.id <= :hi
+      AND (s.document_id, s.case_pk) IS DISTINCT FROM (d.id, d.case_pk)
+"""
+CHUNK = text("SELECT max(id), count(*) FROM (SELECT id FROM storage_object WHERE id > :lo ORDER BY id LIMIT :n) c")
+COUNT = text(f"SELECT count(*) FROM ({_MATCH}) m")
+LINK = text(
+    f"""
+    UPDATE storage_object so
+    SET document_id = m.document_id, case_pk = m.case_pk, updated_at = (now() at time zone 'utc')
+    FROM ({_MATCH}) m
+    WHERE so.id = m.id
+    """
+)
+
 
 def main():
     ap = argparse.ArgumentParser(description="Link storage_object to document/case by storage_ref")
     ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--chunk-size", type=int, default=int(os.getenv("ETL_LINK_CHUNK", "50000")))
     ap.add_argument("--dry-run", action="store_true")
     args = ap.parse_args()
 
-    SessionLocal = get_sessionmaker()
+    SessionLocal = get_read_sessionmaker() if args.dry_run else get_sessionmaker()
     linked = 0
+    scanned = 0
+    t0 = time.perf_counter()
     with SessionLocal() as s:
-        q = select(StorageObject)
-        if args.limit:
-            q = q.limit(args.limit)
-        for so in s.scalars(q).all():
-            # find document by storage_ref == so.key
-            doc = s.scalars(select(Document).where(Document.storage_ref == so.key)).first()
-            if not doc:
-                continue
-            changed = False
-            if so.document_id != doc.id:
-                if args.dry_run:
-                    linked += 1
-                    continue
-                so.document_id = doc.id
-                changed = True
-            if so.case_pk != doc.case_pk:
-                if args.dry_run:
-                    linked += 1
-                    continue
-                so.case_pk = doc.case_pk
-                changed = True
-            if changed:
-                linked += 1
-        if not args.dry_run:
-            s.commit()
-    print(json.dumps({"linked": linked}))
+        lo = 0
+        while True:
+            n = args.chunk_size if args.limit is None else min(args.chunk_size, args.limit - scanned)
+            if n <= 0:
+                break
+            hi, count = s.execute(CHUNK, {"lo": lo, "n": n}).one()
+            if hi is None:
+                break
+            params = {"lo": lo, "hi": hi}
+            if args.dry_run:
+                linked += s.execute(COUNT, params).scalar() or 0
+            else:
+                linked += s.execute(LINK, params).rowcount or 0
+                s.commit()
+            scanned += count
+            lo = hi
+    elapsed = time.perf_counter() - t0
+    print(
+        json.dumps(
+            {
+                "linked": linked,
+                "scanned": scanned,
+                "rows_per_sec": round(scanned / elapsed, 1) if elapsed > 0 else None,
+            }
+        )
+    )
 
 if __name__ == "__main__":
     main()
@@ -2,75 +2,66 @@
 import os
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
-from typing import Iterator
+from typing import Optional
 
-from sqlalchemy import select
-
-from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
-from src.core.infrastructure.persistence.sqlalchemy.models import Tenant, Case
+from src.core.infrastructure.persistence.sqlalchemy.reference_cache import get_reference_cache
+from src.core.infrastructure.persistence.sqlalchemy.staging import load_cases
+from scripts.etl.common import delta_input, ensure_tenant, iter_jsonl, staged_load
 
 INP = Path("doc/etl/export/matters.jsonl")
 
 
-def iter_jsonl(p: Path) -> Iterator[dict]:
-    with p.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                continue
-
-
-def ensure_tenant(s, tenant_id: str):
-    row = s.get(Tenant, tenant_id)
-    if not row:
-        s.add(Tenant(tenant_id=tenant_id, name=tenant_id))
-        s.flush()
-    return tenant_id
+def to_row(rec: dict, tenant_id: str) -> Optional[dict]:
+    case_id = rec.get("matter_id")
+    if not case_id:
+        return None
+    title = rec.get("client_name") or rec.get("folder_path") or case_id
+    return {"tenant_id": tenant_id, "case_id": case_id, "title": title}
 
 
 def main():
     ap = argparse.ArgumentParser(description="Migrate matters to Case (idempotent upsert)")
-    ap.add_argument("--in", dest="inp", default=str(INP))
+    ap.add_argument("--in", dest="inp", default=None)
     ap.add_argument("--tenant", default=os.getenv("TENANT_ID", "default"))
+    ap.add_argument("--resume", action="store_true", help="Continue after the last committed chunk")
+    ap.add_argument("--delta", action="store_true", help="Load the export_old_db --delta output")
     ap.add_argument("--dry-run", action="store_true")
     args = ap.parse_args()
 
-    path = Path(args.inp)
+    path = Path(args.inp) if args.inp else (delta_input(INP) if args.delta else INP)
     if not path.exists():
         print(json.dumps({"error": f"input not found: {path}"}))
         sys.exit(2)
 
-    SessionLocal = get_sessionmaker()
-    created = 0
-    updated = 0
-    with SessionLocal() as s:
-        if not args.dry_run:
-            ensure_tenant(s, args.tenant)
-        for rec in iter_jsonl(path):
-            case_id = rec.get("matter_id")
-            title = rec.get("client_name") or rec.get("folder_path") or case_id
-            if not case_id:
-                continue
-            if args.dry_run:
-                continue
-            stmt = select(Case).where(Case.tenant_id == args.tenant, Case.case_id == case_id)
-            row = s.scalars(stmt).first()
-            if not row:
-                s.add(Case(tenant_id=args.tenant, case_id=case_id, title=title))
-                created += 1
-            else:
-                if (row.title or "") != (title or ""):
-                    row.title = title
-                    updated += 1
-        if not args.dry_run:
-            s.commit()
-    print(json.dumps({"cases_created": created, "cases_updated": updated}))
+    rows = (r for r in (to_row(rec, args.tenant) for rec in iter_jsonl(path)) if r is not None)
+    if args.dry_run:
+        print(json.dumps({"cases_created": 0, "cases_updated": 0, "cases_read": sum(1 for _ in rows)}))
+        return
+
+    t0 = time.perf_counter()
+    res = staged_load(
+        path,
+        lambda rec: to_row(rec, args.tenant),
+        load_cases,
+        stage="migrate_cases.delta" if args.delta else "migrate_cases",
+        resume=args.resume,
+        before_chunk=lambda s: ensure_tenant(s, args.tenant),
+    )
+    # drop cached misses for the cases that now exist
+    get_reference_cache("case").clear()
+    elapsed = time.perf_counter() - t0
+    out = {
+        "cases_created": res["created"],
+        "cases_updated": res["updated"],
+        "rows_per_sec": round(res["staged"] / elapsed, 1) if elapsed > 0 else None,
+    }
+    if args.delta:
+        # rows that actually changed, for run_etl --until-empty
+        out["delta"] = res["created"] + res["updated"]
+    print(json.dumps(out))
 
 
 if __name__ == "__main__":
@@ -2,132 +2,83 @@
 import os
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Optional
 
-from sqlalchemy import select
-
-from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
-from src.core.infrastructure.persistence.sqlalchemy.models import Tenant, Case, Document
+from src.core.infrastructure.persistence.sqlalchemy.staging import load_documents
+from scripts.etl.common import delta_input, ensure_tenant, iter_jsonl, staged_load
 
 INP = Path("doc/etl/export/docs.jsonl")
 
 
-def iter_jsonl(p: Path) -> Iterator[dict]:
-    with p.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                continue
-
-
-def ensure_tenant(s, tenant_id: str):
-    row = s.get(Tenant, tenant_id)
-    if not row:
-        s.add(Tenant(tenant_id=tenant_id, name=tenant_id))
-        s.flush()
-    return tenant_id
-
-
-def resolve_case_pk(s, tenant_id: str, case_id: Optional[str]) -> Optional[int]:
-    if not case_id:
+def to_row(rec: dict, tenant_id: str) -> Optional[dict]:
+    doc_id = rec.get("doc_id")
+    if not doc_id:
         return None
-    stmt = select(Case).where(Case.tenant_id == tenant_id, Case.case_id == case_id)
-    row = s.scalars(stmt).first()
-    if row:
-        return row.id
-    return None
+    # origin_meta may contain fs info
+    fs = None
+    meta_raw = rec.get("origin_meta") or rec.get("fs")
+    try:
+        fs = meta_raw if isinstance(meta_raw, dict) else json.loads(meta_raw) if meta_raw else None
+    except Exception:
+        fs = None
+    fs = (fs or {}).get("fs") or fs or {}
+    return {
+        "tenant_id": tenant_id,
+        "idempotency_key": doc_id,
+        # resolved to case_pk by the staging merge
+        "case_id": rec.get("matter_id") or None,
+        "doc_kind": rec.get("class_name"),
+        "title": rec.get("title"),
+        "mime": fs.get("mime"),
+        "size": fs.get("size"),
+        "sha256": rec.get("sha256_plain"),
+        "storage_ref": fs.get("key"),
+        "status": rec.get("status"),
+    }
 
 
 def main():
     ap = argparse.ArgumentParser(description="Migrate docs to Document (idempotent upsert)")
-    ap.add_argument("--in", dest="inp", default=str(INP))
+    ap.add_argument("--in", dest="inp", default=None)
     ap.add_argument("--tenant", default=os.getenv("TENANT_ID", "default"))
+    ap.add_argument("--resume", action="store_true", help="Continue after the last committed chunk")
+    ap.add_argument("--delta", action="store_true", help="Load the export_old_db --delta output")
     ap.add_argument("--dry-run", action="store_true")
     args = ap.parse_args()
 
-    path = Path(args.inp)
+    path = Path(args.inp) if args.inp else (delta_input(INP) if args.delta else INP)
     if not path.exists():
         print(json.dumps({"error": f"input not found: {path}"}))
         sys.exit(2)
 
-    SessionLocal = get_sessionmaker()
-    created = 0
-    updated = 0
-    with SessionLocal() as s:
-        if not args.dry_run:
-            ensure_tenant(s, args.tenant)
-        for rec in iter_jsonl(path):
-            doc_id = rec.get("doc_id")
-            case_id = rec.get("matter_id")
-            doc_kind = rec.get("class_name")
-            title = rec.get("title")
-            sha256 = rec.get("sha256_plain")
-            status = rec.get("status")
-            # origin_meta may contain fs info
-            fs = None
-            meta_raw = rec.get("origin_meta") or rec.get("fs")
-            try:
-                fs = meta_raw if isinstance(meta_raw, dict) else json.loads(meta_raw) if meta_raw else None
-            except Exception:
-                fs = None
-            fs = (fs or {}).get("fs") or fs or {}
-            mime = fs.get("mime")
-            size = fs.get("size")
-            storage_ref = fs.get("key")
-            if not doc_id:
-                continue
-            if args.dry_run:
-                # just count would-be actions
-                created += 1
-                continue
-            case_pk = resolve_case_pk(s, args.tenant, case_id)
-            stmt = select(Document).where(Document.tenant_id == args.tenant, Document.idempotency_key == doc_id)
-            row = s.scalars(stmt).first()
-            if not row:
-                row = Document(
-                    tenant_id=args.tenant,
-                    case_pk=case_pk,
-                    doc_kind=doc_kind,
-                    title=title,
-                    mime=mime,
-                    size=size,
-                    sha256=sha256,
-                    storage_ref=storage_ref,
-                    idempotency_key=doc_id,
-                    status=status,
-                )
-                s.add(row)
-                created += 1
-            else:
-                # update basic fields if changed
-                changed = False
-                if row.case_pk != case_pk:
-                    row.case_pk = case_pk; changed = True
-                if (row.doc_kind or "") != (doc_kind or ""):
-                    row.doc_kind = doc_kind; changed = True
-                if (row.title or "") != (title or ""):
-                    row.title = title; changed = True
-                if (row.mime or "") != (mime or ""):
-                    row.mime = mime; changed = True
-                if (row.size or 0) != (size or row.size):
-                    row.size = size or row.size; changed = True
-                if (row.sha256 or "") != (sha256 or ""):
-                    row.sha256 = sha256; changed = True
-                if (row.storage_ref or "") != (storage_ref or ""):
-                    row.storage_ref = storage_ref; changed = True
-                if (row.status or "") != (status or ""):
-                    row.status = status; changed = True
-                if changed:
-                    updated += 1
-        if not args.dry_run:
-            s.commit()
-    print(json.dumps({"documents_created": created, "documents_updated": updated}))
+    rows = (r for r in (to_row(rec, args.tenant) for rec in iter_jsonl(path)) if r is not None)
+    if args.dry_run:
+        # just count would-be actions
+        print(json.dumps({"documents_created": sum(1 for _ in rows), "documents_updated": 0}))
+        return
+
+    t0 = time.perf_counter()
+    res = staged_load(
+        path,
+        lambda rec: to_row(rec, args.tenant),
+        load_documents,
+        stage="migrate_documents.delta" if args.delta else "migrate_documents",
+        resume=args.resume,
+        before_chunk=lambda s: ensure_tenant(s, args.tenant),
+    )
+    elapsed = time.perf_counter() - t0
+    out = {
+        "documents_created": res["created"],
+        "documents_updated": res["updated"],
+        "rows_per_sec": round(res["staged"] / elapsed, 1) if elapsed > 0 else None,
+    }
+    if args.delta:
+        # rows that actually changed, for run_etl --until-empty
+        out["delta"] = res["created"] + res["updated"]
+    print(json.dumps(out))
 
 
 if __name__ == "__main__":
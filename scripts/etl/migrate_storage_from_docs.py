@@ -2,81 +2,81 @@
 import os
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
-from typing import Iterator
+from typing import Optional
 
-from sqlalchemy import select
-
-from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
-from src.core.infrastructure.persistence.sqlalchemy.models import StorageObject
+from src.core.infrastructure.persistence.sqlalchemy.reference_cache import get_reference_cache
+from src.core.infrastructure.persistence.sqlalchemy.staging import load_storage_objects
+from scripts.etl.common import delta_input, ensure_tenant, iter_jsonl, log, staged_load
 
 INP = Path("doc/etl/export/docs.jsonl")
-REP = Path("doc/etl/etl_report.jsonl")
-
 
-def iter_jsonl(p: Path) -> Iterator[dict]:
-    with p.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                continue
 
-
-def log(entry: dict):
-    REP.parent.mkdir(parents=True, exist_ok=True)
-    with REP.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+def to_row(rec: dict) -> Optional[dict]:
+    # origin_meta or fs holds S3 info
+    meta_raw = rec.get("origin_meta") or rec.get("fs")
+    fs = None
+    try:
+        fs = meta_raw if isinstance(meta_raw, dict) else json.loads(meta_raw) if meta_raw else None
+    except Exception:
+        fs = None
+    fs = (fs or {}).get("fs") or fs or {}
+    key = fs.get("key")
+    if not key:
+        return None
+    return {
+        "tenant_id": "default",
+        "bucket": fs.get("bucket") or os.getenv("S3_BUCKET"),
+        "key": key,
+        "size": fs.get("size"),
+        "etag": fs.get("etag") or fs.get("ETag"),
+    }
 
 
 def main():
     ap = argparse.ArgumentParser(description="Upsert storage_object from docs export (fs info)")
-    ap.add_argument("--in", dest="inp", default=str(INP))
+    ap.add_argument("--in", dest="inp", default=None)
+    ap.add_argument("--resume", action="store_true", help="Continue after the last committed chunk")
+    ap.add_argument("--delta", action="store_true", help="Load the export_old_db --delta output")
     ap.add_argument("--dry-run", action="store_true")
     args = ap.parse_args()
 
-    path = Path(args.inp)
+    path = Path(args.inp) if args.inp else (delta_input(INP) if args.delta else INP)
     if not path.exists():
         print(json.dumps({"error": f"input not found: {path}"}))
         sys.exit(2)
 
-    SessionLocal = get_sessionmaker()
-    upserts = 0
-    with SessionLocal() as s:
-        for rec in iter_jsonl(path):
-            # origin_meta or fs holds S3 info
-            meta_raw = rec.get("origin_meta") or rec.get("fs")
-            fs = None
-            try:
-                fs = meta_raw if isinstance(meta_raw, dict) else json.loads(meta_raw) if meta_raw else None
-            except Exception:
-                fs = None
-            fs = (fs or {}).get("fs") or fs or {}
-            bucket = (fs.get("bucket") or os.getenv("S3_BUCKET"))
-            key = fs.get("key")
-            size = fs.get("size")
-            etag = fs.get("etag") or fs.get("ETag")
-            tenant_id = "default"
-            if not key:
-                continue
-            if args.dry_run:
-                log({"kind": "dry_upsert_from_docs", "bucket": bucket, "key": key})
-                continue
-            stmt = select(StorageObject).where(StorageObject.bucket == bucket, StorageObject.key == key)
-            so = s.scalars(stmt).first()
-            if not so:
-                so = StorageObject(bucket=bucket, key=key, size=size, etag=etag, tenant_id=tenant_id)
-                s.add(so)
-            else:
-                so.size = size or so.size
-                so.etag = etag or so.etag
-            upserts += 1
-        s.commit()
-    print(json.dumps({"upserts_storage_object": upserts}))
+    rows = (r for r in (to_row(rec) for rec in iter_jsonl(path)) if r is not None)
+    if args.dry_run:
+        for r in rows:
+            log({"kind": "dry_upsert_from_docs", "bucket": r["bucket"], "key": r["key"]})
+        print(json.dumps({"upserts_storage_object": 0}))
+        return
+
+    t0 = time.perf_counter()
+    res = staged_load(
+        path,
+        to_row,
+        load_storage_objects,
+        stage="migrate_storage_from_docs.delta" if args.delta else "migrate_storage_from_docs",
+        resume=args.resume,
+        # runs next to migrate_cases, so it cannot rely on that stage creating the tenant
+        before_chunk=lambda s: ensure_tenant(s, "default"),
+    )
+    get_reference_cache("storage_object").clear()
+    elapsed = time.perf_counter() - t0
+    out = {
+        "upserts_storage_object": res["created"] + res["updated"],
+        "created": res["created"],
+        "updated": res["updated"],
+        "rows_per_sec": round(res["staged"] / elapsed, 1) if elapsed > 0 else None,
+    }
+    if args.delta:
+        # rows that actually changed, for run_etl --until-empty
+        out["delta"] = res["created"] + res["updated"]
+    print(json.dumps(out))
 
 
 if __name__ == "__main__":
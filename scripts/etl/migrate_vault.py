@@ -11,8 +11,7 @@ from sqlalchemy import select
 
 from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
 from src.core.infrastructure.persistence.sqlalchemy.models import Artifact
-
-REP = Path("doc/etl/etl_report.jsonl")
+from scripts.etl.common import log
 
 
 def sha256_file(path: str) -> str:
@@ -44,12 +43,6 @@ def try_parse_main_md(path: str):
         return None
 
 
-def log(entry: dict):
-    REP.parent.mkdir(parents=True, exist_ok=True)
-    with REP.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
-
 def main():
     ap = argparse.ArgumentParser(description="Migrate Vault files into artifacts table (idempotent upsert)")
     ap.add_argument("--root", default=os.getenv("OBSIDIAN_VAULT"), help="Vault root directory")
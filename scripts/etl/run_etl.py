@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from scripts.etl.common import CHECKPOINT_DIR, checkpoint_path, commit_hwm, load_checkpoint, save_checkpoint
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Runs the ETL scripts as a DAG: a stage starts once all its dependencies are done, and up
+# to --jobs ready stages run at the same time (each in its own process). Completion is
+# checkpointed per stage (see common.py), so a re-run skips finished stages and resumable
+# stages continue from their last committed offset. Progress, throughput and ETA of the
+# running stages are printed every ETL_REPORT_SECONDS.
+#   python -m scripts.etl.run_etl [--jobs 3] [--only ...] [--skip ...] [--force ...|all]
+#
+# --delta runs the stages that have delta_args with those arguments (checkpoints under
+# <stage>.delta), loading only what changed since the committed high-water marks; pending
+# marks are committed after a run without failures. With --until-empty delta rounds repeat
+# until no stage reports changes (the "delta" field of its summary), e.g. for the final
+# sync inside the cutover write freeze.
+#   python -m scripts.etl.run_etl --delta --until-empty
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    deps: Tuple[str, ...] = ()
+    # accepts --resume (continues from its own checkpoint / watermark)
+    resumable: bool = False
+    # arguments for a --delta run; None leaves the stage out of delta runs
+    delta_args: Optional[Tuple[str, ...]] = None
+
+
+STAGES = (
+    Stage("export_old_db", resumable=True, delta_args=("--delta",)),
+    Stage("migrate_cases", ("export_old_db",), resumable=True, delta_args=("--delta",)),
+    Stage("migrate_documents", ("migrate_cases",), resumable=True, delta_args=("--delta",)),
+    Stage("migrate_storage_from_docs", ("export_old_db",), resumable=True, delta_args=("--delta",)),
+    Stage("link_storage_to_doc_case", ("migrate_documents", "migrate_storage_from_docs"), delta_args=()),
+    Stage("index_s3", ("link_storage_to_doc_case",), delta_args=("--delta",)),
+    Stage("migrate_vault", ("migrate_documents",)),
+)
+
+
+def topo_order(stages) -> List[Stage]:
+    by_name = {st.name: st for st in stages}
+    order: List[Stage] = []
+    state: Dict[str, int] = {}
+
+    def visit(name: str) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"cycle in ETL stages at {name}")
+        state[name] = 1
+        for dep in by_name[name].deps:
+            visit(dep)
+        state[name] = 2
+        order.append(by_name[name])
+
+    for st in stages:
+        visit(st.name)
+    return order
+
+
+def downstream(order: List[Stage], roots: set) -> set:
+    # roots plus every stage that (transitively) consumes their output; order is topological
+    out = set(roots)
+    for st in order:
+        if any(d in out for d in st.deps):
+            out.add(st.name)
+    return out
+
+
+def progress(name: str, started: float, cp_start: Dict) -> Dict:
+    cp = load_checkpoint(name)
+    elapsed = time.monotonic() - started
+    out = {"stage": name, "elapsed_s": round(elapsed, 1)}
+    rows = cp.get("rows", 0) - cp_start.get("rows", 0)
+    if rows > 0 and elapsed > 0:
+        out["rows"] = cp.get("rows")
+        out["rows_per_sec"] = round(rows / elapsed, 1)
+    total, offset = cp.get("total"), cp.get("offset")
+    if total and offset is not None:
+        out["pct"] = round(100.0 * offset / total, 1)
+        done_bytes = offset - cp_start.get("offset", 0)
+        if done_bytes > 0:
+            out["eta_s"] = round((total - offset) / (done_bytes / elapsed), 1)
+    return out
+
+
+def last_json(path: Path) -> Dict:
+    # scripts print their summary as the last JSON document on stdout
+    try:
+        text = path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return {}
+    for candidate in (text, *reversed(text.splitlines())):
+        try:
+            value = json.loads(candidate)
+            return value if isinstance(value, dict) else {}
+        except Exception:
+            continue
+    return {}
+
+
+def cp_name(stage: str, delta: bool) -> str:
+    return f"{stage}.delta" if delta else stage
+
+
+def run_stages(
+    pending: List[Stage], done: set, forced: set, jobs: int, delta: bool
+) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(ROOT), env.get("PYTHONPATH")) if p)
+    report_every = float(os.getenv("ETL_REPORT_SECONDS", "10"))
+    running: Dict[str, Tuple[subprocess.Popen, float, Dict, Path]] = {}
+    failed: Dict[str, str] = {}
+    results: Dict[str, Dict] = {}
+    pending = list(pending)
+    done = set(done)
+    next_report = time.monotonic() + report_every
+    try:
+        while pending or running:
+            for st in list(pending):
+                blocked = [d for d in st.deps if d in failed]
+                if blocked:
+                    pending.remove(st)
+                    failed[st.name] = f"blocked by {', '.join(blocked)}"
+                    continue
+                if len(running) >= max(1, jobs) or not all(d in done for d in st.deps):
+                    continue
+                pending.remove(st)
+                cp = cp_name(st.name, delta)
+                resume = not delta and st.resumable and st.name not in forced
+                cmd = [sys.executable, "-m", f"scripts.etl.{st.name}"]
+                cmd += list(st.delta_args or ()) if delta else (["--resume"] if resume else [])
+                out_path = CHECKPOINT_DIR / f"{cp}.out"
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                cp_start = load_checkpoint(cp) if resume else {}
+                save_checkpoint(cp, status="running", started_at=datetime.utcnow().isoformat())
+                with out_path.open("w", encoding="utf-8") as out:
+                    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=out)
+                running[st.name] = (proc, time.monotonic(), cp_start, out_path)
+                print(json.dumps({"stage": st.name, "event": "started", "resume": resume, "delta": delta}), flush=True)
+
+            for name, (proc, started, _cp, out_path) in list(running.items()):
+                rc = proc.poll()
+                if rc is None:
+                    continue
+                del running[name]
+                seconds = round(time.monotonic() - started, 1)
+                result = last_json(out_path)
+                results[name] = {"seconds": seconds, **result}
+                if rc == 0:
+                    done.add(name)
+                    save_checkpoint(cp_name(name, delta), status="done", seconds=seconds, result=result)
+                else:
+                    failed[name] = f"exit code {rc}"
+                    save_checkpoint(cp_name(name, delta), status="failed", seconds=seconds, returncode=rc)
+                print(json.dumps({"stage": name, "event": "done" if rc == 0 else "failed", **results[name]}), flush=True)
+
+            if running and time.monotonic() >= next_report:
+                next_report = time.monotonic() + report_every
+                for name, (_proc, started, cp_start, _out) in running.items():
+                    print(
+                        json.dumps({"event": "progress", **progress(cp_name(name, delta), started, cp_start)}),
+                        flush=True,
+                    )
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        for name, (proc, *_rest) in running.items():
+            proc.terminate()
+            proc.wait()
+            # left as "running": resumable stages continue from their checkpoint next time
+        raise
+    return results, failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the ETL stages in dependency order")
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("ETL_JOBS", "3")), help="Stages run in parallel")
+    ap.add_argument("--only", nargs="*", help="Run just these stages (others count as done)")
+    ap.add_argument("--skip", nargs="*", default=[], help="Do not run these stages (they count as done)")
+    ap.add_argument("--force", nargs="*", default=[], help="Re-run these stages and everything downstream ('all' for every stage)")
+    ap.add_argument("--reset", action="store_true", help="Forget all checkpoints first")
+    ap.add_argument("--plan", action="store_true", help="Print the stage order and exit")
+    ap.add_argument("--delta", action="store_true", help="Sync only changes since the committed high-water marks")
+    ap.add_argument("--until-empty", action="store_true", help="With --delta: repeat rounds until nothing changed")
+    args = ap.parse_args()
+
+    order = topo_order(STAGES)
+    names = {st.name for st in order}
+    unknown = set(args.only or []) | set(args.skip) | (set(args.force) - {"all"})
+    if unknown - names:
+        print(f"ERR: unknown stages: {sorted(unknown - names)}", file=sys.stderr)
+        sys.exit(2)
+    if args.until_empty and (not args.delta or args.only or args.skip):
+        # partial delta rounds never commit their marks, so they would never run empty
+        print("ERR: --until-empty needs --delta over all delta stages", file=sys.stderr)
+        sys.exit(2)
+    if args.reset:
+        for st in order:
+            checkpoint_path(st.name).unlink(missing_ok=True)
+            checkpoint_path(cp_name(st.name, True)).unlink(missing_ok=True)
+
+    selected = set(args.only or names) - set(args.skip)
+    if args.delta:
+        selected = {n for n in selected if next(st for st in order if st.name == n).delta_args is not None}
+    # re-running a stage invalidates everything built from its output
+    forced = names if (args.delta or "all" in args.force) else downstream(order, set(args.force))
+    if not args.delta and not args.plan:
+        # also for stages this run skips: a later run must not resume or trust them
+        for name in forced:
+            checkpoint_path(name).unlink(missing_ok=True)
+    done = {st.name for st in order if st.name not in selected}
+    pending: List[Stage] = []
+    for st in order:
+        if st.name not in selected:
+            continue
+        if st.name not in forced and load_checkpoint(st.name).get("status") == "done":
+            done.add(st.name)
+        else:
+            pending.append(st)
+
+    if args.plan:
+        print(json.dumps({"run": [st.name for st in pending], "done": sorted(done), "delta": args.delta}, indent=2))
+        return
+
+    t0 = time.monotonic()
+    if not args.delta:
+        results, failed = run_stages(pending, done, forced, args.jobs, delta=False)
+        # marks of a full export hold once every stage has loaded it
+        if not failed and all(load_checkpoint(n).get("status") == "done" for n in names):
+            commit_hwm()
+        print(
+            json.dumps(
+                {"etl": results, "failed": failed, "seconds": round(time.monotonic() - t0, 1)},
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+        sys.exit(1 if failed else 0)
+
+    freeze_seconds = float(os.getenv("ETL_FREEZE_SECONDS", "900"))
+    max_rounds = int(os.getenv("ETL_DELTA_MAX_ROUNDS", "10"))
+    rounds = []
+    failed: Dict[str, str] = {}
+    while True:
+        started = time.monotonic()
+        results, failed = run_stages(pending, done, forced, args.jobs, delta=True)
+        changes = sum(int(r.get("delta") or 0) for r in results.values())
+        committed = {}
+        if not failed and not (args.only or args.skip):
+            committed = commit_hwm()
+        seconds = round(time.monotonic() - started, 1)
+        rounds.append({"etl": results, "failed": failed, "changes": changes, "seconds": seconds})
+        print(
+            json.dumps(
+                {
+                    "event": "delta_round",
+                    "round": len(rounds),
+                    "changes": changes,
+                    "seconds": seconds,
+                    "within_freeze": seconds <= freeze_seconds,
+                    "committed_marks": sorted(committed),
+                }
+            ),
+            flush=True,
+        )
+        if failed or not args.until_empty or changes == 0 or len(rounds) >= max_rounds:
+            break
+
+    print(
+        json.dumps(
+            {
+                "rounds": rounds,
+                "empty": not failed and rounds[-1]["changes"] == 0,
+                "failed": failed,
+                "seconds": round(time.monotonic() - t0, 1),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
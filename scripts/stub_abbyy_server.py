@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Local stand-in for the ABBYY Cloud OCR SDK v2 endpoints used by AbbyyAdapter.
+import argparse
+import json
+import threading
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, text: str = "stub text", fail_first: int = 0, fail_status: int = 503, polls: int = 1) -> None:
+        self.text = text
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.polls = polls
+        self.tasks: dict = {}
+        self.requests = 0
+        self.process_calls = 0
+        self.lock = threading.Lock()
+
+
+def make_server(port: int = 0, **state_kwargs) -> ThreadingHTTPServer:
+    state = StubState(**state_kwargs)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # keep test output quiet
+            pass
+
+        def _json(self, code: int, obj: dict) -> None:
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            url = urllib.parse.urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            with state.lock:
+                state.requests += 1
+                state.process_calls += 1
+                fail = state.process_calls <= state.fail_first
+            if url.path != "/v2/processImage":
+                return self._json(404, {"error": "not found"})
+            if fail:
+                return self._json(state.fail_status, {"error": "stub failure"})
+            task_id = str(uuid.uuid4())
+            with state.lock:
+                state.tasks[task_id] = state.polls
+            self._json(200, {"taskId": task_id, "status": "Queued", "requestStatusCheckDelay": 10})
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            with state.lock:
+                state.requests += 1
+            if url.path == "/v2/getTaskStatus":
+                task_id = urllib.parse.parse_qs(url.query).get("taskId", [""])[0]
+                with state.lock:
+                    left = state.tasks.get(task_id)
+                    if left is None:
+                        return self._json(404, {"error": "unknown task"})
+                    state.tasks[task_id] = left - 1
+                if left > 1:
+                    return self._json(200, {"taskId": task_id, "status": "InProgress", "requestStatusCheckDelay": 10})
+                host, port = self.server.server_address[:2]
+                return self._json(200, {
+                    "taskId": task_id,
+                    "status": "Completed",
+                    "resultUrls": [f"http://{host}:{port}/result/{task_id}.txt"],
+                })
+            if url.path.startswith("/result/"):
+                body = state.text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            self._json(404, {"error": "not found"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.state = state  # type: ignore[attr-defined]
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stub ABBYY Cloud OCR SDK server")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--text", default="stub text")
+    ap.add_argument("--fail-first", type=int, default=0)
+    ap.add_argument("--fail-status", type=int, default=503)
+    args = ap.parse_args()
+    server = make_server(args.port, text=args.text, fail_first=args.fail_first, fail_status=args.fail_status)
+    print(f"stub abbyy listening on http://127.0.0.1:{server.server_address[1]} (set ABBYY_URL)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
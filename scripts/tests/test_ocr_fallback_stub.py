@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+from scripts.stub_abbyy_server import make_server
+from src.core.application.services import ocr
+from src.core.application.services.ocr import Page, recognize_pages
+from src.core.application.services.throttling import CircuitBreaker, Throttle
+from src.core.domain.documents.ocr import OcrPageResult
+from src.core.infrastructure.external.ocr.v1_abbyy_adapter import AbbyyAdapter, AbbyyError
+
+
+class FakeTesseract:
+    cache_namespace = "fake"
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def recognize(self, image: bytes) -> OcrPageResult:
+        conf, cov = self.scores[int(image.decode())]
+        return OcrPageResult(text=f"local {image.decode()}", confidence=conf, coverage=cov)
+
+
+def pages(n):
+    for i in range(1, n + 1):
+        data = str(i).encode()
+        yield Page(i, lambda data=data: [data], "image", lambda data=data: data)
+
+
+def main():
+    ocr.get_ocr_cache = lambda: None
+    server = make_server(0, text="abbyy text", fail_first=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    adapter = AbbyyAdapter(
+        base_url=url,
+        throttle=Throttle(rate=50, burst=5, max_concurrency=2),
+        breaker=CircuitBreaker(failure_threshold=10, reset_timeout=1),
+        attempts=4,
+    )
+    # pages 2 and 4 fail the quality gate; 1 and 3 stay local
+    engine = FakeTesseract({1: (0.9, 0.95), 2: (0.4, 0.9), 3: (0.8, 0.8), 4: (0.9, 0.5)})
+    results, page_metrics = recognize_pages(pages(4), engine, "test", fallback=adapter)
+    engines = [m["engine"] for m in page_metrics]
+    assert engines == ["tesseract", "abbyy", "tesseract", "abbyy"], engines
+    assert page_metrics[1]["fallback"] == "confidence" and page_metrics[3]["fallback"] == "coverage"
+    assert results[1].text == "abbyy text"
+    assert page_metrics[1]["confidence"] is None and page_metrics[1]["tesseract_confidence"] == 0.4
+    assert server.state.process_calls == 4  # 2 transient failures retried
+
+    # permanent 4xx errors are not retried and keep the local result
+    bad = make_server(0, fail_first=100, fail_status=400)
+    threading.Thread(target=bad.serve_forever, daemon=True).start()
+    bad_adapter = AbbyyAdapter(
+        base_url=f"http://127.0.0.1:{bad.server_address[1]}",
+        throttle=Throttle(rate=50, burst=5, max_concurrency=2),
+        attempts=3,
+    )
+    try:
+        bad_adapter.recognize(b"x")
+        raise AssertionError("expected AbbyyError")
+    except AbbyyError:
+        pass
+    assert bad.state.process_calls == 1
+    _results, page_metrics = recognize_pages(pages(2), FakeTesseract({1: (0.1, 0.1), 2: (0.9, 0.9)}), "test", fallback=bad_adapter)
+    assert page_metrics[0]["engine"] == "tesseract" and "fallback_error" in page_metrics[0]
+
+    # a half-open probe always reports back: a permanent error closes the breaker, an
+    # unexpected exception re-opens it, and neither leaves the probe "in flight"
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    bad_adapter.breaker = breaker
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    try:
+        bad_adapter.recognize(b"x")
+    except AbbyyError:
+        pass
+    assert breaker.state == "closed", breaker.state
+    breaker.record_failure()
+    time.sleep(0.06)
+    bad_adapter._json = lambda *a, **kw: {}["taskId"]
+    try:
+        bad_adapter.recognize(b"x")
+    except KeyError:
+        pass
+    assert breaker.state == "open", breaker.state
+    time.sleep(0.06)
+    breaker.before_call()
+    print({"per_page": page_metrics, "abbyy_requests": server.state.requests})
+
+
+if __name__ == "__main__":
+    main()
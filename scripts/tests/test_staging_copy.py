@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from scripts.etl import common
+from src.core.infrastructure.persistence.sqlalchemy import session as session_module
+from src.core.infrastructure.persistence.sqlalchemy.staging import CopyStream, STORAGE_OBJECTS, _copy_value
+
+
+def check_copy_value():
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(None, "bigint") == "\\N"
+    assert _copy_value("") == ""
+    assert _copy_value(True) == "t" and _copy_value(False) == "f"
+    assert _copy_value({"a": "ü"}) == '{"a": "ü"}'
+    assert _copy_value(["x", 1]) == '["x", 1]'
+    # backslash first, so the escapes added after it are not doubled again
+    assert _copy_value("C:\\dir\\f") == "C:\\\\dir\\\\f"
+    assert _copy_value("a\tb\nc\rd") == "a\\tb\\nc\\rd"
+    assert _copy_value("\\N") == "\\\\N"
+    assert _copy_value("\\t") == "\\\\t"
+
+
+def check_bigint():
+    assert _copy_value(12, "bigint") == "12"
+    assert _copy_value(2**40, "bigint") == str(2**40)
+    assert _copy_value("12", "bigint") == "12"
+    assert _copy_value(" 12 ", "bigint") == "12"
+    assert _copy_value(12.0, "bigint") == "12"
+    assert _copy_value("12.0", "bigint") == "12"
+    assert _copy_value("1e3", "bigint") == "1000"
+    for bad in ("", "12.5", 12.5, "12 KB", "abc", "nan", True, {"size": 1}):
+        assert _copy_value(bad, "bigint") == "\\N", bad
+
+
+def check_copy_stream():
+    rows = [
+        {"tenant_id": "t", "bucket": "b", "key": f"k{i}\tx", "size": "1.0" if i % 2 else None, "etag": "e\\1"}
+        for i in range(2500)
+    ]
+    sizes = ["1" if i % 2 else "\\N" for i in range(2500)]
+    expected = "".join(f"t\tb\tk{i}\\tx\t{sizes[i]}\te\\\\1\n" for i in range(2500))
+
+    stream = CopyStream(rows, STORAGE_OBJECTS.columns)
+    assert stream.read() == expected
+    assert stream.read() == "" and stream.count == 2500
+
+    # small reads must reassemble the same text, and rows are only pulled as needed
+    stream = CopyStream(iter(rows), STORAGE_OBJECTS.columns)
+    first = stream.read(10)
+    assert len(first) == 10 and stream.count == 1000
+    parts = [first]
+    while True:
+        part = stream.read(4096)
+        if not part:
+            break
+        assert len(part) <= 4096
+        parts.append(part)
+    assert "".join(parts) == expected and stream.count == 2500
+
+    # missing keys are NULL
+    assert CopyStream([{"key": "k"}], STORAGE_OBJECTS.columns).read() == "\\N\t\\N\tk\t\\N\t\\N\n"
+
+
+class FakeLoader:
+    def __init__(self, fail_on_call=None):
+        self.calls = 0
+        self.keys = []
+        self.fail_on_call = fail_on_call
+
+    def __call__(self, s, rows):
+        self.calls += 1
+        rows = list(rows)
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("crash")
+        self.keys.extend(r["key"] for r in rows)
+        return {"staged": len(rows), "created": len(rows), "updated": 0}
+
+
+def to_row(rec):
+    return {"key": rec["key"]} if rec.get("key") else None
+
+
+def check_staged_load(tmp: Path):
+    common.CHECKPOINT_DIR = tmp / "checkpoints"
+    engine = create_engine(f"sqlite:///{tmp / 'db.sqlite'}", future=True)
+    session_module.get_sessionmaker = lambda: sessionmaker(bind=engine, future=True)
+
+    path = tmp / "in.jsonl"
+    lines = []
+    for i in range(10):
+        lines.append(json.dumps({"key": f"k{i}"}))
+        if i == 4:
+            lines.extend(["", "not json", json.dumps({"other": 1})])
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    size = path.stat().st_size
+
+    # 10 rows in chunks of 3: 3 + 3 + 3 + 1
+    loader = FakeLoader()
+    res = common.staged_load(path, to_row, loader, stage="t", chunk_rows=3)
+    assert res == {"staged": 10, "created": 10, "updated": 0}, res
+    assert loader.keys == [f"k{i}" for i in range(10)] and loader.calls == 4
+    cp = common.load_checkpoint("t")
+    assert cp["status"] == "done" and cp["offset"] == size and cp["rows"] == 10
+    assert cp["total"] == size and cp["mtime"] == path.stat().st_mtime_ns
+
+    # exactly divisible: the last, empty chunk ends the loop
+    loader = FakeLoader()
+    assert common.staged_load(path, to_row, loader, stage="t5", chunk_rows=5)["staged"] == 10
+    assert loader.keys == [f"k{i}" for i in range(10)]
+
+    # crash in the third chunk: the offset points just past the last committed record
+    loader = FakeLoader(fail_on_call=3)
+    try:
+        common.staged_load(path, to_row, loader, stage="c", chunk_rows=3)
+        raise AssertionError("expected crash")
+    except RuntimeError:
+        pass
+    cp = common.load_checkpoint("c")
+    assert cp["status"] == "running" and cp["rows"] == 6
+    with path.open("rb") as f:
+        assert f.read()[: cp["offset"]].decode().rstrip("\n").endswith('{"key": "k5"}')
+
+    # resume continues after k5 and keeps counting rows
+    loader = FakeLoader()
+    res = common.staged_load(path, to_row, loader, stage="c", resume=True, chunk_rows=3)
+    assert loader.keys == [f"k{i}" for i in range(6, 10)], loader.keys
+    assert res["staged"] == 10 and res["created"] == 4
+    assert common.load_checkpoint("c")["status"] == "done"
+
+    # resuming a finished stage starts over
+    loader = FakeLoader()
+    common.staged_load(path, to_row, loader, stage="c", resume=True, chunk_rows=3)
+    assert len(loader.keys) == 10
+
+    # a rewritten input invalidates the offset, even with the same size
+    common.save_checkpoint("c", status="running", offset=cp["offset"], rows=6)
+    os.utime(path, ns=(cp["mtime"] + 10**9, cp["mtime"] + 10**9))
+    loader = FakeLoader()
+    res = common.staged_load(path, to_row, loader, stage="c", resume=True, chunk_rows=3)
+    assert len(loader.keys) == 10 and res["staged"] == 10
+
+    # without --resume the checkpoint is ignored
+    common.save_checkpoint("c", status="running", offset=cp["offset"], rows=6)
+    loader = FakeLoader()
+    common.staged_load(path, to_row, loader, stage="c", chunk_rows=3)
+    assert len(loader.keys) == 10
+
+
+def main():
+    check_copy_value()
+    check_bigint()
+    check_copy_stream()
+    with tempfile.TemporaryDirectory() as tmp:
+        check_staged_load(Path(tmp))
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
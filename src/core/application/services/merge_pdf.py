@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import select
+
+from src.core.infrastructure.messaging.progress import publish_progress
+from src.core.infrastructure.pdf.streaming_writer import StreamingPdfWriter
+from src.core.infrastructure.persistence.sqlalchemy.models import Artifact, Document, StorageObject
+from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+from src.core.infrastructure.storage.multipart import MultipartUploadWriter
+from src.core.infrastructure.storage.paths import s3_final_key
+from src.core.infrastructure.storage.spool import get_spool
+
+log = logging.getLogger(__name__)
+
+
+def _iter_page_texts(jsonl_path: Optional[str]) -> Iterator[str]:
+    if not jsonl_path or not os.path.exists(jsonl_path):
+        return
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line).get("text") or ""
+            except Exception:
+                yield ""
+
+
+def assemble_searchable_pdf(
+    original_path: str, page_texts: Iterator[str], sink, on_page: Optional[Callable[[int, int], None]] = None
+) -> int:
+    try:
+        import pymupdf as fitz
+    except ImportError:  # PyMuPDF < 1.24
+        import fitz
+
+    dpi = int(os.getenv("MERGE_DPI", "150"))
+    quality = int(os.getenv("MERGE_JPEG_QUALITY", "75"))
+    writer = StreamingPdfWriter(sink)
+    texts = iter(page_texts)
+    # PyMuPDF opens PDFs and single images alike; pages are rendered one at a time
+    with fitz.open(original_path) as doc:
+        for idx in range(doc.page_count):
+            page = doc.load_page(idx)
+            pix = page.get_pixmap(dpi=dpi, alpha=False)
+            gray = pix.n == 1
+            jpeg = pix.tobytes("jpeg", jpg_quality=quality)
+            writer.add_page(
+                jpeg,
+                pix.width,
+                pix.height,
+                page.rect.width,
+                page.rect.height,
+                text=next(texts, ""),
+                colorspace="DeviceGray" if gray else "DeviceRGB",
+            )
+            del pix, jpeg
+            if on_page is not None:
+                on_page(idx + 1, doc.page_count)
+    writer.close()
+    return writer.page_count
+
+
+def merge_document(document_id: int) -> Optional[str]:
+    # The rows are read in one short session and the artifact is written in another: the
+    # download, rendering and upload in between can take minutes and must not keep a
+    # connection idle in transaction.
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        doc = s.get(Document, document_id)
+        if not doc:
+            log.warning("merge: document %s not found", document_id)
+            return None
+        so = s.scalars(
+            select(StorageObject).where(StorageObject.document_id == document_id).order_by(StorageObject.id.desc())
+        ).first()
+        if not so:
+            log.warning("merge: document %s has no storage object", document_id)
+            return None
+        ocr = s.scalars(
+            select(Artifact)
+            .where(Artifact.document_id == document_id, Artifact.kind == "ocr_text")
+            .order_by(Artifact.updated_at.desc())
+        ).first()
+        jsonl_path = os.path.splitext(ocr.vault_path)[0] + ".jsonl" if ocr and ocr.vault_path else None
+
+        tenant_id = doc.tenant_id
+        case_id = doc.case.case_id if doc.case is not None else "_unassigned"
+        source = (so.bucket or os.getenv("S3_BUCKET"), so.key, so.etag)
+        bucket = os.getenv("S3_BUCKET") or so.bucket
+        key = s3_final_key(tenant_id or "default", case_id, document_id)
+
+    from src.core.infrastructure.storage.s3_client import create_s3_client
+
+    spool = get_spool()
+    with spool.open_object(*source) as original:
+        # the PDF is streamed straight into the multipart upload; any exception
+        # inside the block aborts the upload so no partial object is left behind
+        with MultipartUploadWriter(create_s3_client(), bucket, key, content_type="application/pdf") as sink:
+            pages = assemble_searchable_pdf(
+                original,
+                _iter_page_texts(jsonl_path),
+                sink,
+                on_page=lambda done, total: publish_progress(tenant_id, document_id, "merge", done, total),
+            )
+
+    uri = f"s3://{bucket}/{key}"
+    with SessionLocal() as s:
+        row = s.scalars(select(Artifact).where(Artifact.document_id == document_id, Artifact.kind == "final_pdf")).first()
+        if row is None:
+            row = Artifact(tenant_id=tenant_id, document_id=document_id, kind="final_pdf")
+            s.add(row)
+        row.vault_path = uri
+        row.sha256 = sink.sha256.hexdigest()
+        row.size = sink.size
+        row.metrics = {"pages": pages, "parts": sink.parts}
+        s.commit()
+    log.info("merge done document=%s pages=%s size=%s -> %s", document_id, pages, sink.size, uri)
+    publish_progress(tenant_id, document_id, "done", pages, pages, uri=uri)
+    return uri
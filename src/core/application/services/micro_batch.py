@@ -0,0 +1,83 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    # Collects items submitted by concurrent callers (e.g. Dramatiq worker threads) and
+    # hands them to `fn` in one call once `max_items` are queued or `max_wait_ms` has passed
+    # since the first item of the batch. `fn` returns one entry per item; an entry that is
+    # an Exception fails only that item's future.
+
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Sequence[Any]],
+        max_items: int = 8,
+        max_wait_ms: float = 50.0,
+        name: str = "batch",
+    ) -> None:
+        self.fn = fn
+        self.max_items = max(1, max_items)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[Tuple[T, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item: T) -> "Future[R]":
+        fut: "Future[R]" = Future()
+        self._ensure_thread()
+        self._queue.put((item, fut))
+        return fut
+
+    def __call__(self, item: T, timeout: Optional[float] = None) -> R:
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[T, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for item, _fut in batch]
+            metrics.inc("micro_batches_total", batcher=self.name)
+            metrics.inc("micro_batch_items_total", len(items), batcher=self.name)
+            try:
+                results = list(self.fn(items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch returned {len(results)} results for {len(items)} items")
+            except BaseException as e:
+                log.exception("micro batch %s failed size=%s", self.name, len(items))
+                results = [e] * len(items)
+            for (_item, fut), res in zip(batch, results):
+                if isinstance(res, BaseException):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
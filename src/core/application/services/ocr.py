@@ -0,0 +1,363 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import select
+
+from src.core.application.services.micro_batch import MicroBatcher
+from src.core.application.services.ocr_cache import get_ocr_cache, page_fingerprint
+from src.core.domain.documents.ocr import OcrPageResult
+from src.core.infrastructure.external.ocr.v1_abbyy_adapter import AbbyyAdapter, get_abbyy_adapter
+from src.core.infrastructure.external.ocr.v1_tesseract_adapter import TesseractAdapter
+from src.core.infrastructure.messaging.progress import publish_progress
+from src.core.infrastructure.observability import metrics
+from src.core.infrastructure.persistence.sqlalchemy.models import Artifact, StorageObject
+from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+from src.core.infrastructure.storage.paths import vault_artifact_path
+from src.core.infrastructure.storage.spool import get_spool
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTS = ("jpg", "jpeg", "png", "tif", "tiff")
+
+
+@dataclass
+class Page:
+    number: int
+    fingerprint_parts: Callable[[], List[bytes]]
+    fingerprint_kind: str
+    render: Callable[[], bytes]
+    total: int = 1
+
+
+def _ext(key: str) -> str:
+    k = (key or "").lower()
+    return k.rsplit(".", 1)[-1] if "." in k else ""
+
+
+def _fingerprint_mode() -> str:
+    return os.getenv("OCR_CACHE_FINGERPRINT", "content")
+
+
+def _dpi() -> int:
+    return int(os.getenv("OCR_DPI", "300"))
+
+
+_REF = re.compile(r"\b(\d+) 0 R\b")
+# page tree / annotation back-links would pull in the rest of the document
+_PAGE_TREE_LINK = re.compile(r"/(?:Parent|P)\s*\d+ 0 R")
+
+
+def _page_object_parts(doc, page) -> List[bytes]:
+    # The page object plus everything reachable from it: content streams, resources, form
+    # XObjects (show_pdf_page pages all share the content "q /fzFrm0 Do Q"), fonts and
+    # images, with raw streams. Object numbers are replaced by visit order, so the same
+    # page in another file still gets the same key.
+    order: Dict[int, int] = {page.xref: 0}
+    queue: List[int] = [page.xref]
+    parts: List[bytes] = []
+
+    def number(m: "re.Match[str]") -> str:
+        xref = int(m.group(1))
+        if xref not in order:
+            order[xref] = len(order)
+            queue.append(xref)
+        return f"#{order[xref]}"
+
+    def visit(source: str) -> None:
+        parts.append(_REF.sub(number, _PAGE_TREE_LINK.sub("", source)).encode("utf-8"))
+
+    # /Resources may be inherited from the page tree
+    xref = page.xref
+    while doc.xref_get_key(xref, "Resources")[0] == "null":
+        kind, value = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(value.split()[0])
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            visit(value)
+
+    i = 0
+    while i < len(queue):
+        xref = queue[i]
+        i += 1
+        visit(doc.xref_object(xref, compressed=True))
+        if doc.xref_is_stream(xref):
+            parts.append(doc.xref_stream_raw(xref) or b"")
+    return parts
+
+
+def iter_pages(path: str, ext: str) -> Iterator[Page]:
+    if ext in IMAGE_EXTS:
+        def _read() -> bytes:
+            with open(path, "rb") as f:
+                return f.read()
+        yield Page(1, lambda: [_read()], "image", _read)
+        return
+
+    try:
+        import pymupdf as fitz
+    except ImportError:  # PyMuPDF < 1.24
+        import fitz
+
+    dpi = _dpi()
+    mode = _fingerprint_mode()
+    with fitz.open(path) as doc:
+        for idx in range(doc.page_count):
+            page = doc.load_page(idx)
+
+            def _render(page=page) -> bytes:
+                return page.get_pixmap(dpi=dpi).tobytes("png")
+
+            if mode == "render":
+                img = _render()
+                yield Page(idx + 1, lambda img=img: [img], "image", lambda img=img: img, doc.page_count)
+                continue
+
+            def _content(page=page) -> List[bytes]:
+                return _page_object_parts(doc, page)
+
+            yield Page(idx + 1, _content, "content", _render, doc.page_count)
+
+
+class BatchedTesseract:
+    # Drop-in for TesseractAdapter that funnels recognize() calls from all actor threads
+    # of the process through one MicroBatcher, so a flood of small images costs one
+    # tesseract run per batch instead of one per message.
+
+    def __init__(self, engine: TesseractAdapter, max_items: int, max_wait_ms: float) -> None:
+        self.engine = engine
+        self.batcher: MicroBatcher[bytes, OcrPageResult] = MicroBatcher(
+            self._run, max_items=max_items, max_wait_ms=max_wait_ms, name="ocr_img"
+        )
+
+    @property
+    def cache_namespace(self) -> str:
+        return self.engine.cache_namespace
+
+    def _run(self, images: List[bytes]) -> Sequence[Union[OcrPageResult, Exception]]:
+        try:
+            return self.engine.recognize_batch(images)
+        except Exception as e:
+            if len(images) == 1:
+                return [e]
+            # one bad input must not fail its neighbours: retry them one by one
+            log.warning("ocr batch of %s failed, falling back to single images: %s", len(images), e)
+            out: List[Union[OcrPageResult, Exception]] = []
+            for image in images:
+                try:
+                    out.append(self.engine.recognize(image))
+                except Exception as single:
+                    out.append(single)
+            return out
+
+    def recognize(self, image: bytes) -> OcrPageResult:
+        return self.batcher(image)
+
+
+_batched_engine: Optional[BatchedTesseract] = None
+
+
+def get_batched_engine() -> Optional[BatchedTesseract]:
+    global _batched_engine
+    max_items = int(os.getenv("OCR_BATCH_MAX_ITEMS", "8"))
+    if max_items <= 1:
+        return None
+    if _batched_engine is None:
+        _batched_engine = BatchedTesseract(
+            TesseractAdapter(), max_items, float(os.getenv("OCR_BATCH_MAX_WAIT_MS", "50"))
+        )
+    return _batched_engine
+
+
+def fallback_reason(res: OcrPageResult) -> Optional[str]:
+    # PRD rule (coverage<70% or avg_confidence<0.6), applied per page
+    if res.engine != "tesseract" or res.confidence is None or res.coverage is None:
+        return None
+    if res.coverage < float(os.getenv("OCR_FALLBACK_MIN_COVERAGE", "0.7")):
+        return "coverage"
+    if res.confidence < float(os.getenv("OCR_FALLBACK_MIN_CONFIDENCE", "0.6")):
+        return "confidence"
+    return None
+
+
+def _round(score: Optional[float]) -> Optional[float]:
+    return None if score is None else round(score, 4)
+
+
+def _page_metrics(number: int, res: OcrPageResult, cached: bool) -> Dict[str, Any]:
+    return {
+        "page": number,
+        "engine": res.engine,
+        "confidence": _round(res.confidence),
+        "coverage": _round(res.coverage),
+        "cached": cached,
+    }
+
+
+def recognize_pages(
+    pages: Iterator[Page],
+    engine: TesseractAdapter,
+    queue: str,
+    fallback: Optional[AbbyyAdapter] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[OcrPageResult], List[Dict[str, Any]]]:
+    cache = get_ocr_cache()
+    results: Dict[int, OcrPageResult] = {}
+    page_metrics: Dict[int, Dict[str, Any]] = {}
+    pending: Dict[int, Tuple[Future, Optional[str]]] = {}
+    executor: Optional[ThreadPoolExecutor] = None
+    window = 1
+    if fallback is not None:
+        window = int(os.getenv("ABBYY_MAX_CONCURRENCY", "4"))
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="ocr-fallback")
+
+    def _resolve(number: int) -> None:
+        fut, key = pending.pop(number)
+        m = page_metrics[number]
+        try:
+            res = fut.result()
+        except Exception as e:
+            # keep the local result; the page is flagged for review
+            log.warning("ocr fallback failed page=%s: %s", number, e)
+            m["fallback_error"] = str(e)
+            metrics.inc("ocr_fallback_pages_total", queue=queue, outcome="error")
+            return
+        metrics.inc("ocr_fallback_pages_total", queue=queue, outcome="ok")
+        results[number] = res
+        m.update(engine=res.engine, confidence=_round(res.confidence), coverage=_round(res.coverage))
+        if cache is not None and key is not None:
+            cache.put(key, res)
+
+    try:
+        for page in pages:
+            key: Optional[str] = None
+            res: Optional[OcrPageResult] = None
+            if cache is not None:
+                # rendered pages (and their OCR) change with the DPI
+                namespace = f"{engine.cache_namespace}|dpi={_dpi()}"
+                key = page_fingerprint(page.fingerprint_parts(), namespace, page.fingerprint_kind)
+                res = cache.get(key)
+            cached = res is not None
+            image: Optional[bytes] = None
+            if cache is not None:
+                # without a cache there is no hit ratio to report
+                metrics.inc("ocr_cache_hits_total" if cached else "ocr_cache_misses_total", queue=queue)
+            if not cached:
+                image = page.render()
+                res = engine.recognize(image)
+                if cache is not None and key is not None:
+                    cache.put(key, res)
+            assert res is not None
+            results[page.number] = res
+            m = page_metrics[page.number] = _page_metrics(page.number, res, cached)
+
+            reason = fallback_reason(res)
+            if reason and executor is not None:
+                m.update(fallback=reason, tesseract_confidence=m["confidence"], tesseract_coverage=m["coverage"])
+                image = image if image is not None else page.render()
+                pending[page.number] = (executor.submit(fallback.recognize, image), key)
+                # bound the number of rendered pages held in memory
+                while len(pending) > window:
+                    _resolve(min(pending))
+            if on_page is not None:
+                on_page(page.number, page.total)
+        for number in sorted(pending):
+            _resolve(number)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    if cache is not None:
+        metrics.set_gauge(
+            "ocr_cache_hit_ratio",
+            metrics.ratio("ocr_cache_hits_total", "ocr_cache_misses_total", queue=queue),
+            queue=queue,
+        )
+    ordered = sorted(results)
+    return [results[n] for n in ordered], [page_metrics[n] for n in ordered]
+
+
+def _write_results(so: StorageObject, results: List[OcrPageResult]) -> str:
+    case_id = so.case.case_id if so.case is not None else "_unassigned"
+    doc_ref = so.document_id or f"so{so.id}"
+    md_path = vault_artifact_path(so.tenant_id or "default", case_id, doc_ref, "ocr", f"so{so.id}", ext="md")
+    os.makedirs(os.path.dirname(md_path), exist_ok=True)
+    with open(md_path, "w", encoding="utf-8") as f:
+        for i, r in enumerate(results, start=1):
+            f.write(f"<!-- page {i} -->\n{r.text}\n\n")
+    # per-page results are kept next to the text for the merge step
+    with open(os.path.splitext(md_path)[0] + ".jsonl", "w", encoding="utf-8") as f:
+        for i, r in enumerate(results, start=1):
+            f.write(json.dumps({"page": i, **r.to_dict()}, ensure_ascii=False) + "\n")
+    return md_path
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ocr_storage_object(storage_object_id: int, queue: str, engine: Optional[TesseractAdapter] = None) -> None:
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        so = s.get(StorageObject, storage_object_id)
+        if not so:
+            log.warning("ocr: storage_object %s not found", storage_object_id)
+            return
+        def _progress(done: int, total: int) -> None:
+            publish_progress(so.tenant_id, so.document_id, "ocr", done, total)
+
+        # the spool keeps the original on local disk across retries / chunked jobs
+        with get_spool().open(so) as path:
+            engine = engine or TesseractAdapter()
+            results, page_metrics = recognize_pages(
+                iter_pages(path, _ext(so.key)), engine, queue, fallback=get_abbyy_adapter(), on_page=_progress
+            )
+
+        md_path = _write_results(so, results)
+        row = s.scalars(select(Artifact).where(Artifact.vault_path == md_path)).first()
+        if row is None:
+            row = Artifact(tenant_id=so.tenant_id, document_id=so.document_id, kind="ocr_text", vault_path=md_path)
+            s.add(row)
+        row.sha256 = _sha256_file(md_path)
+        row.size = os.path.getsize(md_path)
+        hits = sum(1 for m in page_metrics if m["cached"])
+        row.metrics = {
+            "pages": len(results),
+            "cache_hits": hits,
+            "fallback_pages": sum(1 for m in page_metrics if m.get("fallback")),
+            "per_page": page_metrics,
+        }
+        merge = None
+        if so.document_id:
+            from src.core.infrastructure.messaging.outbox import outbox_enabled, stage
+            from src.worker_app.workers.merge_pdf_task import merge_pdf_task
+
+            merge = merge_pdf_task.message_with_options(
+                args=(so.document_id,), tenant_id=so.tenant_id, document_id=so.document_id
+            )
+            if outbox_enabled():
+                # committed together with the artifact; the outbox relay sends it
+                stage(s, [merge])
+                merge = None
+        s.commit()
+        log.info(
+            "ocr done storage_object=%s pages=%s cache_hits=%s queue=%s queue_hit_ratio=%.2f",
+            storage_object_id,
+            len(results),
+            hits,
+            queue,
+            metrics.get("ocr_cache_hit_ratio", queue=queue),
+        )
+        if merge is not None:
+            merge_pdf_task.broker.enqueue(merge)
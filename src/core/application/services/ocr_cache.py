@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import redis
+
+from src.core.domain.documents.ocr import OcrPageResult
+
+log = logging.getLogger(__name__)
+
+
+def page_fingerprint(parts: Iterable[bytes], namespace: str, kind: str = "image") -> str:
+    # kind: "image" (rendered page / original image bytes) or "content" (page objects and streams)
+    h = hashlib.sha256()
+    h.update(f"{namespace}|{kind}|".encode("utf-8"))
+    for p in parts:
+        h.update(len(p).to_bytes(8, "big"))
+        h.update(p)
+    return h.hexdigest()
+
+
+class DiskLruCache:
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._size = self._scan_size()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def _scan_size(self) -> int:
+        total = 0
+        for dirpath, _dirs, files in os.walk(self.root):
+            for fn in files:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, fn))
+                except OSError:
+                    pass
+        return total
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # mtime doubles as the LRU clock
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                # overwriting an entry only grows the cache by the difference
+                old = os.path.getsize(path)
+            except OSError:
+                old = 0
+            os.replace(tmp, path)
+            self._size += len(data) - old
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            entries = []
+            for dirpath, _dirs, files in os.walk(self.root):
+                for fn in files:
+                    if not fn.endswith(".json"):
+                        continue
+                    full = os.path.join(dirpath, fn)
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, full))
+            total = sum(e[1] for e in entries)
+            # evict down to 90% so we don't rescan on every put
+            target = int(self.max_bytes * 0.9)
+            entries.sort()
+            removed = 0
+            for _mtime, size, full in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(full)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+            self._size = total
+        if removed:
+            log.info("ocr cache evicted entries=%s size=%s", removed, total)
+
+
+class RedisTier:
+    def __init__(self, url: str, ttl_seconds: int) -> None:
+        self._r = redis.Redis.from_url(url)
+        self._ttl = ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._r.get(f"ocr:page:{key}")
+        except redis.RedisError as e:
+            log.warning("ocr cache redis get failed: %s", e)
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        try:
+            self._r.set(f"ocr:page:{key}", data, ex=self._ttl)
+        except redis.RedisError as e:
+            log.warning("ocr cache redis set failed: %s", e)
+
+
+class OcrResultCache:
+    def __init__(self, disk: DiskLruCache, shared: Optional[RedisTier] = None) -> None:
+        self.disk = disk
+        self.shared = shared
+
+    def get(self, key: str) -> Optional[OcrPageResult]:
+        raw = self.disk.get(key)
+        if raw is None and self.shared is not None:
+            raw = self.shared.get(key)
+            if raw is not None:
+                # promote into the local tier
+                self.disk.put(key, raw)
+        if raw is None:
+            return None
+        try:
+            return OcrPageResult.from_dict(json.loads(raw))
+        except Exception:
+            return None
+
+    def put(self, key: str, result: OcrPageResult) -> None:
+        raw = json.dumps({**result.to_dict(), "ts": int(time.time())}, ensure_ascii=False).encode("utf-8")
+        self.disk.put(key, raw)
+        if self.shared is not None:
+            self.shared.put(key, raw)
+
+
+_cache: Optional[OcrResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OcrResultCache]:
+    global _cache
+    if os.getenv("OCR_CACHE_ENABLED", "1") in ("0", "false", "FALSE", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                root = os.getenv("OCR_CACHE_DIR", "./.cache/ocr")
+                max_mb = int(os.getenv("OCR_CACHE_MAX_MB", "1024"))
+                shared = None
+                redis_url = os.getenv("OCR_CACHE_REDIS_URL")
+                if redis_url:
+                    ttl = int(os.getenv("OCR_CACHE_REDIS_TTL", str(30 * 24 * 3600)))
+                    shared = RedisTier(redis_url, ttl)
+                _cache = OcrResultCache(DiskLruCache(root, max_mb * 1024 * 1024), shared)
+    return _cache
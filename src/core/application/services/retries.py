@@ -0,0 +1,38 @@
+import logging
+import random
+import time
+from typing import Callable, Tuple, Type, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 120.0) -> float:
+    # exponential backoff with full jitter, attempt starts at 1
+    exp = min(cap, base * (2 ** max(0, attempt - 1)))
+    return random.uniform(0, exp)
+
+
+def retry_call(
+    fn: Callable[[], T],
+    *,
+    attempts: int = 5,
+    base: float = 0.5,
+    cap: float = 120.0,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    last: BaseException | None = None
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except retry_on as e:
+            last = e
+            if attempt >= attempts:
+                break
+            delay = backoff_delay(attempt, base, cap)
+            log.info("retry %s/%s in %.2fs after %s", attempt, attempts, delay, e)
+            sleep(delay)
+    assert last is not None
+    raise last
@@ -0,0 +1,120 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        # returns 0 when acquired, otherwise seconds to wait before retrying
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            if self.rate <= 0:
+                return float("inf")
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0 or wait > left:
+                    return False
+            time.sleep(min(wait, 1.0))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            st = self._state()
+            if st == "open":
+                raise CircuitOpenError("circuit open")
+            if st == "half_open":
+                # let exactly one probe through until it reports back
+                if self._half_open_probe:
+                    raise CircuitOpenError("circuit half-open, probe in flight")
+                self._half_open_probe = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._half_open_probe = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._half_open_probe or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._half_open_probe = False
+
+
+class Throttle:
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        acquire_timeout: Optional[float] = None,
+    ) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.acquire_timeout = acquire_timeout
+
+    @contextmanager
+    def concurrency(self) -> Iterator[None]:
+        if not self.slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("throttle: no concurrency slot available")
+        try:
+            yield
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self.concurrency():
+            if not self.bucket.acquire(timeout=self.acquire_timeout):
+                raise TimeoutError("throttle: rate limit wait exceeded")
+            yield
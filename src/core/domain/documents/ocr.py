@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class OcrPageResult:
+    text: str
+    # None when the engine reports no scores (ABBYY txt export)
+    confidence: Optional[float]
+    coverage: Optional[float]
+    engine: str = "tesseract"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OcrPageResult":
+        return cls(
+            text=data.get("text") or "",
+            confidence=_score(data, "confidence"),
+            coverage=_score(data, "coverage"),
+            engine=data.get("engine") or "tesseract",
+        )
+
+
+def _score(data: Dict[str, Any], name: str) -> Optional[float]:
+    value = data.get(name, 0.0)
+    return None if value is None else float(value)
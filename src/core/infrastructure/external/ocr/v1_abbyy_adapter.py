@@ -1 +1,151 @@
-# placeholder abbyy adapter
+import base64
+import json
+import logging
+import os
+import socket
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Optional
+
+from src.core.application.services.retries import retry_call
+from src.core.application.services.throttling import CircuitBreaker, Throttle
+from src.core.domain.documents.ocr import OcrPageResult
+
+log = logging.getLogger(__name__)
+
+
+class AbbyyError(RuntimeError):
+    pass
+
+
+class AbbyyTransientError(AbbyyError):
+    pass
+
+
+class AbbyyAdapter:
+    # ABBYY Cloud OCR SDK v2: processImage -> getTaskStatus (poll) -> download resultUrls[0]
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        app_id: Optional[str] = None,
+        password: Optional[str] = None,
+        language: Optional[str] = None,
+        timeout: float = 60.0,
+        task_timeout: float = 300.0,
+        throttle: Optional[Throttle] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        attempts: int = 5,
+    ) -> None:
+        self.base_url = (base_url or os.getenv("ABBYY_URL", "https://cloud-eu.ocrsdk.com")).rstrip("/")
+        self.app_id = app_id or os.getenv("ABBYY_APP_ID", "")
+        self.password = password or os.getenv("ABBYY_PASSWORD", "")
+        self.language = language or os.getenv("ABBYY_LANGUAGE", "Russian,English")
+        self.timeout = timeout
+        self.task_timeout = task_timeout
+        self.attempts = attempts
+        self.throttle = throttle or Throttle(
+            rate=float(os.getenv("ABBYY_RPS", "2")),
+            burst=int(os.getenv("ABBYY_BURST", "5")),
+            max_concurrency=int(os.getenv("ABBYY_MAX_CONCURRENCY", "4")),
+            acquire_timeout=float(os.getenv("ABBYY_ACQUIRE_TIMEOUT", "120")),
+        )
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv("ABBYY_CB_FAILURES", "5")),
+            reset_timeout=float(os.getenv("ABBYY_CB_RESET_SECONDS", "60")),
+        )
+
+    def _auth_header(self) -> Dict[str, str]:
+        if not self.app_id:
+            return {}
+        token = base64.b64encode(f"{self.app_id}:{self.password}".encode("utf-8")).decode("ascii")
+        return {"Authorization": f"Basic {token}"}
+
+    def _request(self, method: str, url: str, body: Optional[bytes] = None, auth: bool = True) -> bytes:
+        # every HTTP call spends a rate-limit token, polling included
+        if not self.throttle.bucket.acquire(timeout=self.throttle.acquire_timeout):
+            raise AbbyyTransientError("abbyy: rate limit wait exceeded")
+        headers = self._auth_header() if auth else {}
+        if body is not None:
+            headers["Content-Type"] = "application/octet-stream"
+        req = urllib.request.Request(url, data=body, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise AbbyyTransientError(f"abbyy http {e.code}") from e
+            raise AbbyyError(f"abbyy http {e.code}") from e
+        except (urllib.error.URLError, socket.timeout, ConnectionError) as e:
+            raise AbbyyTransientError(f"abbyy network error: {e}") from e
+
+    def _json(self, method: str, path: str, params: Dict[str, str], body: Optional[bytes] = None) -> Dict[str, Any]:
+        url = f"{self.base_url}{path}?{urllib.parse.urlencode(params)}"
+        return json.loads(self._request(method, url, body))
+
+    def _process_once(self, image: bytes) -> str:
+        self.breaker.before_call()
+        try:
+            task = self._json(
+                "POST",
+                "/v2/processImage",
+                {"language": self.language, "exportFormat": "txt"},
+                body=image,
+            )
+            deadline = time.monotonic() + self.task_timeout
+            while task.get("status") not in ("Completed", "ProcessingFailed", "NotEnoughCredits", "Deleted"):
+                if time.monotonic() > deadline:
+                    raise AbbyyTransientError(f"abbyy task {task.get('taskId')} timed out")
+                time.sleep(max(0.2, int(task.get("requestStatusCheckDelay") or 1000) / 1000.0))
+                task = self._json("GET", "/v2/getTaskStatus", {"taskId": task["taskId"]})
+            if task.get("status") != "Completed":
+                raise AbbyyError(f"abbyy task {task.get('taskId')} status={task.get('status')}")
+            urls = task.get("resultUrls") or []
+            if not urls:
+                raise AbbyyError(f"abbyy task {task.get('taskId')} has no result")
+            text = self._request("GET", urls[0], auth=False).decode("utf-8-sig")
+        except AbbyyTransientError:
+            self.breaker.record_failure()
+            raise
+        except AbbyyError:
+            # 4xx / failed task: the service answered, so this is not an outage (and a
+            # half-open probe must report back either way)
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return text
+
+    def _attempt(self, image: bytes) -> str:
+        # the concurrency slot is held per attempt, not across the backoff sleeps, so
+        # retries waiting out a throttled ABBYY do not starve other pages
+        with self.throttle.concurrency():
+            return self._process_once(image)
+
+    def recognize(self, image: bytes) -> OcrPageResult:
+        text = retry_call(
+            lambda: self._attempt(image),
+            attempts=self.attempts,
+            base=float(os.getenv("ABBYY_BACKOFF_BASE", "1")),
+            cap=float(os.getenv("ABBYY_BACKOFF_CAP", "120")),
+            retry_on=(AbbyyTransientError,),
+        )
+        text = text.strip()
+        # txt export carries no scores; the fallback result is accepted as final
+        return OcrPageResult(text=text, confidence=None, coverage=None, engine="abbyy")
+
+
+_adapter: Optional[AbbyyAdapter] = None
+
+
+def get_abbyy_adapter() -> Optional[AbbyyAdapter]:
+    global _adapter
+    if not os.getenv("ABBYY_URL"):
+        return None
+    if _adapter is None:
+        _adapter = AbbyyAdapter()
+    return _adapter
@@ -1 +1,109 @@
-# placeholder tesseract adapter
+import io
+import os
+import tempfile
+from typing import Dict, List, Sequence, Tuple, Union
+
+from src.core.domain.documents.ocr import OcrPageResult
+
+
+def _lines_from_data(data: Dict[str, list]) -> Tuple[str, float, float]:
+    # image_to_data returns one row per layout element; level 5 rows are words
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confs: List[float] = []
+    words_total = 0
+    for i, level in enumerate(data.get("level", [])):
+        if int(level) != 5:
+            continue
+        word = (data["text"][i] or "").strip()
+        if not word:
+            continue
+        words_total += 1
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            confs.append(conf)
+        key = (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+        lines.setdefault(key, []).append(word)
+    text = "\n".join(" ".join(ws) for _k, ws in sorted(lines.items()))
+    confidence = (sum(confs) / len(confs) / 100.0) if confs else 0.0
+    # share of word boxes that tesseract actually recognised (conf > 0)
+    coverage = (sum(1 for c in confs if c > 0) / words_total) if words_total else 0.0
+    return text, confidence, coverage
+
+
+class TesseractAdapter:
+    def __init__(self, lang: str | None = None, config: str | None = None) -> None:
+        self.lang = lang or os.getenv("OCR_LANG", "rus+eng")
+        self.config = config if config is not None else os.getenv("TESSERACT_CONFIG", "")
+
+    @property
+    def cache_namespace(self) -> str:
+        # results differ per language pack / config, so they are part of the cache key
+        return f"tesseract|{self.lang}|{self.config}"
+
+    def recognize(self, image: bytes) -> OcrPageResult:
+        # heavy imports are deferred until the first page is recognised
+        import pytesseract
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image)) as img:
+            data = pytesseract.image_to_data(
+                img,
+                lang=self.lang,
+                config=self.config,
+                output_type=pytesseract.Output.DICT,
+            )
+        text, confidence, coverage = _lines_from_data(data)
+        return OcrPageResult(text=text, confidence=confidence, coverage=coverage, engine="tesseract")
+
+    def recognize_batch(self, images: Sequence[bytes]) -> List[Union[OcrPageResult, Exception]]:
+        # one tesseract process for the whole batch: the images are passed as a list file
+        # and the TSV rows are split back per image by page_num
+        import pytesseract
+        from PIL import Image
+
+        out: List[Union[OcrPageResult, Exception]] = [OcrPageResult("", 0.0, 0.0) for _ in images]
+        with tempfile.TemporaryDirectory(prefix="ocr-batch-") as tmp:
+            paths: List[str] = []
+            slots: List[int] = []
+            for i, image in enumerate(images):
+                # decode up front so an unreadable image fails alone instead of the batch
+                try:
+                    with Image.open(io.BytesIO(image)) as img:
+                        img.load()
+                        if img.format in ("JPEG", "PNG") and getattr(img, "n_frames", 1) == 1:
+                            path = os.path.join(tmp, f"{i}.{img.format.lower()}")
+                            with open(path, "wb") as f:
+                                f.write(image)
+                        else:
+                            # multi-frame TIFFs would shift page_num; keep the first frame only
+                            path = os.path.join(tmp, f"{i}.png")
+                            img.save(path, "PNG")
+                except Exception as e:
+                    out[i] = e
+                    continue
+                paths.append(path)
+                slots.append(i)
+            if not paths:
+                return out
+            if len(paths) == 1:
+                with open(paths[0], "rb") as f:
+                    out[slots[0]] = self.recognize(f.read())
+                return out
+            list_path = os.path.join(tmp, "batch.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(paths) + "\n")
+            data = pytesseract.image_to_data(
+                list_path,
+                lang=self.lang,
+                config=self.config,
+                output_type=pytesseract.Output.DICT,
+            )
+        per_page: Dict[int, Dict[str, list]] = {}
+        for row in range(len(data.get("level", []))):
+            page = per_page.setdefault(int(data["page_num"][row]), {k: [] for k in data})
+            for k, col in data.items():
+                page[k].append(col[row])
+        for n, slot in enumerate(slots, start=1):
+            text, confidence, coverage = _lines_from_data(per_page.get(n, {}))
+            out[slot] = OcrPageResult(text=text, confidence=confidence, coverage=coverage, engine="tesseract")
+        return out
@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import dramatiq
+from dramatiq import Message
+from dramatiq.common import q_name
+
+from src.core.application.services.throttling import TokenBucket
+from src.core.infrastructure.messaging.outbox import publish_batch
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# Dramatiq's Redis broker parks dead messages per canonical queue in
+#   <ns>:<queue>.XQ       zset  redis_message_id -> dead-at timestamp (ms)
+#   <ns>:<queue>.XQ.msgs  hash  redis_message_id -> encoded message
+# (<queue>.DQ is the *delay* queue). Requeued messages go back through the broker's
+# enqueue, so enqueue middleware (job tracking) sees them like any other message.
+
+_SCAN_BATCH = 500
+
+
+@dataclass
+class DeadLetterFilter:
+    actor: Optional[str] = None
+    error: Optional[str] = None
+    older_than_s: Optional[float] = None
+    newer_than_s: Optional[float] = None
+
+    def score_range(self, now_ms: int) -> Tuple[Any, Any]:
+        hi: Any = "+inf" if self.older_than_s is None else now_ms - int(self.older_than_s * 1000)
+        lo: Any = "-inf" if self.newer_than_s is None else now_ms - int(self.newer_than_s * 1000)
+        return lo, hi
+
+    def matches(self, msg: Dict[str, Any]) -> bool:
+        if self.actor and msg.get("actor_name") != self.actor:
+            return False
+        if self.error:
+            tb = (msg.get("options") or {}).get("traceback") or ""
+            if self.error.lower() not in tb.lower():
+                return False
+        return True
+
+
+def _last_error(msg: Dict[str, Any]) -> Optional[str]:
+    tb = (msg.get("options") or {}).get("traceback")
+    if not tb:
+        return None
+    lines = [ln for ln in tb.strip().splitlines() if ln.strip()]
+    return lines[-1] if lines else None
+
+
+def summarize(redis_id: str, dead_at_ms: float, msg: Dict[str, Any]) -> Dict[str, Any]:
+    opts = msg.get("options") or {}
+    return {
+        "id": redis_id,
+        "message_id": msg.get("message_id"),
+        "queue_name": q_name(msg.get("queue_name") or ""),
+        "actor_name": msg.get("actor_name"),
+        "args": msg.get("args") or [],
+        "kwargs": msg.get("kwargs") or {},
+        "retries": opts.get("retries", 0),
+        "error": _last_error(msg),
+        "message_timestamp": msg.get("message_timestamp"),
+        "dead_at": int(dead_at_ms),
+    }
+
+
+class DeadLetterQueue:
+    def __init__(self, client, namespace: str = "dramatiq", broker=None) -> None:
+        self.client = client
+        self.namespace = namespace
+        self.broker = broker
+
+    def _key(self, queue: str) -> str:
+        return f"{self.namespace}:{queue}"
+
+    def _xq(self, queue: str) -> str:
+        return f"{self.namespace}:{q_name(queue)}.XQ"
+
+    def queues(self) -> Dict[str, int]:
+        prefix = f"{self.namespace}:"
+        names = [k.decode() if isinstance(k, bytes) else k for k in self.client.scan_iter(match=f"{prefix}*.XQ")]
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.zcard(name)
+        counts = pipe.execute() if names else []
+        return {name[len(prefix):-3]: int(n) for name, n in zip(names, counts)}
+
+    def _scan(self, queue: str, flt: DeadLetterFilter, cursor: Optional[str] = None) -> Iterator[Tuple[str, float, Dict[str, Any]]]:
+        # oldest-dead first; cursor is "<score>:<redis_id>" of the last item already seen.
+        # Members with equal score come back lexicographically ordered, which makes the
+        # (score, id) pair a stable keyset position.
+        lo, hi = flt.score_range(int(time.time() * 1000))
+        after: Optional[Tuple[float, str]] = None
+        if cursor:
+            score, _sep, rid = cursor.partition(":")
+            after = (float(score), rid)
+            lo = after[0]
+        xq = self._xq(queue)
+        skip = 0
+        while True:
+            raw_rows = self.client.zrangebyscore(xq, lo, hi, start=skip, num=_SCAN_BATCH, withscores=True)
+            rows = [(r.decode() if isinstance(r, bytes) else r, s) for r, s in raw_rows]
+            if after is not None:
+                rows = [(r, s) for r, s in rows if (s, r) > after]
+            if not rows:
+                if len(raw_rows) < _SCAN_BATCH:
+                    return
+                # a full batch sharing the cursor's timestamp: step over it
+                skip += len(raw_rows)
+                continue
+            skip = 0
+            datas = self.client.hmget(f"{xq}.msgs", [r for r, _s in rows])
+            for (rid, score), raw in zip(rows, datas):
+                after = (score, rid)
+                if raw is None:
+                    continue
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    log.warning("dlq: undecodable message %s in %s", rid, xq)
+                    continue
+                if flt.matches(msg):
+                    yield rid, score, msg
+            lo = after[0]
+
+    def page(
+        self, queue: str, flt: DeadLetterFilter, cursor: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        items: List[Dict[str, Any]] = []
+        next_cursor: Optional[str] = None
+        for rid, score, msg in self._scan(queue, flt, cursor):
+            items.append(summarize(rid, score, msg))
+            if len(items) >= limit:
+                next_cursor = f"{score!r}:{rid}"
+                break
+        return items, next_cursor
+
+    def _select(
+        self, queue: str, flt: DeadLetterFilter, ids: Optional[List[str]], limit: int
+    ) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+        batch_size = int(os.getenv("DLQ_BULK_BATCH", "200"))
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        seen = 0
+        if ids:
+            xq = self._xq(queue)
+            for i in range(0, min(len(ids), limit), batch_size):
+                chunk = ids[i:i + batch_size]
+                for rid, raw in zip(chunk, self.client.hmget(f"{xq}.msgs", chunk)):
+                    if raw is not None:
+                        msg = json.loads(raw)
+                        if flt.matches(msg):
+                            batch.append((rid, msg))
+                if batch:
+                    yield batch
+                    batch = []
+            return
+        for rid, _score, msg in self._scan(queue, flt):
+            batch.append((rid, msg))
+            seen += 1
+            if len(batch) >= batch_size or seen >= limit:
+                yield batch
+                batch = []
+            if seen >= limit:
+                return
+        if batch:
+            yield batch
+
+    def discard(self, queue: str, flt: DeadLetterFilter, ids: Optional[List[str]] = None, limit: int = 10000) -> int:
+        xq = self._xq(queue)
+        removed = 0
+        for batch in self._select(queue, flt, ids, limit):
+            rids = [rid for rid, _msg in batch]
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zrem(xq, *rids)
+            pipe.hdel(f"{xq}.msgs", *rids)
+            removed += int(pipe.execute()[0])
+        metrics.inc("dlq_discarded_total", removed, queue=q_name(queue))
+        log.info("dlq discard queue=%s removed=%s", queue, removed)
+        return removed
+
+    def requeue(
+        self,
+        queue: str,
+        flt: DeadLetterFilter,
+        ids: Optional[List[str]] = None,
+        limit: int = 10000,
+        rate: Optional[float] = None,
+        max_backlog: Optional[int] = None,
+        deadline_s: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        # re-enqueues in batches (one pipelined round trip each, then removed from the DLQ:
+        # at-least-once); a token bucket paces the re-injection and it pauses while the live
+        # queue is above max_backlog so a mass requeue doesn't flood the workers. It stops
+        # at the deadline and reports what is left; the caller repeats the request for it.
+        rate = rate or float(os.getenv("DLQ_REQUEUE_RPS", "200"))
+        max_backlog = max_backlog if max_backlog is not None else int(os.getenv("DLQ_REQUEUE_MAX_BACKLOG", "1000"))
+        deadline_s = deadline_s if deadline_s is not None else float(os.getenv("DLQ_REQUEUE_DEADLINE_SECONDS", "20"))
+        deadline = time.monotonic() + deadline_s
+        bucket = TokenBucket(rate, int(os.getenv("DLQ_BULK_BATCH", "200")))
+        broker = self.broker or dramatiq.get_broker()
+        xq = self._xq(queue)
+        target = self._key(q_name(queue))
+        moved = 0
+        complete = True
+        for batch in self._select(queue, flt, ids, limit):
+            while max_backlog and self.client.llen(target) >= max_backlog and time.monotonic() < deadline:
+                time.sleep(0.5)
+            left = deadline - time.monotonic()
+            if left <= 0 or not bucket.acquire(min(len(batch), bucket.capacity), timeout=left):
+                complete = False
+                break
+            publish_batch(broker, [self._revive(msg) for _rid, msg in batch])
+            rids = [rid for rid, _msg in batch]
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zrem(xq, *rids)
+            pipe.hdel(f"{xq}.msgs", *rids)
+            pipe.execute()
+            moved += len(batch)
+        remaining = int(self.client.zcard(xq))
+        metrics.inc("dlq_requeued_total", moved, queue=q_name(queue))
+        log.info("dlq requeue queue=%s moved=%s remaining=%s complete=%s", queue, moved, remaining, complete)
+        return {"requeued": moved, "remaining": remaining, "complete": complete}
+
+    @staticmethod
+    def _revive(msg: Dict[str, Any]) -> Message:
+        # a fresh retry budget (publish_batch assigns the Redis id); message_id is kept so
+        # the job stays traceable
+        opts = dict(msg.get("options") or {})
+        for k in ("traceback", "eta", "requeue_timestamp", "error_kind", "redis_message_id"):
+            opts.pop(k, None)
+        opts["retries"] = 0
+        opts["dlq_requeues"] = int(opts.get("dlq_requeues", 0)) + 1
+        return Message(
+            queue_name=q_name(msg.get("queue_name") or ""),
+            actor_name=msg["actor_name"],
+            args=tuple(msg.get("args") or ()),
+            kwargs=msg.get("kwargs") or {},
+            options=opts,
+            message_id=msg["message_id"],
+            message_timestamp=msg["message_timestamp"],
+        )
+
+
+def get_dead_letter_queue() -> DeadLetterQueue:
+    from src.core.infrastructure.messaging.dramatiq_broker import broker
+
+    return DeadLetterQueue(broker.client, broker.namespace, broker)
@@ -1,14 +1,39 @@
 import os
 import dramatiq
 from dramatiq.brokers.redis import RedisBroker
-from dramatiq.middleware import Retries
+from dramatiq.middleware import Retries, default_middleware
 
 
 def create_broker() -> RedisBroker:
     url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-    broker = RedisBroker(url=url)
-    # Basic retries
-    broker.add_middleware(Retries())
+    # dramatiq's stock Retries is replaced by the classifying one (transient vs permanent)
+    broker = RedisBroker(url=url, middleware=[m() for m in default_middleware if m is not Retries])
+    from src.core.infrastructure.messaging.job_tracking import JobTracking
+    from src.core.infrastructure.messaging.retry_policy import ClassifyingRetries
+
+    # order matters: before_* hooks run in list order, after_* in reverse. The scheduler
+    # and the tenant limiter may skip a message before it is tracked as running, and job
+    # tracking must observe the outcome after the retry middleware has decided on it.
+    if os.getenv("SCHED_ENABLED", "1") == "1":
+        from src.core.infrastructure.messaging.scheduling import WeightedFairScheduler
+
+        broker.add_middleware(WeightedFairScheduler())
+    if os.getenv("TENANT_LIMITS_ENABLED", "1") == "1":
+        from src.core.infrastructure.messaging.tenant_limits import TenantConcurrencyLimiter
+
+        broker.add_middleware(TenantConcurrencyLimiter())
+    if os.getenv("JOB_TRACKING_ENABLED", "1") == "1":
+        broker.add_middleware(JobTracking())
+    broker.add_middleware(ClassifyingRetries())
+    from src.core.infrastructure.messaging.periodic import PeriodicJobs
+
+    # started in every worker that loads the actor (the health profile); one send per interval
+    broker.add_middleware(
+        PeriodicJobs(
+            {"partition_maintenance": int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "3600"))},
+            tick_seconds=float(os.getenv("PERIODIC_TICK_SECONDS", "30")),
+        )
+    )
     return broker
 
 
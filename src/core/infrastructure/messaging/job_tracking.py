@@ -0,0 +1,121 @@
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from dramatiq.common import q_name
+from dramatiq.middleware import Middleware
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# statuses written to job.status / task.status
+ENQUEUED = "enqueued"
+DELAYED = "delayed"
+RUNNING = "running"
+RETRYING = "retrying"
+DONE = "done"
+DEAD = "dead"
+
+
+def merge_events(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    # latest event wins per field, except the ones that only ever grow / stay first
+    if new["at"] < old["at"]:
+        old, new = new, old
+    merged = dict(old)
+    merged.update({k: v for k, v in new.items() if v is not None})
+    merged["attempts"] = max(old.get("attempts") or 0, new.get("attempts") or 0)
+    merged["enqueued_at"] = old.get("enqueued_at") or new.get("enqueued_at")
+    if new["status"] == RUNNING:
+        merged["finished_at"] = None
+    return merged
+
+
+def _flush(rows) -> None:
+    from src.core.infrastructure.persistence.sqlalchemy.repositories import JobRepository
+    from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        JobRepository(s).upsert_lifecycle(rows)
+        s.commit()
+    metrics.inc("job_tracking_rows_flushed_total", len(rows))
+
+
+class JobTracking(Middleware):
+    # Records enqueue/start/finish/failure of every message into job/task. Nothing touches the
+    # database on the hot path: events are coalesced per message_id in a write-behind buffer
+    # and flushed as batched upserts on size (JOB_TRACKING_BATCH), time
+    # (JOB_TRACKING_FLUSH_SECONDS) or worker shutdown. Must sit before the retry middleware
+    # so its after_process_message (run in reverse order) sees the final failed/retry state,
+    # and after the scheduler so deferred messages are not counted as started.
+
+    def __init__(self, buffer=None, exclude_queues: Optional[str] = None) -> None:
+        raw = exclude_queues if exclude_queues is not None else os.getenv("JOB_TRACKING_EXCLUDE", "health")
+        self.exclude = {q.strip() for q in raw.split(",") if q.strip()}
+        self._buffer = buffer
+
+    @property
+    def buffer(self):
+        if self._buffer is None:
+            from src.core.infrastructure.persistence.sqlalchemy.write_behind import WriteBehindBuffer
+
+            self._buffer = WriteBehindBuffer(
+                _flush,
+                max_items=int(os.getenv("JOB_TRACKING_BATCH", "200")),
+                max_delay=float(os.getenv("JOB_TRACKING_FLUSH_SECONDS", "2")),
+                name="job-tracking-writer",
+                key=lambda r: r["message_id"],
+                merge=merge_events,
+            )
+        return self._buffer
+
+    def _record(self, message, status: str, **fields: Any) -> None:
+        queue = q_name(message.queue_name)
+        if queue in self.exclude:
+            return
+        opts = message.options
+        event = {
+            "message_id": message.message_id,
+            "queue": queue,
+            "step": message.actor_name,
+            "tenant_id": opts.get("tenant_id"),
+            "document_id": opts.get("document_id"),
+            "status": status,
+            "attempts": None,
+            "last_error": None,
+            "enqueued_at": None,
+            "started_at": None,
+            "finished_at": None,
+            "at": datetime.utcnow(),
+        }
+        event.update(fields)
+        try:
+            self.buffer.add(event)
+        except Exception as e:
+            log.warning("job tracking dropped %s event for %s: %s", status, message.message_id, e)
+
+    def after_enqueue(self, broker, message, delay):
+        retries = message.options.get("retries") or 0
+        if retries:
+            self._record(message, RETRYING, attempts=retries)
+        elif delay:
+            self._record(message, DELAYED)
+        else:
+            self._record(message, ENQUEUED, enqueued_at=datetime.utcnow())
+
+    def before_process_message(self, broker, message):
+        self._record(message, RUNNING, attempts=(message.options.get("retries") or 0) + 1, started_at=datetime.utcnow())
+
+    def after_process_message(self, broker, message, *, result=None, exception=None):
+        now = datetime.utcnow()
+        if exception is None:
+            self._record(message, DONE, finished_at=now)
+            return
+        status = DEAD if message.failed else RETRYING
+        self._record(message, status, finished_at=now, last_error=f"{type(exception).__name__}: {exception}"[:4000])
+
+    def after_worker_shutdown(self, broker, worker):
+        if self._buffer is not None:
+            self._buffer.close()
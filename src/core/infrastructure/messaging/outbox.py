@@ -0,0 +1,65 @@
+import logging
+import os
+from typing import List, Sequence
+from uuid import uuid4
+
+from dramatiq import Message
+from dramatiq.common import current_millis
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# Transactional outbox: producers write the messages they want to send into the outbox
+# table in the same transaction as the rows they refer to; src/worker_app/outbox_relay.py
+# publishes committed rows to the broker. Delivery is at-least-once (a relay that dies
+# between publishing and committing re-publishes the batch with the same message ids).
+
+
+def outbox_enabled() -> bool:
+    return os.getenv("OUTBOX_ENABLED", "1") == "1"
+
+
+def stage(db, messages: Sequence[Message]) -> int:
+    from src.core.infrastructure.persistence.sqlalchemy.repositories import OutboxRepository
+
+    n = OutboxRepository(db).add_many([m.asdict() for m in messages])
+    metrics.inc("outbox_staged_total", n)
+    return n
+
+
+def publish_batch(broker, messages: Sequence[Message]) -> List[Message]:
+    # One round trip for the whole batch: the Redis broker's own dispatch script is queued
+    # on a pipeline, mirroring RedisBroker.enqueue (fresh redis_message_id, enqueue hooks).
+    if not messages:
+        return []
+    dispatch = getattr(broker, "scripts", {}).get("dispatch")
+    if dispatch is None:
+        # stub / non-Redis brokers
+        return [broker.enqueue(m) for m in messages]
+    pipe = broker.client.pipeline(transaction=False)
+    sent = []
+    for message in messages:
+        message = message.copy(options={"redis_message_id": str(uuid4())})
+        broker.emit_before("enqueue", message, None)
+        dispatch(
+            keys=[broker.namespace],
+            args=[
+                "enqueue",
+                current_millis(),
+                message.queue_name,
+                broker.broker_id,
+                broker.heartbeat_timeout,
+                broker.dead_message_ttl,
+                0,  # no queue maintenance from the relay
+                0,  # max unpack size, only read by fetch/maintenance
+                message.options["redis_message_id"],
+                message.encode(),
+            ],
+            client=pipe,
+        )
+        sent.append(message)
+    pipe.execute()
+    for message in sent:
+        broker.emit_after("enqueue", message, None)
+    return sent
@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from dramatiq.errors import ActorNotFound
+from dramatiq.middleware import Middleware
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+
+class PeriodicJobs(Middleware):
+    # Sends each configured actor once per interval across all workers. Every worker process
+    # that declares the actor runs a ticker thread; the send goes to whichever process first
+    # sets the Redis key <namespace>:periodic:<actor> (NX, expires after the interval). Nothing
+    # chains from one run to the next, so a run that fails or is dead-lettered does not stop
+    # the schedule, and a restarted cluster picks it up on the first tick.
+
+    def __init__(self, jobs: Dict[str, int], tick_seconds: float = 30.0) -> None:
+        self.jobs = {name: interval for name, interval in jobs.items() if interval > 0}
+        self.tick_seconds = tick_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _due(self, broker, name: str, interval: int) -> bool:
+        client = getattr(broker, "client", None)
+        if client is None:
+            return True
+        key = f"{getattr(broker, 'namespace', 'dramatiq')}:periodic:{name}"
+        return bool(client.set(key, str(int(time.time())), nx=True, ex=interval))
+
+    def tick(self, broker) -> None:
+        for name, interval in self.jobs.items():
+            try:
+                actor = broker.get_actor(name)
+            except ActorNotFound:
+                # this worker's profile does not load the actor
+                continue
+            try:
+                if self._due(broker, name, interval):
+                    actor.send()
+                    metrics.inc("periodic_jobs_sent_total", actor=name)
+                    log.info("periodic job %s sent (every %ss)", name, interval)
+            except Exception as e:
+                log.warning("periodic job %s could not be sent: %s", name, e)
+
+    def _run(self, broker) -> None:
+        while not self._stop.is_set():
+            self.tick(broker)
+            self._stop.wait(self.tick_seconds)
+
+    def after_worker_boot(self, broker, worker) -> None:
+        if not self.jobs:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(broker,), name="periodic-jobs", daemon=True)
+        self._thread.start()
+
+    def before_worker_shutdown(self, broker, worker) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# one pub/sub channel per document: <prefix>:<tenant>:<document_id>
+PREFIX = os.getenv("PROGRESS_CHANNEL_PREFIX", "progress")
+
+
+def channel(tenant_id: Optional[str], document_id: Any) -> str:
+    return f"{PREFIX}:{tenant_id or 'default'}:{document_id}"
+
+
+def _parse_channel(name: str) -> Tuple[str, str]:
+    _prefix, tenant, document = name.split(":", 2)
+    return tenant, document
+
+
+def _flush_events(rows: List[dict]) -> None:
+    from src.core.infrastructure.persistence.sqlalchemy.repositories import EventRepository
+    from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        EventRepository(s).add_many(rows)
+        s.commit()
+
+
+class ProgressPublisher:
+    # Workers call publish() for stage changes and page N/M. Events are compact JSON on the
+    # document's channel; nothing is stored in Redis, so a UI that is not listening costs
+    # one PUBLISH. Intermediate page events are throttled to PROGRESS_MIN_INTERVAL_MS per
+    # document/stage, and (with PROGRESS_AUDIT=1) every published event is also written to
+    # the event table through a write-behind buffer.
+
+    def __init__(self, client, min_interval_ms: Optional[int] = None, audit=None) -> None:
+        self.client = client
+        self.min_interval = (
+            min_interval_ms if min_interval_ms is not None else int(os.getenv("PROGRESS_MIN_INTERVAL_MS", "500"))
+        ) / 1000.0
+        self._audit = audit
+        self._last: Dict[Tuple[str, Any, str], float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def audit(self):
+        if self._audit is None and os.getenv("PROGRESS_AUDIT", "1") == "1":
+            from src.core.infrastructure.persistence.sqlalchemy.write_behind import WriteBehindBuffer
+
+            self._audit = WriteBehindBuffer(
+                _flush_events,
+                max_items=int(os.getenv("PROGRESS_AUDIT_BATCH", "200")),
+                max_delay=float(os.getenv("PROGRESS_AUDIT_FLUSH_SECONDS", "2")),
+                name="progress-audit-writer",
+            )
+        return self._audit
+
+    def _throttled(self, key: Tuple[str, Any, str], done: Optional[int], total: Optional[int]) -> bool:
+        final = done is None or total is None or done >= total
+        now = time.monotonic()
+        with self._lock:
+            if final:
+                self._last.pop(key, None)
+                return False
+            last = self._last.get(key)
+            if last is not None and now - last < self.min_interval:
+                return True
+            self._last[key] = now
+            return False
+
+    def publish(
+        self,
+        tenant_id: Optional[str],
+        document_id: Optional[int],
+        stage: str,
+        done: Optional[int] = None,
+        total: Optional[int] = None,
+        **extra: Any,
+    ) -> None:
+        # progress is per document; storage objects without one have nobody to report to
+        if document_id is None:
+            return
+        if self._throttled((tenant_id or "default", document_id, stage), done, total):
+            metrics.inc("progress_events_throttled_total", stage=stage)
+            return
+        event: Dict[str, Any] = {"doc": document_id, "stage": stage, "ts": int(time.time() * 1000)}
+        if done is not None:
+            event["done"] = done
+        if total is not None:
+            event["total"] = total
+        event.update(extra)
+        try:
+            self.client.publish(channel(tenant_id, document_id), json.dumps(event, separators=(",", ":")))
+            metrics.inc("progress_events_published_total", stage=stage)
+        except Exception as e:
+            # progress is informational; never fail the job over it
+            log.debug("progress publish failed document=%s stage=%s: %s", document_id, stage, e)
+        try:
+            audit = self.audit
+            if audit is not None:
+                audit.add(
+                    {
+                        "tenant_id": tenant_id,
+                        "document_id": document_id,
+                        "type": f"progress.{stage}"[:64],
+                        "payload": event,
+                        "created_at": datetime.utcnow(),
+                    }
+                )
+        except Exception as e:
+            log.warning("progress audit dropped event document=%s: %s", document_id, e)
+
+    def close(self) -> None:
+        if self._audit is not None:
+            self._audit.close()
+
+
+_publisher: Optional[ProgressPublisher] = None
+
+
+def get_progress_publisher() -> ProgressPublisher:
+    global _publisher
+    if _publisher is None:
+        from src.core.infrastructure.messaging.dramatiq_broker import broker
+
+        _publisher = ProgressPublisher(broker.client)
+    return _publisher
+
+
+def publish_progress(
+    tenant_id: Optional[str], document_id: Optional[int], stage: str, done: Optional[int] = None, total: Optional[int] = None, **extra: Any
+) -> None:
+    if os.getenv("PROGRESS_ENABLED", "1") != "1":
+        return
+    get_progress_publisher().publish(tenant_id, document_id, stage, done, total, **extra)
+
+
+class ProgressHub:
+    # API-side fan-out: one pattern subscription per process, however many SSE clients are
+    # connected. Each client gets a bounded asyncio queue; a client that cannot keep up loses
+    # its oldest events instead of holding back the others.
+
+    def __init__(self, url: Optional[str] = None, queue_size: Optional[int] = None) -> None:
+        self.url = url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.queue_size = queue_size or int(os.getenv("PROGRESS_CLIENT_QUEUE", "100"))
+        self._subscribers: Dict[Tuple[str, str], Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_listener(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.from_url(self.url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.psubscribe(f"{PREFIX}:*")
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "pmessage":
+                        continue
+                    name = msg["channel"].decode() if isinstance(msg["channel"], bytes) else msg["channel"]
+                    data = msg["data"].decode() if isinstance(msg["data"], bytes) else msg["data"]
+                    self._dispatch(name, data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("progress listener lost Redis, reconnecting: %s", e)
+                await asyncio.sleep(1.0)
+            finally:
+                await client.aclose()
+
+    def _dispatch(self, name: str, data: str) -> None:
+        try:
+            tenant, document = _parse_channel(name)
+        except ValueError:
+            return
+        for key in ((tenant, document), (tenant, "*")):
+            for q in self._subscribers.get(key, ()):
+                if q.full():
+                    q.get_nowait()
+                    metrics.inc("progress_events_dropped_total")
+                q.put_nowait(data)
+
+    def subscribe(self, tenant_id: str, document_id: Optional[Any] = None) -> asyncio.Queue:
+        # document_id=None follows every document of the tenant
+        self._ensure_listener()
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault((tenant_id, str(document_id) if document_id is not None else "*"), set()).add(q)
+        metrics.set_gauge("progress_subscribers", sum(len(v) for v in self._subscribers.values()))
+        return q
+
+    def unsubscribe(self, tenant_id: str, document_id: Optional[Any], q: asyncio.Queue) -> None:
+        key = (tenant_id, str(document_id) if document_id is not None else "*")
+        subs = self._subscribers.get(key)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                del self._subscribers[key]
+        metrics.set_gauge("progress_subscribers", sum(len(v) for v in self._subscribers.values()))
+
+
+_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    global _hub
+    if _hub is None:
+        _hub = ProgressHub()
+    return _hub
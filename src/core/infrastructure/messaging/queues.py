@@ -21,3 +21,7 @@ LARGE_PRIORITY = [
     OCR_PDF_LARGE,
 ]
 
+# Dramatiq actor priorities: lower runs first among messages a worker has prefetched
+SMALL_ACTOR_PRIORITY = 0
+MERGE_ACTOR_PRIORITY = 10
+LARGE_ACTOR_PRIORITY = 20
@@ -0,0 +1,255 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+from dramatiq.common import q_name
+from dramatiq.errors import Retry
+from dramatiq.middleware import Retries
+
+from src.core.application.services.retries import backoff_delay
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# Matched against the exception's class names (MRO), so heavy libraries never need to be
+# imported here. Anything unknown is treated as transient and bounded by max_retries.
+# Permanent is kept to our own errors and to documents the engines cannot read at all:
+# generic errors (KeyError, IntegrityError, ...) also come out of races and are retried.
+# More names can be added with RETRY_PERMANENT_ERRORS, or per exception with a boolean
+# `transient` attribute.
+_PERMANENT_NAMES = {
+    "AbbyyError",
+    "FileDataError",  # PyMuPDF: corrupt / unsupported document
+    "EmptyFileError",
+    "UnidentifiedImageError",  # Pillow
+    "DecompressionBombError",
+}
+_TRANSIENT_NAMES = {
+    "ConnectionError",
+    "TimeoutError",
+    "timeout",
+    "BrokenPipeError",
+    "InterruptedError",
+    "AbbyyTransientError",
+    "CircuitOpenError",
+    "OperationalError",
+    "DisconnectionError",
+    "EndpointConnectionError",
+    "ConnectTimeoutError",
+    "ReadTimeoutError",
+    "BusyLoadingError",
+}
+# botocore ClientError codes that are worth another attempt
+_TRANSIENT_S3_CODES = {
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "RequestTimeout",
+    "RequestTimeTooSkewed",
+    "InternalError",
+    "ServiceUnavailable",
+    "500",
+    "502",
+    "503",
+    "504",
+}
+
+
+def _env_names(name: str) -> Set[str]:
+    return {n.strip() for n in os.getenv(name, "").split(",") if n.strip()}
+
+
+def classify(exc: BaseException) -> str:
+    marker = getattr(exc, "transient", None)
+    if isinstance(marker, bool):
+        return TRANSIENT if marker else PERMANENT
+    if isinstance(exc, Retry):
+        return TRANSIENT
+    names = [cls.__name__ for cls in type(exc).__mro__]
+    permanent = _PERMANENT_NAMES | _env_names("RETRY_PERMANENT_ERRORS")
+    transient = _TRANSIENT_NAMES | _env_names("RETRY_TRANSIENT_ERRORS")
+    if "ClientError" in names:
+        code = str((getattr(exc, "response", None) or {}).get("Error", {}).get("Code", ""))
+        return TRANSIENT if code in _TRANSIENT_S3_CODES else PERMANENT
+    # the most specific class decides: AbbyyTransientError wins over its AbbyyError base,
+    # FileNotFoundError over OSError
+    for name in names:
+        if name in transient:
+            return TRANSIENT
+        if name in permanent:
+            return PERMANENT
+    return TRANSIENT
+
+
+class ErrorRate:
+    # sliding-window failure ratio per actor
+    def __init__(self, window: float = 60.0) -> None:
+        self.window = window
+        self._events: Dict[str, Deque[Tuple[float, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, failed: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            q = self._events.setdefault(key, deque())
+            q.append((now, failed))
+            while q and q[0][0] < now - self.window:
+                q.popleft()
+
+    def rate(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            q = self._events.get(key)
+            if not q:
+                return 0.0
+            while q and q[0][0] < now - self.window:
+                q.popleft()
+            return sum(1 for _t, f in q if f) / len(q) if q else 0.0
+
+
+class ClassifyingRetries(Retries):
+    # Replaces dramatiq's Retries: permanent errors are dead-lettered on the first failure,
+    # transient ones are retried with full-jitter exponential backoff stretched by the actor's
+    # recent failure rate (an outage backs everyone off instead of hammering the dependency).
+    # Final failures are recorded in problem_log through a write-behind buffer. The stock
+    # options keep their meaning: throws, max_retries, min/max_backoff, retry_when (decides
+    # instead of the classification and max_retries) and on_retry_exhausted.
+
+    def __init__(
+        self,
+        *,
+        max_retries: Optional[int] = None,
+        min_backoff: Optional[int] = None,
+        max_backoff: Optional[int] = None,
+        rate_window: Optional[float] = None,
+        rate_factor: Optional[float] = None,
+        retry_when: Optional[Callable[[int, BaseException], bool]] = None,
+        problem_log=None,
+    ) -> None:
+        super().__init__(
+            max_retries=max_retries if max_retries is not None else int(os.getenv("RETRY_MAX_RETRIES", "5")),
+            min_backoff=min_backoff or int(os.getenv("RETRY_MIN_BACKOFF_MS", "5000")),
+            max_backoff=max_backoff or int(os.getenv("RETRY_MAX_BACKOFF_MS", "600000")),
+            retry_when=retry_when,
+        )
+        self.errors = ErrorRate(rate_window or float(os.getenv("RETRY_RATE_WINDOW_SECONDS", "60")))
+        self.rate_factor = rate_factor if rate_factor is not None else float(os.getenv("RETRY_RATE_FACTOR", "4"))
+        self._problem_log = problem_log
+
+    @property
+    def problem_log(self):
+        if self._problem_log is None:
+            from src.core.infrastructure.persistence.sqlalchemy.write_behind import get_problem_log_buffer
+
+            self._problem_log = get_problem_log_buffer()
+        return self._problem_log
+
+    def backoff_ms(self, actor_name: str, retries: int, min_backoff: int, max_backoff: int) -> int:
+        factor = 1.0 + self.rate_factor * self.errors.rate(actor_name)
+        delay = min_backoff + backoff_delay(retries + 1, base=min_backoff / 1000.0, cap=max_backoff / 1000.0) * 1000
+        return int(min(max_backoff, delay * factor))
+
+    def after_process_message(self, broker, message, *, result=None, exception=None):
+        self.errors.record(message.actor_name, exception is not None)
+        if exception is None:
+            return
+
+        actor = broker.get_actor(message.actor_name)
+        kind = classify(exception)
+        throws = message.options.get("throws") or actor.options.get("throws")
+        if throws and isinstance(exception, throws):
+            kind = PERMANENT
+
+        retries = message.options.setdefault("retries", 0)
+        message.options["retries"] += 1
+        message.options["traceback"] = traceback.format_exc(limit=30)
+        message.options["requeue_timestamp"] = int(time.time() * 1000)
+        message.options["error_kind"] = kind
+        metrics.inc("task_failures_total", actor=message.actor_name, kind=kind)
+
+        max_retries = message.options.get("max_retries", actor.options.get("max_retries", self.max_retries))
+        retry_when = actor.options.get("retry_when", self.retry_when)
+        if throws and isinstance(exception, throws):
+            give_up, reason = True, "permanent"
+        elif retry_when is not None:
+            give_up, reason = not retry_when(retries, exception), "retry_when"
+        elif kind == PERMANENT:
+            give_up, reason = True, "permanent"
+        else:
+            give_up, reason = max_retries is not None and retries >= max_retries, "retries_exceeded"
+        if give_up:
+            log.warning(
+                "dead-lettering message %s actor=%s reason=%s error=%r",
+                message.message_id,
+                message.actor_name,
+                reason,
+                exception,
+            )
+            self._annotate_dead_letter(broker, message)
+            message.fail()
+            self._record_problem(message, exception, kind, retries + 1)
+            metrics.inc("task_dead_lettered_total", actor=message.actor_name, reason=reason)
+            target = message.options.get("on_retry_exhausted") or actor.options.get("on_retry_exhausted")
+            if target and reason != "permanent":
+                broker.get_actor(target).send(message.asdict(), {"retries": retries, "max_retries": max_retries})
+            return
+
+        if isinstance(exception, Retry) and exception.delay is not None:
+            delay = exception.delay
+        else:
+            min_backoff = message.options.get("min_backoff", actor.options.get("min_backoff", self.min_backoff))
+            max_backoff = message.options.get("max_backoff", actor.options.get("max_backoff", self.max_backoff))
+            delay = self.backoff_ms(message.actor_name, retries, min_backoff, max_backoff)
+        log.info("retrying message %s actor=%s in %sms (%s)", message.message_id, message.actor_name, delay, exception)
+        broker.enqueue(message, delay=delay)
+
+    def _annotate_dead_letter(self, broker, message) -> None:
+        # nack moves the stored copy of the message to the DLQ, so write the failure
+        # details into it first; that is what GET /dlq shows and filters on
+        client = getattr(broker, "client", None)
+        redis_id = message.options.get("redis_message_id")
+        if client is None or not redis_id:
+            return
+        try:
+            key = f"{broker.namespace}:{q_name(message.queue_name)}.msgs"
+            client.hset(key, redis_id, message.encode())
+        except Exception as e:
+            log.debug("could not annotate dead letter %s: %s", message.message_id, e)
+
+    def _record_problem(self, message, exception: BaseException, kind: str, attempts: int) -> None:
+        opts = message.options
+        recommendation = (
+            "fix the input, then discard or requeue it from the DLQ"
+            if kind == PERMANENT
+            else "requeue from the DLQ once the dependency has recovered"
+        )
+        try:
+            self.problem_log.add(
+                {
+                    "tenant_id": opts.get("tenant_id") or "default",
+                    "document_id": opts.get("document_id"),
+                    "task_type": message.actor_name,
+                    "queue": q_name(message.queue_name),
+                    "error_code": f"{kind}:{type(exception).__name__}"[:64],
+                    "message": str(exception)[:4000],
+                    "attempts": attempts,
+                    "last_attempt_at": datetime.utcnow(),
+                    "trace_id": message.message_id,
+                    "external_ref": opts.get("redis_message_id"),
+                    "recommendation": recommendation,
+                }
+            )
+        except Exception as e:
+            log.error("problem log buffer rejected failure of %s: %s", message.message_id, e)
+
+    def after_worker_shutdown(self, broker, worker):
+        if self._problem_log is not None:
+            self._problem_log.close()
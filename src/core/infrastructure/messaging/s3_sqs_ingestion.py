@@ -2,13 +2,14 @@ from __future__ import annotations
 
 import logging
 import urllib.parse
-from typing import Dict, Any
+from typing import Any, Dict, List
 
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.core.infrastructure.persistence.sqlalchemy.models import StorageObject
+from src.core.infrastructure.persistence.sqlalchemy.repositories import StorageObjectRepository
 from src.core.infrastructure.messaging import queues
+from src.core.infrastructure.messaging.outbox import outbox_enabled, stage
 from src.worker_app.workers.ocr_pdf_small import ocr_pdf_small as w_ocr_pdf_small
 from src.worker_app.workers.ocr_pdf_large import ocr_pdf_large as w_ocr_pdf_large
 from src.worker_app.workers.ocr_img_small import ocr_img_small as w_ocr_img_small
@@ -35,9 +36,19 @@ def _route(ext: str, size: int) -> str:
     return queues.OCR_PDF_SMALL
 
 
+_ACTORS = {
+    queues.OCR_IMG_SMALL: w_ocr_img_small,
+    queues.OCR_PDF_SMALL: w_ocr_pdf_small,
+    queues.OCR_PDF_LARGE: w_ocr_pdf_large,
+}
+
+
 def handle_s3_event(event: Dict[str, Any], db: Session) -> None:
     records = event.get("Records") or []
     guard = InflightGuard(ttl_seconds=600)
+    repo = StorageObjectRepository(db)
+    objects: List[StorageObject] = []
+    changed: List[StorageObject] = []
     for r in records:
         s3 = r.get("s3", {})
         bucket = s3.get("bucket", {}).get("name")
@@ -49,31 +60,46 @@ def handle_s3_event(event: Dict[str, Any], db: Session) -> None:
         size = int(obj.get("size") or 0)
         etag = obj.get("eTag")
 
-        stmt = select(StorageObject).where(StorageObject.bucket == bucket, StorageObject.key == key)
-        so = db.scalars(stmt).first()
+        # redelivered / repeated events for a known object are answered from the cache
+        so = repo.get_by_bucket_key(bucket, key)
         if not so:
             so = StorageObject(bucket=bucket, key=key, size=size, etag=etag, tenant_id="default")
             db.add(so)
         else:
             so.size = size or so.size
             so.etag = etag or so.etag
+        if so in db.new or db.is_modified(so):
+            changed.append(so)
+        db.flush()
+        objects.append(so)
+
+    # In-flight guard by S3 object identity to avoid duplicate concurrent enqueues
+    outbox = outbox_enabled()
+    messages = []
+    locks: List[str] = []
+    try:
+        for so in objects:
+            lock_key = f"s3:{so.bucket}:{so.key}"
+            if not guard.acquire(lock_key):
+                log.info("skip duplicate in-flight enqueue for %s", lock_key)
+                continue
+            locks.append(lock_key)
+            q = _route(_ext_from_key(so.key), so.size or 0)
+            # tenant/document travel as message options for job tracking and problem logs;
+            # document_id is set once the ETL has linked the object to its document
+            opts = {"tenant_id": so.tenant_id, "document_id": so.document_id}
+            messages.append((so, q, _ACTORS[q].message_with_options(args=(so.id,), **opts)))
+        if outbox:
+            # the OCR jobs commit together with the rows they refer to; the relay sends them
+            stage(db, [m for _, _, m in messages])
         db.commit()
+        for so in changed:
+            repo.invalidate(so.bucket, so.key)
 
-        # In-flight guard by S3 object identity to avoid duplicate concurrent enqueues
-        lock_key = f"s3:{bucket}:{key}"
-        if not guard.acquire(lock_key):
-            log.info("skip duplicate in-flight enqueue for %s", lock_key)
-            continue
-        try:
-            ext = _ext_from_key(key)
-            q = _route(ext, size)
-            if q == queues.OCR_IMG_SMALL:
-                w_ocr_img_small.send(so.id)
-            elif q == queues.OCR_PDF_SMALL:
-                w_ocr_pdf_small.send(so.id)
-            else:
-                w_ocr_pdf_large.send(so.id)
-            log.info("ingested s3 object bucket=%s key=%s size=%s -> queue=%s", bucket, key, size, q)
-        finally:
+        for so, q, message in messages:
+            if not outbox:
+                _ACTORS[q].broker.enqueue(message)
+            log.info("ingested s3 object bucket=%s key=%s size=%s -> queue=%s", so.bucket, so.key, so.size, q)
+    finally:
+        for lock_key in locks:
             guard.release(lock_key)
-
@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dramatiq.common import q_name
+from dramatiq.middleware import Middleware, SkipMessage
+
+from src.core.infrastructure.messaging import queues
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for part in raw.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            weights[name.strip()] = max(0.001, float(value))
+    return weights
+
+
+class WeightedFairPolicy:
+    # Start-time fair queueing of worker time between queue classes, ordered from highest to
+    # lowest priority. Every admitted job charges its class' virtual time with the expected
+    # duration / weight and the charge is corrected with the measured duration on completion,
+    # so with small=4,large=1 large jobs get about a fifth of the worker time while small
+    # queues have backlog. A lower class is held back only while a higher class has backlog
+    # and is behind in virtual time; jobs older than max_wait_ms are always admitted so
+    # sustained small load cannot starve large documents. The highest class is never held back.
+
+    def __init__(self, classes: List[str], weights: Dict[str, float], max_wait_ms: float) -> None:
+        self.classes = list(classes)
+        self.weights = {c: float(weights.get(c, 1.0)) for c in self.classes}
+        self.max_wait_ms = max_wait_ms
+        self.vt: Dict[str, float] = {c: 0.0 for c in self.classes}
+        self.estimate: Dict[str, float] = {c: 1.0 for c in self.classes}
+        self.inflight: Dict[str, int] = {c: 0 for c in self.classes}
+        self._lock = threading.Lock()
+
+    def _higher(self, klass: str) -> List[str]:
+        return self.classes[: self.classes.index(klass)] if klass in self.classes else []
+
+    def admit(self, klass: str, age_ms: float, backlog: Dict[str, int]) -> Optional[Tuple[str, float]]:
+        # returns (reason, charged estimate), or None when the job should be deferred
+        with self._lock:
+            busy = [c for c in self._higher(klass) if backlog.get(c, 0) > 0]
+            if not busy:
+                reason = "idle"
+            elif self.vt[klass] <= min(self.vt[c] for c in busy):
+                reason = "share"
+            elif age_ms >= self.max_wait_ms:
+                reason = "starvation"
+            else:
+                return None
+            return reason, self._charge(klass, self.estimate[klass])
+
+    def start(self, klass: str) -> float:
+        # unconditional admission (highest class); returns the charged estimate
+        with self._lock:
+            return self._charge(klass, self.estimate.get(klass, 1.0))
+
+    def complete(self, klass: str, seconds: float, charged: float) -> None:
+        with self._lock:
+            if klass not in self.vt:
+                return
+            self.vt[klass] += (seconds - charged) / self.weights[klass]
+            self.inflight[klass] = max(0, self.inflight[klass] - 1)
+            self.estimate[klass] = 0.8 * self.estimate[klass] + 0.2 * seconds
+
+    def cancel(self, klass: str, charged: float) -> None:
+        # admitted but skipped by a later middleware: refund the charge, learn nothing
+        with self._lock:
+            if klass not in self.vt:
+                return
+            self.vt[klass] -= charged / self.weights[klass]
+            self.inflight[klass] = max(0, self.inflight[klass] - 1)
+
+    def _charge(self, klass: str, cost: float) -> float:
+        if klass not in self.vt:
+            return 0.0
+        if self.inflight[klass] == 0:
+            # an idle class restarts at the current level of the others instead of
+            # cashing in the time it was away
+            others = [v for c, v in self.vt.items() if c != klass]
+            if others:
+                self.vt[klass] = max(self.vt[klass], min(others))
+        self.inflight[klass] += 1
+        self.vt[klass] += cost / self.weights[klass]
+        return cost
+
+
+class WeightedFairScheduler(Middleware):
+    # Worker-side scheduling layer. Actor priorities already order prefetched messages inside
+    # one process; this middleware additionally defers large-queue messages (re-enqueued with a
+    # delay, original timestamp kept) while the small queues this process consumes have backlog
+    # and the large class has used up its weighted share of worker time.
+
+    def __init__(
+        self,
+        classes: Optional[Dict[str, Iterable[str]]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        max_wait_ms: Optional[float] = None,
+        defer_ms: Optional[int] = None,
+        backlog_ttl_ms: Optional[float] = None,
+    ) -> None:
+        classes = classes or {"small": queues.SMALL_PRIORITY, "large": queues.LARGE_PRIORITY}
+        self.queue_class = {q: c for c, qs in classes.items() for q in qs}
+        self.class_queues = {c: list(qs) for c, qs in classes.items()}
+        self.policy = WeightedFairPolicy(
+            list(classes),
+            weights or _parse_weights(os.getenv("SCHED_WEIGHTS", "small=4,large=1")),
+            max_wait_ms if max_wait_ms is not None else float(os.getenv("SCHED_LARGE_MAX_WAIT_MS", "300000")),
+        )
+        self.defer_ms = defer_ms or int(os.getenv("SCHED_DEFER_MS", "1000"))
+        self.backlog_ttl = (backlog_ttl_ms or float(os.getenv("SCHED_BACKLOG_TTL_MS", "250"))) / 1000.0
+        self._backlog: Dict[str, int] = {}
+        self._backlog_at = 0.0
+        self._lock = threading.Lock()
+        self._started: Dict[str, Tuple[str, float, float]] = {}
+
+    def _consumed(self, broker, klass: str) -> List[str]:
+        declared = broker.get_declared_queues()
+        return [q for q in self.class_queues.get(klass, []) if q in declared]
+
+    def backlog(self, broker) -> Dict[str, int]:
+        # LLEN of the consumed queues per class, cached briefly to keep Redis traffic flat
+        now = time.monotonic()
+        with self._lock:
+            if now - self._backlog_at < self.backlog_ttl:
+                return self._backlog
+            counts: Dict[str, int] = {}
+            client = getattr(broker, "client", None)
+            if client is not None:
+                pipe = client.pipeline(transaction=False)
+                order = []
+                for klass in self.class_queues:
+                    for q in self._consumed(broker, klass):
+                        pipe.llen(f"{broker.namespace}:{q}")
+                        order.append(klass)
+                for klass, n in zip(order, pipe.execute() if order else []):
+                    counts[klass] = counts.get(klass, 0) + int(n or 0)
+            self._backlog, self._backlog_at = counts, now
+            for klass, n in counts.items():
+                metrics.set_gauge("sched_backlog", n, klass=klass)
+            return counts
+
+    def before_process_message(self, broker, message) -> None:
+        klass = self.queue_class.get(q_name(message.queue_name))
+        if klass is None:
+            return
+        if klass == self.policy.classes[0]:
+            self._started[message.message_id] = (klass, time.monotonic(), self.policy.start(klass))
+            return
+        age_ms = time.time() * 1000 - message.message_timestamp
+        try:
+            backlog = self.backlog(broker)
+        except Exception as e:
+            # scheduling is best effort; never block work because Redis stats failed
+            log.warning("sched backlog check failed: %s", e)
+            backlog = {}
+        admitted = self.policy.admit(klass, age_ms, backlog)
+        if admitted is not None:
+            reason, charged = admitted
+            metrics.inc("sched_admitted_total", klass=klass, reason=reason)
+            self._started[message.message_id] = (klass, time.monotonic(), charged)
+            return
+        metrics.inc("sched_deferred_total", klass=klass)
+        broker.enqueue(message.copy(queue_name=q_name(message.queue_name)), delay=self.defer_ms)
+        raise SkipMessage(f"deferred {klass} message behind small-queue backlog")
+
+    def after_process_message(self, broker, message, *, result=None, exception=None) -> None:
+        started = self._started.pop(message.message_id, None)
+        if started is not None:
+            klass, t0, charged = started
+            self.policy.complete(klass, time.monotonic() - t0, charged)
+
+    def after_skip_message(self, broker, message) -> None:
+        started = self._started.pop(message.message_id, None)
+        if started is not None:
+            klass, _t0, charged = started
+            self.policy.cancel(klass, charged)
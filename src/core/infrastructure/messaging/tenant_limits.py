@@ -0,0 +1,201 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from dramatiq.common import q_name
+from dramatiq.middleware import Middleware, SkipMessage
+
+from src.core.infrastructure.messaging import queues
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# KEYS[1] = semaphore zset (holder -> lease expiry ms); ARGV = now_ms, lease_ms, limit, holder
+# returns {acquired (0/1), holders after the call}
+_ACQUIRE = """
+redis.call('zremrangebyscore', KEYS[1], '-inf', ARGV[1])
+local n = redis.call('zcard', KEYS[1])
+if redis.call('zscore', KEYS[1], ARGV[4]) then
+    redis.call('zadd', KEYS[1], ARGV[1] + ARGV[2], ARGV[4])
+    return {1, n}
+end
+if n < tonumber(ARGV[3]) then
+    redis.call('zadd', KEYS[1], ARGV[1] + ARGV[2], ARGV[4])
+    redis.call('pexpire', KEYS[1], ARGV[2])
+    return {1, n + 1}
+end
+return {0, n}
+"""
+
+# extends leases that are still held; KEYS = semaphores, ARGV = expiry_ms, lease_ms, holder per key
+_RENEW = """
+local renewed = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('zadd', key, 'XX', 'CH', ARGV[1], ARGV[i + 2]) == 1 then
+        redis.call('pexpire', key, ARGV[2])
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+
+def _parse_limits(raw: str) -> Dict[str, int]:
+    limits: Dict[str, int] = {}
+    for part in raw.split(","):
+        if "=" in part:
+            tenant, value = part.split("=", 1)
+            limits[tenant.strip()] = int(value)
+    return limits
+
+
+class RedisSemaphore:
+    # Counting semaphore shared by all worker nodes: a zset of holders scored by lease expiry.
+    # Crashed holders free their slot when the lease runs out, live ones renew it.
+
+    def __init__(self, client, namespace: str = "tenant-slots") -> None:
+        self.client = client
+        self.namespace = namespace
+        self._acquire = client.register_script(_ACQUIRE)
+        self._renew = client.register_script(_RENEW)
+
+    def key(self, name: str) -> str:
+        return f"{self.namespace}:{name}"
+
+    def acquire(self, name: str, holder: str, limit: int, lease_ms: int) -> Tuple[bool, int]:
+        now = int(time.time() * 1000)
+        ok, n = self._acquire(keys=[self.key(name)], args=[now, lease_ms, limit, holder])
+        return bool(ok), int(n)
+
+    def release(self, name: str, holder: str) -> int:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(self.key(name), holder)
+        pipe.zcard(self.key(name))
+        return int(pipe.execute()[1])
+
+    def renew(self, held: Dict[str, str], lease_ms: int) -> int:
+        # held: holder -> semaphore name; returns how many leases were still there
+        if not held:
+            return 0
+        expiry = int(time.time() * 1000) + lease_ms
+        holders = list(held)
+        return int(self._renew(keys=[self.key(held[h]) for h in holders], args=[expiry, lease_ms, *holders]))
+
+    def in_use(self, name: str) -> int:
+        now = int(time.time() * 1000)
+        return int(self.client.zcount(self.key(name), now, "+inf"))
+
+
+class TenantConcurrencyLimiter(Middleware):
+    # Caps how many messages of one tenant run at the same time across all workers.
+    # A message that finds no free slot is re-enqueued with a short jittered delay and
+    # skipped, so the worker thread moves on instead of blocking. Slots are leases
+    # (TENANT_LEASE_SECONDS) renewed by a heartbeat while the job runs.
+
+    def __init__(
+        self,
+        semaphore: Optional[RedisSemaphore] = None,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+        lease_ms: Optional[int] = None,
+        defer_ms: Optional[int] = None,
+        limited_queues=None,
+    ) -> None:
+        self._semaphore = semaphore
+        self.limits = limits if limits is not None else _parse_limits(os.getenv("TENANT_CONCURRENCY_LIMITS", ""))
+        self.default_limit = (
+            default_limit if default_limit is not None else int(os.getenv("TENANT_CONCURRENCY_DEFAULT", "8"))
+        )
+        self.lease_ms = lease_ms or int(float(os.getenv("TENANT_LEASE_SECONDS", "300")) * 1000)
+        self.defer_ms = defer_ms or int(os.getenv("TENANT_DEFER_MS", "2000"))
+        self.limited_queues = set(
+            limited_queues
+            if limited_queues is not None
+            else queues.SMALL_PRIORITY + queues.LARGE_PRIORITY + [queues.MERGE_PDF_TASK]
+        )
+        self._held: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def semaphore(self, broker) -> RedisSemaphore:
+        if self._semaphore is None:
+            self._semaphore = RedisSemaphore(broker.client, f"{broker.namespace}:tenant-slots")
+        return self._semaphore
+
+    def limit_for(self, tenant: str) -> int:
+        # 0 or less means unlimited
+        return self.limits.get(tenant, self.default_limit)
+
+    @staticmethod
+    def _holder(message) -> str:
+        return f"{message.message_id}:{message.options.get('redis_message_id', '')}"
+
+    def _ensure_heartbeat(self, broker) -> None:
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = threading.Thread(
+                target=self._renew_loop, args=(broker,), name="tenant-slot-heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def _renew_loop(self, broker) -> None:
+        while True:
+            time.sleep(max(1.0, self.lease_ms / 3000.0))
+            with self._lock:
+                held = dict(self._held)
+            try:
+                renewed = self.semaphore(broker).renew(held, self.lease_ms)
+                if renewed < len(held):
+                    # a lease expired (e.g. Redis stalled longer than the lease); the slot may
+                    # have been handed out again, so the tenant briefly runs over its limit
+                    metrics.inc("tenant_slots_lost_total", len(held) - renewed)
+            except Exception as e:
+                log.warning("tenant slot renew failed: %s", e)
+
+    def before_process_message(self, broker, message):
+        tenant = message.options.get("tenant_id")
+        if not tenant or q_name(message.queue_name) not in self.limited_queues:
+            return
+        limit = self.limit_for(tenant)
+        if limit <= 0:
+            return
+        holder = self._holder(message)
+        try:
+            ok, in_use = self.semaphore(broker).acquire(tenant, holder, limit, self.lease_ms)
+        except Exception as e:
+            # fail open: a Redis hiccup must not stall every tenant
+            log.warning("tenant slot acquire failed tenant=%s: %s", tenant, e)
+            return
+        metrics.set_gauge("tenant_slots_in_use", in_use, tenant=tenant)
+        metrics.set_gauge("tenant_slots_limit", limit, tenant=tenant)
+        if ok:
+            with self._lock:
+                self._held[holder] = tenant
+            self._ensure_heartbeat(broker)
+            metrics.inc("tenant_slots_acquired_total", tenant=tenant)
+            return
+        metrics.inc("tenant_slots_deferred_total", tenant=tenant)
+        delay = int(self.defer_ms * random.uniform(0.5, 1.5))
+        broker.enqueue(message.copy(queue_name=q_name(message.queue_name)), delay=delay)
+        raise SkipMessage(f"tenant {tenant} is at its concurrency limit ({limit})")
+
+    def _release(self, broker, message) -> None:
+        holder = self._holder(message)
+        with self._lock:
+            tenant = self._held.pop(holder, None)
+        if tenant is None:
+            return
+        try:
+            in_use = self.semaphore(broker).release(tenant, holder)
+            metrics.set_gauge("tenant_slots_in_use", in_use, tenant=tenant)
+        except Exception as e:
+            # the lease expires on its own
+            log.warning("tenant slot release failed tenant=%s: %s", tenant, e)
+
+    def after_process_message(self, broker, message, *, result=None, exception=None):
+        self._release(broker, message)
+
+    def after_skip_message(self, broker, message):
+        self._release(broker, message)
@@ -1 +1,78 @@
-# placeholder metrics
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+# prometheus_client is optional: when it is installed, counters are also exported
+# through the Dramatiq Prometheus middleware / default registry.
+try:
+    import prometheus_client as _prom
+except Exception:  # pragma: no cover - optional dependency
+    _prom = None
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+_gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_prom_metrics: Dict[str, object] = {}
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_metric(kind: str, name: str, labels: Dict[str, str]):
+    if _prom is None:
+        return None
+    m = _prom_metrics.get(name)
+    if m is None:
+        cls = _prom.Counter if kind == "counter" else _prom.Gauge
+        try:
+            m = cls(name, name.replace("_", " "), sorted(labels))
+        except ValueError:
+            # already registered by another import path
+            return None
+        _prom_metrics[name] = m
+    return m.labels(**labels) if labels else m
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    with _lock:
+        _counters[_key(name, labels)] += value
+        m = _prom_metric("counter", name, labels)
+    if m is not None:
+        m.inc(value)
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+        m = _prom_metric("gauge", name, labels)
+    if m is not None:
+        m.set(value)
+
+
+def get(name: str, **labels: str) -> float:
+    k = _key(name, labels)
+    with _lock:
+        if k in _gauges:
+            return _gauges[k]
+        return _counters.get(k, 0.0)
+
+
+def ratio(hits: str, misses: str, **labels: str) -> float:
+    h = get(hits, **labels)
+    m = get(misses, **labels)
+    total = h + m
+    return h / total if total else 0.0
+
+
+def snapshot() -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    with _lock:
+        items = list(_counters.items()) + list(_gauges.items())
+    for (name, labels), value in items:
+        lbl = ",".join(f"{k}={v}" for k, v in labels)
+        out[f"{name}{{{lbl}}}" if lbl else name] = value
+    return out
@@ -0,0 +1,159 @@
+from typing import BinaryIO, Dict, List, Optional
+
+# Minimal append-only PDF serializer: every object is written to the sink as soon as it is
+# produced and only byte offsets are kept, so a document of any size is assembled in
+# O(pages) memory. Each page is a JPEG scan plus an invisible (Tr 3) text layer using a
+# glyph-less Identity-H font whose ToUnicode map makes the text searchable/copyable.
+
+_DW = 500  # default glyph width (1/1000 em)
+
+
+def _pdf_str(s: str) -> bytes:
+    return s.encode("latin-1")
+
+
+def _to_unicode_cmap() -> bytes:
+    # identity mapping CID == UTF-16 code unit; bfrange entries may only differ in the
+    # last byte and a block may hold at most 100 entries
+    ranges = [f"<{hi:02X}00> <{hi:02X}FF> <{hi:02X}00>" for hi in range(256)]
+    blocks = []
+    for i in range(0, len(ranges), 100):
+        chunk = ranges[i:i + 100]
+        blocks.append(f"{len(chunk)} beginbfrange\n" + "\n".join(chunk) + "\nendbfrange")
+    return _pdf_str(
+        "/CIDInit /ProcSet findresource begin\n"
+        "12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        + "\n".join(blocks)
+        + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n"
+    )
+
+
+def _utf16_hex(text: str) -> str:
+    return text.encode("utf-16-be").hex().upper()
+
+
+class StreamingPdfWriter:
+    CATALOG = 1
+    PAGES = 2
+    FONT = 3
+
+    def __init__(self, sink: BinaryIO) -> None:
+        self.sink = sink
+        self._pos = 0
+        self._offsets: Dict[int, int] = {}
+        self._next = 4
+        self._kids: List[int] = []
+        self._closed = False
+        self._emit(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self._write_font()
+
+    def _emit(self, data: bytes) -> None:
+        self.sink.write(data)
+        self._pos += len(data)
+
+    def _alloc(self) -> int:
+        n = self._next
+        self._next += 1
+        return n
+
+    def _obj(self, num: int, body: bytes) -> None:
+        self._offsets[num] = self._pos
+        self._emit(_pdf_str(f"{num} 0 obj\n") + body + b"\nendobj\n")
+
+    def _stream(self, num: int, dict_body: str, data: bytes) -> None:
+        self._obj(num, _pdf_str(f"<< {dict_body} /Length {len(data)} >>\nstream\n") + data + b"\nendstream")
+
+    def _write_font(self) -> None:
+        cid, desc, cmap = self._alloc(), self._alloc(), self._alloc()
+        self._obj(
+            self.FONT,
+            _pdf_str(
+                f"<< /Type /Font /Subtype /Type0 /BaseFont /GlyphLessFont /Encoding /Identity-H "
+                f"/DescendantFonts [{cid} 0 R] /ToUnicode {cmap} 0 R >>"
+            ),
+        )
+        self._obj(
+            cid,
+            _pdf_str(
+                f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /GlyphLessFont "
+                f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+                f"/FontDescriptor {desc} 0 R /DW {_DW} /CIDToGIDMap /Identity >>"
+            ),
+        )
+        self._obj(
+            desc,
+            _pdf_str(
+                "<< /Type /FontDescriptor /FontName /GlyphLessFont /Flags 5 /FontBBox [0 0 500 1000] "
+                "/ItalicAngle 0 /Ascent 1000 /Descent 0 /CapHeight 1000 /StemV 80 >>"
+            ),
+        )
+        self._stream(cmap, "", _to_unicode_cmap())
+
+    def _text_layer(self, lines: List[str], width: float, height: float) -> str:
+        lines = [ln for ln in lines if ln.strip()]
+        if not lines:
+            return ""
+        # without word boxes the lines are spread evenly down the page and stretched
+        # horizontally to the page width: good enough for search and copy
+        step = height / (len(lines) + 1)
+        size = max(1.0, min(12.0, step * 0.8))
+        ops = ["BT", "3 Tr", f"/F1 {size:.2f} Tf"]
+        for i, line in enumerate(lines):
+            natural = len(line) * size * _DW / 1000.0
+            scale = max(1.0, min(1000.0, 100.0 * width * 0.95 / natural)) if natural else 100.0
+            y = height - step * (i + 1)
+            ops.append(f"{scale:.2f} Tz 1 0 0 1 {width * 0.025:.2f} {y:.2f} Tm <{_utf16_hex(line)}> Tj")
+        ops.append("ET")
+        return "\n".join(ops)
+
+    def add_page(
+        self,
+        jpeg: bytes,
+        px_width: int,
+        px_height: int,
+        width: float,
+        height: float,
+        text: Optional[str] = None,
+        colorspace: str = "DeviceRGB",
+    ) -> None:
+        img, content, page = self._alloc(), self._alloc(), self._alloc()
+        self._stream(
+            img,
+            f"/Type /XObject /Subtype /Image /Width {px_width} /Height {px_height} "
+            f"/ColorSpace /{colorspace} /BitsPerComponent 8 /Filter /DCTDecode",
+            jpeg,
+        )
+        ops = f"q {width:.2f} 0 0 {height:.2f} 0 0 cm /Im0 Do Q\n"
+        ops += self._text_layer((text or "").splitlines(), width, height)
+        self._stream(content, "", _pdf_str(ops))
+        self._obj(
+            page,
+            _pdf_str(
+                f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+                f"/Resources << /XObject << /Im0 {img} 0 R >> /Font << /F1 {self.FONT} 0 R >> >> "
+                f"/Contents {content} 0 R >>"
+            ),
+        )
+        self._kids.append(page)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        kids = " ".join(f"{k} 0 R" for k in self._kids)
+        self._obj(self.PAGES, _pdf_str(f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)} >>"))
+        self._obj(self.CATALOG, _pdf_str(f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>"))
+        xref_at = self._pos
+        size = self._next
+        rows = ["xref", f"0 {size}", "0000000000 65535 f "]
+        for n in range(1, size):
+            rows.append(f"{self._offsets[n]:010d} 00000 n ")
+        trailer = f"trailer\n<< /Size {size} /Root {self.CATALOG} 0 R >>\nstartxref\n{xref_at}\n%%EOF\n"
+        self._emit(_pdf_str("\n".join(rows) + "\n" + trailer))
+        self._closed = True
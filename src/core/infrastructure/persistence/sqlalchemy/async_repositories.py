@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Document, ProblemLog
+from .repositories import ProblemLogFilter, job_status_counts_stmt, problem_log_page_stmt, split_page, status_count_rows
+
+
+class AsyncDocumentRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.s = session
+
+    async def get(self, document_id: int) -> Optional[Document]:
+        return await self.s.get(Document, document_id)
+
+
+class AsyncJobRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.s = session
+
+    async def status_counts(self, tenant_id: Optional[str] = None) -> list[dict]:
+        return status_count_rows((await self.s.execute(job_status_counts_stmt(tenant_id))).all())
+
+
+class AsyncProblemLogRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.s = session
+
+    async def list(self, limit: int = 50) -> list[ProblemLog]:
+        return (await self.page(ProblemLogFilter(), limit=limit))[0]
+
+    async def page(
+        self, flt: ProblemLogFilter, cursor: Optional[int] = None, limit: int = 50
+    ) -> Tuple[list[ProblemLog], Optional[int]]:
+        rows = (await self.s.scalars(problem_log_page_stmt(flt, cursor, limit))).all()
+        return split_page(rows, limit)
+
+    async def add_many(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        await self.s.execute(insert(ProblemLog), rows)
+        return len(rows)
+
+    async def decide(self, pl_id: int, decision: str, decided_by: str) -> ProblemLog | None:
+        row = await self.s.get(ProblemLog, pl_id)
+        if not row:
+            return None
+        row.user_decision = decision
+        row.decided_by = decided_by
+        row.decided_at = datetime.utcnow()
+        await self.s.flush()
+        return row
@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.infrastructure.observability import metrics
+
+from .session import REPLICA_LAG_SQL, _pool_options, database_url, get_lag_guard, read_only, replica_url
+
+log = logging.getLogger(__name__)
+
+# Async counterpart of session.py for the API. Workers and ETL stay on the sync engine.
+_engines: Dict[Tuple[int, str], AsyncEngine] = {}
+_sessionmakers: Dict[Tuple[int, str], async_sessionmaker] = {}
+_lock = threading.Lock()
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _to_async(dsn: str) -> str:
+    scheme, sep, rest = dsn.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def async_database_url() -> str:
+    # DATABASE_ASYNC_URL wins; otherwise DATABASE_URL with its driver swapped for asyncpg
+    return os.getenv("DATABASE_ASYNC_URL") or _to_async(database_url())
+
+
+def async_replica_url() -> Optional[str]:
+    explicit = os.getenv("DATABASE_REPLICA_ASYNC_URL")
+    if explicit:
+        return explicit
+    dsn = replica_url()
+    return _to_async(dsn) if dsn else None
+
+
+def get_async_engine(dsn: Optional[str] = None) -> AsyncEngine:
+    dsn = dsn or async_database_url()
+    key = (os.getpid(), dsn)
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = create_async_engine(dsn, **_pool_options(dsn))
+                _engines[key] = engine
+    return engine
+
+
+def get_async_sessionmaker(dsn: Optional[str] = None) -> async_sessionmaker:
+    dsn = dsn or async_database_url()
+    key = (os.getpid(), dsn)
+    factory = _sessionmakers.get(key)
+    if factory is None:
+        engine = get_async_engine(dsn)
+        with _lock:
+            # rows are serialized after commit; no implicit (awaitable) refresh
+            factory = _sessionmakers.setdefault(key, async_sessionmaker(engine, expire_on_commit=False))
+    return factory
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    # FastAPI dependency: `s: AsyncSession = Depends(get_async_session)`
+    async with get_async_sessionmaker()() as s:
+        yield s
+
+
+async def _replica_lag(dsn: str) -> Optional[float]:
+    try:
+        async with get_async_engine(dsn).connect() as conn:
+            if conn.dialect.name != "postgresql":
+                return 0.0
+            return float((await conn.execute(REPLICA_LAG_SQL)).scalar() or 0)
+    except Exception as e:
+        log.warning("replica lag check failed: %s", e)
+        return None
+
+
+async def get_async_read_sessionmaker() -> async_sessionmaker:
+    # same routing and lag guard as session.get_read_sessionmaker
+    dsn = async_replica_url()
+    if dsn:
+        guard = get_lag_guard(dsn)
+        if guard.begin_check():
+            lag = None
+            try:
+                lag = await _replica_lag(dsn)
+            finally:
+                guard.end_check(lag)
+        if guard.healthy:
+            key = (os.getpid(), f"replica:{dsn}")
+            factory = _sessionmakers.get(key)
+            if factory is None:
+                engine = read_only(get_async_engine(dsn))
+                with _lock:
+                    factory = _sessionmakers.setdefault(key, async_sessionmaker(engine, expire_on_commit=False))
+            metrics.inc("db_read_routed_total", target="replica")
+            return factory
+    metrics.inc("db_read_routed_total", target="primary")
+    return get_async_sessionmaker()
+
+
+async def get_async_read_session() -> AsyncIterator[AsyncSession]:
+    # FastAPI dependency for read-only endpoints
+    async with (await get_async_read_sessionmaker())() as s:
+        yield s
+
+
+async def dispose_async_engines() -> None:
+    with _lock:
+        engines = list(_engines.values())
+        _engines.clear()
+        _sessionmakers.clear()
+    for engine in engines:
+        await engine.dispose()
@@ -13,6 +13,7 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -68,6 +69,8 @@ class Document(Base):
     __table_args__ = (
         UniqueConstraint("tenant_id", "idempotency_key", name="uq_document_tenant_idem"),
         Index("ix_document_tenant_case", "tenant_id", "case_pk"),
+        # storage_object -> document linking looks documents up by storage_ref, lowest id first
+        Index("ix_document_storage_ref", "storage_ref", "id"),
     )
 
     tenant = relationship("Tenant")
@@ -130,6 +133,8 @@ class Job(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(ForeignKey("tenant.tenant_id", ondelete="RESTRICT"), index=True)
     document_id = Column(ForeignKey("document.id", ondelete="SET NULL"), nullable=True)
+    # Dramatiq message id; stable across retries of the same job
+    message_id = Column(String(64))
     queue = Column(String(128), index=True)
     status = Column(String(64), index=True)
     attempts = Column(Integer, default=0)
@@ -137,6 +142,10 @@ class Job(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("message_id", name="uq_job_message_id"),
+    )
+
     tenant = relationship("Tenant")
     document = relationship("Document")
 
@@ -155,15 +164,30 @@ class Task(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("job_id", "step", name="uq_task_job_step"),
+    )
+
     tenant = relationship("Tenant")
     job = relationship("Job", backref="tasks")
 
 
 class ProblemLog(Base):
     __tablename__ = "problem_log"
+    # every triage filter is tenant-scoped and pages newest-first by id (keyset)
+    __table_args__ = (
+        Index("ix_problem_log_tenant_id_id", "tenant_id", "id"),
+        Index("ix_problem_log_tenant_queue_id", "tenant_id", "queue", "id"),
+        Index("ix_problem_log_tenant_error_code_id", "tenant_id", "error_code", "id"),
+        Index("ix_problem_log_tenant_task_type_id", "tenant_id", "task_type", "id"),
+        Index("ix_problem_log_open", "tenant_id", "id", postgresql_where=text("user_decision IS NULL")),
+        Index("ix_problem_log_created_at", "created_at"),
+        # daily range partitions, see partitions.py; the key has to be part of the PK
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    tenant_id = Column(ForeignKey("tenant.tenant_id", ondelete="RESTRICT"), index=True)
+    tenant_id = Column(ForeignKey("tenant.tenant_id", ondelete="RESTRICT"))
     document_id = Column(ForeignKey("document.id", ondelete="SET NULL"), nullable=True)
     task_type = Column(String(64))
     queue = Column(String(128))
@@ -177,7 +201,10 @@ class ProblemLog(Base):
     user_decision = Column(String(64))
     decided_by = Column(String(128))
     decided_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
+
+    # rows are still addressed by id alone (ids come from one sequence)
+    __mapper_args__ = {"primary_key": [id]}
 
     tenant = relationship("Tenant")
     document = relationship("Document")
@@ -185,14 +212,38 @@ class ProblemLog(Base):
 
 class Event(Base):
     __tablename__ = "event"
+    __table_args__ = ({"postgresql_partition_by": "RANGE (created_at)"},)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(ForeignKey("tenant.tenant_id", ondelete="RESTRICT"), index=True)
     document_id = Column(ForeignKey("document.id", ondelete="SET NULL"), nullable=True)
     type = Column(String(64), index=True)
     payload = Column(JSON)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
+
+    __mapper_args__ = {"primary_key": [id]}
 
     tenant = relationship("Tenant")
     document = relationship("Document")
 
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+    # relays claim the oldest unpublished rows; published rows are purged after a while
+    __table_args__ = (
+        Index("ix_outbox_pending", "id", postgresql_where=text("published_at IS NULL")),
+        Index("ix_outbox_published_at", "published_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(ForeignKey("tenant.tenant_id", ondelete="RESTRICT"), nullable=True)
+    document_id = Column(ForeignKey("document.id", ondelete="SET NULL"), nullable=True)
+    # Dramatiq message id, so a re-published row is recognised by job tracking
+    message_id = Column(String(64), nullable=False)
+    queue_name = Column(String(128), nullable=False)
+    actor_name = Column(String(128), nullable=False)
+    message = Column(JSON, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    published_at = Column(DateTime, nullable=True)
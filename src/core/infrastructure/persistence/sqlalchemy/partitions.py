@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# Tables range-partitioned by created_at into daily partitions <table>_pYYYYMMDD, plus a
+# <table>_default catch-all that should stay empty. Retention drops whole partitions, so
+# nothing is ever DELETEd row by row. Rows that did land in the default partition (no
+# partition for their day yet) are moved into a new partition for that day on the next
+# run. Values: env var with the retention in days, default.
+PARTITIONED_TABLES: Dict[str, Tuple[str, int]] = {
+    "problem_log": ("PROBLEM_LOG_RETENTION_DAYS", 10),
+    "event": ("EVENT_RETENTION_DAYS", 30),
+}
+
+# arbitrary constant so only one maintenance run works on the partitions at a time
+_LOCK_ID = 0x70617274
+
+_BOUND = re.compile(r"FROM \((?P<lo>[^)]*)\) TO \((?P<hi>[^)]*)\)")
+
+Range = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def _parse_bound(raw: str) -> Optional[datetime]:
+    raw = raw.strip().strip("'")
+    if raw.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(raw)
+
+
+def list_partitions(conn: Connection, table: str) -> List[Tuple[str, Range]]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table ORDER BY c.relname"
+        ),
+        {"table": table},
+    ).all()
+    out: List[Tuple[str, Range]] = []
+    for name, bound in rows:
+        m = _BOUND.search(bound or "")
+        if m is None:
+            # DEFAULT partition
+            continue
+        out.append((name, (_parse_bound(m.group("lo")), _parse_bound(m.group("hi")))))
+    return out
+
+
+def _covers(rng: Range, day: datetime) -> bool:
+    lo, hi = rng
+    return (lo is None or lo <= day) and (hi is None or day < hi)
+
+
+def default_days(conn: Connection, table: str) -> List[datetime]:
+    rows = conn.execute(text(f"SELECT DISTINCT date_trunc('day', created_at) FROM \"{table}_default\" ORDER BY 1"))
+    return [r[0] for r in rows]
+
+
+def _attach_from_default(conn: Connection, table: str, name: str, day: datetime) -> int:
+    # CREATE ... PARTITION OF fails while the default partition holds rows of that range:
+    # move them into a plain table, then attach it
+    lo, hi = day, day + timedelta(days=1)
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    moved = conn.execute(
+        text(
+            f'WITH moved AS (DELETE FROM "{table}_default" WHERE created_at >= :lo AND created_at < :hi RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ),
+        {"lo": lo, "hi": hi},
+    ).rowcount
+    conn.execute(
+        text(f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (\'{lo:%Y-%m-%d}\') TO (\'{hi:%Y-%m-%d}\')')
+    )
+    return moved
+
+
+def ensure_partitions(
+    conn: Connection, table: str, today: date, ahead_days: int, retention_days: int = 0
+) -> List[str]:
+    existing = list_partitions(conn, table)
+    days = [datetime.combine(today + timedelta(days=offset), datetime.min.time()) for offset in range(ahead_days + 1)]
+    stranded = set(default_days(conn, table))
+    cutoff = datetime.combine(today - timedelta(days=retention_days), datetime.min.time())
+    # expired days left in the default partition are purged by drop_expired instead
+    days += sorted(d for d in stranded if d not in days and (retention_days <= 0 or d >= cutoff))
+    created: List[str] = []
+    for day in days:
+        if any(_covers(rng, day) for _name, rng in existing):
+            continue
+        name = f"{table}_p{day:%Y%m%d}"
+        try:
+            # savepoint: one failing day must not abort the rest of the run
+            with conn.begin_nested():
+                if day in stranded:
+                    moved = _attach_from_default(conn, table, name, day)
+                    log.warning("partition %s created from %s rows in %s_default", name, moved, table)
+                    metrics.inc("partition_default_rows_moved_total", moved, table=table)
+                else:
+                    conn.execute(
+                        text(
+                            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                            f"FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{day + timedelta(days=1):%Y-%m-%d}')"
+                        )
+                    )
+        except Exception as e:
+            log.error("partition %s could not be created: %s", name, e)
+            metrics.inc("partition_create_failures_total", table=table)
+            continue
+        existing.append((name, (day, day + timedelta(days=1))))
+        created.append(name)
+    return created
+
+
+def drop_expired(conn: Connection, table: str, today: date, retention_days: int) -> List[str]:
+    cutoff = datetime.combine(today - timedelta(days=retention_days), datetime.min.time())
+    dropped: List[str] = []
+    for name, (_lo, hi) in list_partitions(conn, table):
+        if hi is None or hi > cutoff:
+            continue
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        conn.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+    # whatever expired in the default partition (should be empty, so a plain DELETE is cheap)
+    purged = conn.execute(text(f'DELETE FROM "{table}_default" WHERE created_at < :cutoff'), {"cutoff": cutoff}).rowcount
+    if purged:
+        log.warning("purged %s expired rows from %s_default", purged, table)
+    return dropped
+
+
+def run_partition_maintenance(engine: Optional[Engine] = None, today: Optional[date] = None) -> Dict[str, dict]:
+    if engine is None:
+        from src.core.infrastructure.persistence.sqlalchemy.session import get_engine
+
+        engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        log.info("partition maintenance skipped on %s", engine.dialect.name)
+        return {}
+    today = today or datetime.utcnow().date()
+    ahead = int(os.getenv("PARTITION_PREMAKE_DAYS", "7"))
+    report: Dict[str, dict] = {}
+    with engine.begin() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": _LOCK_ID}).scalar():
+            log.info("partition maintenance already running elsewhere")
+            return {}
+        for table, (env, default_days) in PARTITIONED_TABLES.items():
+            retention = int(os.getenv(env, str(default_days)))
+            created = ensure_partitions(conn, table, today, ahead, retention)
+            dropped = drop_expired(conn, table, today, retention) if retention > 0 else []
+            stranded = conn.execute(text(f'SELECT count(*) FROM "{table}_default"')).scalar() or 0
+            report[table] = {"created": created, "dropped": dropped, "default_rows": stranded}
+            metrics.inc("partitions_created_total", len(created), table=table)
+            metrics.inc("partitions_dropped_total", len(dropped), table=table)
+            metrics.set_gauge("partitions", len(list_partitions(conn, table)), table=table)
+            metrics.set_gauge("partition_default_rows", stranded, table=table)
+            if stranded:
+                log.error("%s rows of %s are still in %s_default", stranded, table, table)
+    log.info("partition maintenance: %s", report)
+    return report
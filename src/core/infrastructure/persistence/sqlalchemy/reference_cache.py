@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+# cached "known not to exist" marker
+_MISSING = {"__missing__": True}
+
+
+class LocalTier:
+    # in-process LRU with a per-entry deadline
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max(1, max_items)
+        self._items: "OrderedDict[Hashable, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            deadline, value = item
+            if deadline <= now:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: dict, ttl: float) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class RedisTier:
+    def __init__(self, client, prefix: str) -> None:
+        self._r = client
+        self.prefix = prefix
+
+    def _key(self, key: Tuple) -> str:
+        return f"{self.prefix}:" + "|".join(str(k) for k in key)
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        try:
+            raw = self._r.get(self._key(key))
+        except Exception as e:
+            log.warning("reference cache redis get failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, key: Tuple, value: dict, ttl: float) -> None:
+        try:
+            self._r.set(self._key(key), json.dumps(value, default=_json_default), px=int(ttl * 1000))
+        except Exception as e:
+            log.warning("reference cache redis set failed: %s", e)
+
+    def delete(self, key: Tuple) -> None:
+        try:
+            self._r.delete(self._key(key))
+        except Exception as e:
+            log.warning("reference cache redis delete failed: %s", e)
+
+    def clear(self) -> None:
+        try:
+            batch = []
+            for k in self._r.scan_iter(match=f"{self.prefix}:*", count=1000):
+                batch.append(k)
+                if len(batch) >= 1000:
+                    self._r.delete(*batch)
+                    batch = []
+            if batch:
+                self._r.delete(*batch)
+        except Exception as e:
+            log.warning("reference cache redis clear failed: %s", e)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+class ReferenceCache:
+    # Read-through cache for small, rarely changing rows (tenant, case, storage object):
+    # in-process LRU (REFCACHE_LOCAL_TTL) in front of Redis (REFCACHE_TTL) in front of the
+    # loader. Misses are cached too for `negative_ttl` seconds. Repositories call
+    # invalidate() after committing a write; other processes see the change in Redis right
+    # away and in their local tier within the local TTL.
+
+    def __init__(
+        self,
+        entity: str,
+        local: LocalTier,
+        shared: Optional[RedisTier] = None,
+        local_ttl: float = 30.0,
+        ttl: float = 600.0,
+        negative_ttl: float = 10.0,
+    ) -> None:
+        self.entity = entity
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    def _hit(self, tier: str) -> None:
+        metrics.inc("refcache_hits_total", entity=self.entity, tier=tier)
+        self._ratio()
+
+    def _ratio(self) -> None:
+        hits = metrics.get("refcache_hits_total", entity=self.entity, tier="local") + metrics.get(
+            "refcache_hits_total", entity=self.entity, tier="redis"
+        )
+        misses = metrics.get("refcache_misses_total", entity=self.entity)
+        total = hits + misses
+        metrics.set_gauge("refcache_hit_ratio", hits / total if total else 0.0, entity=self.entity)
+
+    def get_or_load(self, key: Tuple, loader: Callable[[], Optional[dict]]) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is not None:
+            self._hit("local")
+            return None if value is _MISSING else value
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._hit("redis")
+                if value.get("__missing__"):
+                    self.local.put(key, _MISSING, min(self.local_ttl, self.negative_ttl))
+                    return None
+                self.local.put(key, value, self.local_ttl)
+                return value
+        metrics.inc("refcache_misses_total", entity=self.entity)
+        self._ratio()
+        value = loader()
+        if value is None:
+            if self.negative_ttl > 0:
+                self.local.put(key, _MISSING, min(self.local_ttl, self.negative_ttl))
+                if self.shared is not None:
+                    self.shared.put(key, _MISSING, self.negative_ttl)
+            return None
+        self.put(key, value)
+        return value
+
+    def put(self, key: Tuple, value: dict) -> None:
+        self.local.put(key, value, self.local_ttl)
+        if self.shared is not None:
+            self.shared.put(key, value, self.ttl)
+
+    def invalidate(self, key: Tuple) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+        metrics.inc("refcache_invalidations_total", entity=self.entity)
+
+    def clear(self) -> None:
+        # after bulk writes that bypass the repositories (ETL)
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+
+_caches: Dict[str, ReferenceCache] = {}
+_caches_lock = threading.Lock()
+_redis = None
+
+# storage objects are looked up right before being created, so caching misses would only
+# hide fresh rows
+_NEGATIVE_TTL_DEFAULTS = {"storage_object": 0.0}
+
+
+def _redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+
+        _redis = redis.Redis.from_url(os.getenv("REFCACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _redis
+
+
+def get_reference_cache(entity: str) -> ReferenceCache:
+    cache = _caches.get(entity)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(entity)
+            if cache is None:
+                shared = None
+                if os.getenv("REFCACHE_REDIS", "1") == "1":
+                    shared = RedisTier(_redis_client(), f"refcache:{entity}")
+                negative = _NEGATIVE_TTL_DEFAULTS.get(entity, float(os.getenv("REFCACHE_NEGATIVE_TTL", "10")))
+                cache = ReferenceCache(
+                    entity,
+                    LocalTier(int(os.getenv("REFCACHE_LOCAL_MAX_ITEMS", "10000"))),
+                    shared,
+                    local_ttl=float(os.getenv("REFCACHE_LOCAL_TTL", "30")),
+                    ttl=float(os.getenv("REFCACHE_TTL", "600")),
+                    negative_ttl=negative,
+                )
+                _caches[entity] = cache
+    return cache
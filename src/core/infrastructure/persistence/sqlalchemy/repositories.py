@@ -1,11 +1,104 @@
 from __future__ import annotations
 
-from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, literal_column, select, update
+from sqlalchemy.sql.expression import Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from .models import Document, ProblemLog
+from .models import Case, Document, Event, Job, OutboxMessage, ProblemLog, StorageObject, Task, Tenant
+from .reference_cache import get_reference_cache
+
+
+class TenantRepository:
+    def __init__(self, session: Session) -> None:
+        self.s = session
+        self.cache = get_reference_cache("tenant")
+
+    def exists(self, tenant_id: str) -> bool:
+        def _load() -> Optional[dict]:
+            row = self.s.get(Tenant, tenant_id)
+            return {"tenant_id": row.tenant_id} if row is not None else None
+
+        return self.cache.get_or_load((tenant_id,), _load) is not None
+
+    def ensure(self, tenant_id: str, name: Optional[str] = None) -> str:
+        if not self.exists(tenant_id):
+            values = {"tenant_id": tenant_id, "name": name or tenant_id, "created_at": datetime.utcnow()}
+            if self.s.get_bind().dialect.name == "postgresql":
+                # safe against a concurrent ensure of the same tenant
+                stmt = pg_insert(Tenant).values(**values).on_conflict_do_nothing(index_elements=["tenant_id"])
+                self.s.execute(stmt)
+            elif self.s.get(Tenant, tenant_id) is None:
+                self.s.add(Tenant(**values))
+                self.s.flush()
+            # drop the cached miss
+            self.cache.invalidate((tenant_id,))
+        return tenant_id
+
+
+class CaseRepository:
+    def __init__(self, session: Session) -> None:
+        self.s = session
+        self.cache = get_reference_cache("case")
+
+    def pk_for(self, tenant_id: str, case_id: Optional[str]) -> Optional[int]:
+        if not case_id:
+            return None
+
+        def _load() -> Optional[dict]:
+            pk = self.s.scalar(select(Case.id).where(Case.tenant_id == tenant_id, Case.case_id == case_id))
+            return {"id": pk} if pk is not None else None
+
+        hit = self.cache.get_or_load((tenant_id, case_id), _load)
+        return hit["id"] if hit is not None else None
+
+    def invalidate(self, tenant_id: str, case_id: str) -> None:
+        self.cache.invalidate((tenant_id, case_id))
+
+
+class StorageObjectRepository:
+    def __init__(self, session: Session) -> None:
+        self.s = session
+        self.cache = get_reference_cache("storage_object")
+
+    def get_by_bucket_key(self, bucket: str, key: str) -> Optional[StorageObject]:
+        # only the id is cached: the row itself is mutable (size, etag, document and case
+        # links change under bulk ETL updates), so it is always read in this session by
+        # primary key instead of the (bucket, key) scan
+        def _load() -> Optional[dict]:
+            pk = self.s.scalar(select(StorageObject.id).where(StorageObject.bucket == bucket, StorageObject.key == key))
+            return {"id": pk} if pk is not None else None
+
+        hit = self.cache.get_or_load((bucket, key), _load)
+        if hit is None:
+            return None
+        row = self.s.get(StorageObject, hit["id"])
+        if row is None or (row.bucket, row.key) != (bucket, key):
+            # deleted or re-keyed since it was cached
+            self.invalidate(bucket, key)
+            hit = self.cache.get_or_load((bucket, key), _load)
+            row = self.s.get(StorageObject, hit["id"]) if hit is not None else None
+        return row
+
+    def invalidate(self, bucket: str, key: str) -> None:
+        self.cache.invalidate((bucket, key))
+
+
+# columns upsert_many overwrites when the new value is not null (status is handled apart)
+_DOCUMENT_UPSERT_FIELDS = (
+    "case_pk",
+    "doc_kind",
+    "title",
+    "mime",
+    "size",
+    "sha256",
+    "storage_ref",
+    "vault_path_main",
+)
 
 
 class DocumentRepository:
@@ -34,44 +127,132 @@ class DocumentRepository:
         vault_path_main: Optional[str] = None,
         status: Optional[str] = None,
     ) -> Document:
-        existing = self.get_by_idempotency(tenant_id, idempotency_key)
-        if existing:
-            # Update non-null fields
-            if doc_kind is not None:
-                existing.doc_kind = doc_kind
-            if title is not None:
-                existing.title = title
-            if mime is not None:
-                existing.mime = mime
-            if size is not None:
-                existing.size = size
-            if sha256 is not None:
-                existing.sha256 = sha256
-            if storage_ref is not None:
-                existing.storage_ref = storage_ref
-            if vault_path_main is not None:
-                existing.vault_path_main = vault_path_main
-            if status is not None:
-                existing.status = status
-            self.s.flush()
-            return existing
-
-        doc = Document(
-            tenant_id=tenant_id,
-            case_pk=case_pk,
-            idempotency_key=idempotency_key,
-            doc_kind=doc_kind,
-            title=title,
-            mime=mime,
-            size=size,
-            sha256=sha256,
-            storage_ref=storage_ref,
-            vault_path_main=vault_path_main,
-            status=status or "registered",
+        (doc_id,) = self.upsert_many(
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "case_pk": case_pk,
+                    "idempotency_key": idempotency_key,
+                    "doc_kind": doc_kind,
+                    "title": title,
+                    "mime": mime,
+                    "size": size,
+                    "sha256": sha256,
+                    "storage_ref": storage_ref,
+                    "vault_path_main": vault_path_main,
+                    "status": status,
+                }
+            ]
         )
-        self.s.add(doc)
-        self.s.flush()
-        return doc
+        return self.s.get(Document, doc_id, populate_existing=True)
+
+    def upsert_many(self, rows: list[dict], batch_size: int = 1000, stats: Optional[dict] = None) -> list[int]:
+        # One INSERT ... ON CONFLICT (tenant_id, idempotency_key) per chunk instead of a
+        # SELECT + INSERT/UPDATE per document; the conflict clause also settles the race
+        # between two workers registering the same document. Only non-null values
+        # overwrite stored ones. Returns the document ids in the order of `rows`; `stats`
+        # (if given) gets "inserted"/"updated" counts.
+        if not rows:
+            return []
+        now = datetime.utcnow()
+        merged: dict[tuple, dict] = {}
+        for r in rows:
+            k = (r["tenant_id"], r["idempotency_key"])
+            # a key may appear twice in one batch; Postgres refuses to update a row twice
+            # in one statement, so merge them here (later non-null values win)
+            prev = merged.get(k, {})
+            merged[k] = {**prev, **{f: v for f, v in r.items() if v is not None}}
+
+        ids: dict[tuple, int] = {}
+        items = list(merged.values())
+        for i in range(0, len(items), batch_size):
+            chunk = items[i : i + batch_size]
+            # rows without a status get "registered" on insert but must keep the stored
+            # status on update, so they go in a statement of their own
+            for with_status in (True, False):
+                values = [
+                    {
+                        "tenant_id": r["tenant_id"],
+                        "idempotency_key": r["idempotency_key"],
+                        **{f: r.get(f) for f in _DOCUMENT_UPSERT_FIELDS},
+                        "status": r["status"] if with_status else "registered",
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for r in chunk
+                    if (r.get("status") is not None) == with_status
+                ]
+                if not values:
+                    continue
+                stmt = pg_insert(Document).values(values)
+                ex = stmt.excluded
+                set_ = {f: func.coalesce(ex[f], getattr(Document, f)) for f in _DOCUMENT_UPSERT_FIELDS}
+                if with_status:
+                    set_["status"] = ex.status
+                set_["updated_at"] = ex.updated_at
+                stmt = stmt.on_conflict_do_update(constraint="uq_document_tenant_idem", set_=set_).returning(
+                    Document.id,
+                    Document.tenant_id,
+                    Document.idempotency_key,
+                    # xmax is 0 for a freshly inserted row version
+                    literal_column("xmax = 0"),
+                )
+                for doc_id, tenant_id, key, inserted in self.s.execute(stmt):
+                    ids[(tenant_id, key)] = doc_id
+                    if stats is not None:
+                        name = "inserted" if inserted else "updated"
+                        stats[name] = stats.get(name, 0) + 1
+        return [ids[(r["tenant_id"], r["idempotency_key"])] for r in rows]
+
+
+@dataclass
+class ProblemLogFilter:
+    tenant_id: Optional[str] = None
+    queue: Optional[str] = None
+    # exact code, or a prefix ending in "*" (e.g. "permanent:*")
+    error_code: Optional[str] = None
+    task_type: Optional[str] = None
+    # "open" (no decision yet), "decided", or a specific decision value
+    decision: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+
+def problem_log_page_stmt(flt: ProblemLogFilter, cursor: Optional[int], limit: int) -> Select:
+    # Keyset pagination newest-first: the cursor is the last id of the previous page, so
+    # every page is an index range scan no matter how deep. One extra row tells whether
+    # there is a next page. Shared by the sync and async repositories.
+    stmt = select(ProblemLog)
+    if flt.tenant_id is not None:
+        stmt = stmt.where(ProblemLog.tenant_id == flt.tenant_id)
+    if flt.queue is not None:
+        stmt = stmt.where(ProblemLog.queue == flt.queue)
+    if flt.error_code is not None:
+        if flt.error_code.endswith("*"):
+            stmt = stmt.where(ProblemLog.error_code.startswith(flt.error_code[:-1], autoescape=True))
+        else:
+            stmt = stmt.where(ProblemLog.error_code == flt.error_code)
+    if flt.task_type is not None:
+        stmt = stmt.where(ProblemLog.task_type == flt.task_type)
+    if flt.decision == "open":
+        stmt = stmt.where(ProblemLog.user_decision.is_(None))
+    elif flt.decision == "decided":
+        stmt = stmt.where(ProblemLog.user_decision.is_not(None))
+    elif flt.decision is not None:
+        stmt = stmt.where(ProblemLog.user_decision == flt.decision)
+    if flt.since is not None:
+        stmt = stmt.where(ProblemLog.created_at >= flt.since)
+    if flt.until is not None:
+        stmt = stmt.where(ProblemLog.created_at < flt.until)
+    if cursor is not None:
+        stmt = stmt.where(ProblemLog.id < cursor)
+    return stmt.order_by(ProblemLog.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[ProblemLog], limit: int) -> Tuple[list[ProblemLog], Optional[int]]:
+    if len(rows) > limit:
+        return list(rows[:limit]), rows[limit - 1].id
+    return list(rows), None
 
 
 class ProblemLogRepository:
@@ -79,8 +260,13 @@ class ProblemLogRepository:
         self.s = session
 
     def list(self, limit: int = 50) -> list[ProblemLog]:
-        stmt = select(ProblemLog).order_by(ProblemLog.id.desc()).limit(limit)
-        return list(self.s.scalars(stmt).all())
+        return self.page(ProblemLogFilter(), limit=limit)[0]
+
+    def page(
+        self, flt: ProblemLogFilter, cursor: Optional[int] = None, limit: int = 50
+    ) -> Tuple[list[ProblemLog], Optional[int]]:
+        rows = self.s.scalars(problem_log_page_stmt(flt, cursor, limit)).all()
+        return split_page(rows, limit)
 
     def add(
         self,
@@ -106,6 +292,13 @@ class ProblemLogRepository:
         self.s.flush()
         return row
 
+    def add_many(self, rows: list[dict]) -> int:
+        # one executemany INSERT for a batch of problem rows (see write_behind)
+        if not rows:
+            return 0
+        self.s.execute(insert(ProblemLog), rows)
+        return len(rows)
+
     def decide(self, pl_id: int, decision: str, decided_by: str) -> ProblemLog | None:
         row = self.s.get(ProblemLog, pl_id)
         if not row:
@@ -116,3 +309,160 @@ class ProblemLogRepository:
         self.s.flush()
         return row
 
+
+class EventRepository:
+    def __init__(self, session: Session) -> None:
+        self.s = session
+
+    def add_many(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        self.s.execute(insert(Event), rows)
+        return len(rows)
+
+
+class OutboxRepository:
+    def __init__(self, session: Session) -> None:
+        self.s = session
+
+    def add_many(self, messages: list[dict]) -> int:
+        # encoded Dramatiq messages (Message.asdict()), written in the caller's transaction
+        if not messages:
+            return 0
+        rows = [
+            {
+                "tenant_id": m["options"].get("tenant_id"),
+                "document_id": m["options"].get("document_id"),
+                "message_id": m["message_id"],
+                "queue_name": m["queue_name"],
+                "actor_name": m["actor_name"],
+                "message": m,
+            }
+            for m in messages
+        ]
+        self.s.execute(insert(OutboxMessage), rows)
+        return len(rows)
+
+    def claim(self, limit: int, max_attempts: int) -> list[OutboxMessage]:
+        # rows stay locked until the caller commits; concurrent relays skip them
+        stmt = (
+            select(OutboxMessage)
+            .where(OutboxMessage.published_at.is_(None), OutboxMessage.attempts < max_attempts)
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(self.s.scalars(stmt).all())
+
+    def mark_published(self, ids: list[int]) -> int:
+        if not ids:
+            return 0
+        res = self.s.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(ids)).values(published_at=datetime.utcnow())
+        )
+        return res.rowcount or 0
+
+    def mark_failed(self, row: OutboxMessage, error: str) -> None:
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = error[:4000]
+
+    def purge_published(self, before: datetime, limit: int = 5000) -> int:
+        ids = select(OutboxMessage.id).where(OutboxMessage.published_at < before).limit(limit).scalar_subquery()
+        res = self.s.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(ids)))
+        return res.rowcount or 0
+
+
+def job_status_counts_stmt(tenant_id: Optional[str] = None) -> Select:
+    # shared by the sync and async repositories
+    stmt = select(Job.tenant_id, Job.queue, Job.status, func.count()).group_by(Job.tenant_id, Job.queue, Job.status)
+    if tenant_id is not None:
+        stmt = stmt.where(Job.tenant_id == tenant_id)
+    return stmt
+
+
+def status_count_rows(rows) -> list[dict]:
+    return [{"tenant_id": t, "queue": q, "status": st, "count": n} for t, q, st, n in rows]
+
+
+class JobRepository:
+    def __init__(self, session: Session) -> None:
+        self.s = session
+
+    def upsert_lifecycle(self, rows: list[dict]) -> int:
+        # rows come from the job-tracking write-behind buffer, one per message_id. Events from
+        # producer and worker processes can arrive out of order, so an upsert only applies
+        # when it is not older than what is stored (updated_at is the event time).
+        if not rows:
+            return 0
+        job_rows = [
+            {
+                "message_id": r["message_id"],
+                "tenant_id": r.get("tenant_id"),
+                "document_id": r.get("document_id"),
+                "queue": r.get("queue"),
+                "status": r["status"],
+                "attempts": r.get("attempts") or 0,
+                "last_error": r.get("last_error"),
+                "created_at": r.get("enqueued_at") or r["at"],
+                "updated_at": r["at"],
+            }
+            for r in rows
+        ]
+        stmt = pg_insert(Job).values(job_rows)
+        ex = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_job_message_id",
+            set_={
+                "status": ex.status,
+                "attempts": func.greatest(Job.attempts, ex.attempts),
+                "last_error": func.coalesce(ex.last_error, Job.last_error),
+                "tenant_id": func.coalesce(ex.tenant_id, Job.tenant_id),
+                "document_id": func.coalesce(ex.document_id, Job.document_id),
+                "queue": func.coalesce(ex.queue, Job.queue),
+                "created_at": func.least(Job.created_at, ex.created_at),
+                "updated_at": ex.updated_at,
+            },
+            where=Job.updated_at <= ex.updated_at,
+        )
+        self.s.execute(stmt)
+
+        ids = dict(
+            self.s.execute(
+                select(Job.message_id, Job.id).where(Job.message_id.in_([r["message_id"] for r in rows]))
+            ).all()
+        )
+        task_rows = [
+            {
+                "job_id": ids[r["message_id"]],
+                "tenant_id": r.get("tenant_id"),
+                "step": r["step"],
+                "status": r["status"],
+                "attempts": r.get("attempts") or 0,
+                "started_at": r.get("started_at"),
+                "finished_at": r.get("finished_at"),
+                "created_at": r.get("enqueued_at") or r["at"],
+                "updated_at": r["at"],
+            }
+            for r in rows
+            if r.get("step") and r["message_id"] in ids
+        ]
+        if task_rows:
+            tstmt = pg_insert(Task).values(task_rows)
+            tex = tstmt.excluded
+            tstmt = tstmt.on_conflict_do_update(
+                constraint="uq_task_job_step",
+                set_={
+                    "status": tex.status,
+                    "attempts": func.greatest(Task.attempts, tex.attempts),
+                    "tenant_id": func.coalesce(tex.tenant_id, Task.tenant_id),
+                    "started_at": func.coalesce(tex.started_at, Task.started_at),
+                    "finished_at": tex.finished_at,
+                    "updated_at": tex.updated_at,
+                },
+                where=Task.updated_at <= tex.updated_at,
+            )
+            self.s.execute(tstmt)
+        return len(job_rows)
+
+    def status_counts(self, tenant_id: Optional[str] = None) -> list[dict]:
+        return status_count_rows(self.s.execute(job_status_counts_stmt(tenant_id)).all())
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+# Bulk loader for the migrate_* ETL scripts (Postgres only): rows are streamed with COPY
+# into a temp staging table, then merged into the target with one set-based statement.
+# Within one load the last row per key wins (staging keeps input order in `seq`). Counts
+# only include rows that actually changed. The staging table lives until the caller's
+# transaction ends.
+
+_COPY_CHUNK_ROWS = 1000
+
+
+def _as_bigint(value: Any) -> Optional[int]:
+    # exports carry sizes as 12, 12.0 or "12"; anything that is not a whole number loads as
+    # NULL (the merge then keeps the stored value) instead of failing the whole COPY
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def _copy_value(value: Any, type_: str = "text") -> str:
+    # COPY text format: \N is NULL; backslash, tab and newlines are escaped
+    if type_ == "bigint":
+        value = _as_bigint(value)
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class CopyStream:
+    # read()-able view over an iterable of dicts, encoded lazily so any input size streams
+    # through COPY in bounded memory
+    def __init__(self, rows: Iterable[Dict[str, Any]], columns: Sequence[Tuple[str, str]]) -> None:
+        self._rows: Iterator[Dict[str, Any]] = iter(rows)
+        self._columns = columns
+        self._pending = ""
+        self._eof = False
+        self.count = 0
+
+    def read(self, size: int = -1) -> str:
+        while not self._eof and (size is None or size < 0 or len(self._pending) < size):
+            chunk = list(itertools.islice(self._rows, _COPY_CHUNK_ROWS))
+            if not chunk:
+                self._eof = True
+                break
+            self.count += len(chunk)
+            self._pending += "".join(
+                "\t".join(_copy_value(row.get(c), t) for c, t in self._columns) + "\n" for row in chunk
+            )
+        if size is None or size < 0:
+            out, self._pending = self._pending, ""
+        else:
+            out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+
+@dataclass(frozen=True)
+class StagingSpec:
+    name: str
+    columns: Tuple[Tuple[str, str], ...]
+    # one statement over stage_<name> returning (created, updated)
+    merge: str
+
+    @property
+    def table(self) -> str:
+        return f"stage_{self.name}"
+
+
+_NOW = "(now() at time zone 'utc')"
+
+CASES = StagingSpec(
+    name="case",
+    columns=(("tenant_id", "text"), ("case_id", "text"), ("title", "text")),
+    merge=f"""
+WITH src AS (
+    SELECT DISTINCT ON (tenant_id, case_id) tenant_id, case_id, title
+    FROM stage_case
+    WHERE tenant_id IS NOT NULL AND case_id IS NOT NULL
+    ORDER BY tenant_id, case_id, seq DESC
+), upd AS (
+    UPDATE "case" c SET title = src.title, updated_at = {_NOW}
+    FROM src
+    WHERE c.tenant_id = src.tenant_id AND c.case_id = src.case_id
+      AND c.title IS DISTINCT FROM src.title
+    RETURNING 1
+), ins AS (
+    INSERT INTO "case" (tenant_id, case_id, title, created_at, updated_at)
+    SELECT tenant_id, case_id, title, {_NOW}, {_NOW}
+    FROM src
+    WHERE NOT EXISTS (SELECT 1 FROM "case" c WHERE c.tenant_id = src.tenant_id AND c.case_id = src.case_id)
+    ON CONFLICT ON CONSTRAINT uq_case_tenant_caseid DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM ins), (SELECT count(*) FROM upd)
+""",
+)
+
+# same field semantics as DocumentRepository.upsert_many: missing values keep what is
+# stored, a missing status inserts "registered"; case_pk is resolved from case_id here
+DOCUMENTS = StagingSpec(
+    name="document",
+    columns=(
+        ("tenant_id", "text"),
+        ("idempotency_key", "text"),
+        ("case_id", "text"),
+        ("doc_kind", "text"),
+        ("title", "text"),
+        ("mime", "text"),
+        ("size", "bigint"),
+        ("sha256", "text"),
+        ("storage_ref", "text"),
+        ("vault_path_main", "text"),
+        ("status", "text"),
+    ),
+    merge=f"""
+WITH src AS (
+    SELECT DISTINCT ON (s.tenant_id, s.idempotency_key) s.*, c.id AS case_pk
+    FROM stage_document s
+    LEFT JOIN "case" c ON c.tenant_id = s.tenant_id AND c.case_id = s.case_id
+    WHERE s.tenant_id IS NOT NULL AND s.idempotency_key IS NOT NULL
+    ORDER BY s.tenant_id, s.idempotency_key, s.seq DESC
+), upd AS (
+    UPDATE document d SET
+        case_pk = COALESCE(src.case_pk, d.case_pk),
+        doc_kind = COALESCE(src.doc_kind, d.doc_kind),
+        title = COALESCE(src.title, d.title),
+        mime = COALESCE(src.mime, d.mime),
+        size = COALESCE(src.size, d.size),
+        sha256 = COALESCE(src.sha256, d.sha256),
+        storage_ref = COALESCE(src.storage_ref, d.storage_ref),
+        vault_path_main = COALESCE(src.vault_path_main, d.vault_path_main),
+        status = COALESCE(src.status, d.status),
+        updated_at = {_NOW}
+    FROM src
+    WHERE d.tenant_id = src.tenant_id AND d.idempotency_key = src.idempotency_key
+      AND (d.case_pk, d.doc_kind, d.title, d.mime, d.size, d.sha256, d.storage_ref, d.vault_path_main, d.status)
+          IS DISTINCT FROM (
+              COALESCE(src.case_pk, d.case_pk), COALESCE(src.doc_kind, d.doc_kind), COALESCE(src.title, d.title),
+              COALESCE(src.mime, d.mime), COALESCE(src.size, d.size), COALESCE(src.sha256, d.sha256),
+              COALESCE(src.storage_ref, d.storage_ref), COALESCE(src.vault_path_main, d.vault_path_main),
+              COALESCE(src.status, d.status)
+          )
+    RETURNING 1
+), ins AS (
+    INSERT INTO document (
+        tenant_id, idempotency_key, case_pk, doc_kind, title, mime, size, sha256, storage_ref,
+        vault_path_main, status, created_at, updated_at
+    )
+    SELECT tenant_id, idempotency_key, case_pk, doc_kind, title, mime, size, sha256, storage_ref,
+        vault_path_main, COALESCE(status, 'registered'), {_NOW}, {_NOW}
+    FROM src
+    WHERE NOT EXISTS (
+        SELECT 1 FROM document d WHERE d.tenant_id = src.tenant_id AND d.idempotency_key = src.idempotency_key
+    )
+    ON CONFLICT ON CONSTRAINT uq_document_tenant_idem DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM ins), (SELECT count(*) FROM upd)
+""",
+)
+
+STORAGE_OBJECTS = StagingSpec(
+    name="storage_object",
+    columns=(("tenant_id", "text"), ("bucket", "text"), ("key", "text"), ("size", "bigint"), ("etag", "text")),
+    merge=f"""
+WITH src AS (
+    SELECT DISTINCT ON (bucket, key) tenant_id, bucket, key, size, etag
+    FROM stage_storage_object
+    WHERE key IS NOT NULL
+    ORDER BY bucket, key, seq DESC
+), upd AS (
+    UPDATE storage_object so SET
+        size = COALESCE(NULLIF(src.size, 0), so.size),
+        etag = COALESCE(NULLIF(src.etag, ''), so.etag),
+        updated_at = {_NOW}
+    FROM src
+    WHERE so.key = src.key AND so.bucket IS NOT DISTINCT FROM src.bucket
+      AND (so.size, so.etag) IS DISTINCT FROM (COALESCE(NULLIF(src.size, 0), so.size), COALESCE(NULLIF(src.etag, ''), so.etag))
+    RETURNING 1
+), ins AS (
+    INSERT INTO storage_object (tenant_id, bucket, key, size, etag, created_at, updated_at)
+    SELECT COALESCE(tenant_id, 'default'), bucket, key, size, etag, {_NOW}, {_NOW}
+    FROM src
+    WHERE NOT EXISTS (
+        SELECT 1 FROM storage_object so WHERE so.key = src.key AND so.bucket IS NOT DISTINCT FROM src.bucket
+    )
+    ON CONFLICT ON CONSTRAINT uq_storage_object_bucket_key DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM ins), (SELECT count(*) FROM upd)
+""",
+)
+
+
+def _copy(conn, spec: StagingSpec, stream: CopyStream) -> None:
+    cols = ", ".join(c for c, _ in spec.columns)
+    sql = f"COPY {spec.table} ({cols}) FROM STDIN"
+    raw = conn.connection.driver_connection
+    cur = raw.cursor()
+    try:
+        if hasattr(cur, "copy_expert"):
+            # psycopg2
+            cur.copy_expert(sql, stream, size=1 << 16)
+        else:
+            # psycopg 3
+            with cur.copy(sql) as cp:
+                while True:
+                    chunk = stream.read(1 << 16)
+                    if not chunk:
+                        break
+                    cp.write(chunk)
+    finally:
+        cur.close()
+
+
+def load(session: Session, spec: StagingSpec, rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    # runs in the session's transaction; the caller commits
+    conn = session.connection()
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError(f"staging loader needs Postgres, not {conn.dialect.name}")
+    cols = ", ".join(f"{c} {t}" for c, t in spec.columns)
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS pg_temp.{spec.table}")
+    conn.exec_driver_sql(f"CREATE TEMP TABLE {spec.table} (seq bigserial, {cols}) ON COMMIT DROP")
+    stream = CopyStream(rows, spec.columns)
+    _copy(conn, spec, stream)
+    conn.exec_driver_sql(f"ANALYZE {spec.table}")
+    created, updated = conn.execute(text(spec.merge)).one()
+    log.info("staged %s %s rows: created=%s updated=%s", stream.count, spec.name, created, updated)
+    return {"staged": stream.count, "created": created, "updated": updated}
+
+
+def load_cases(session: Session, rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    return load(session, CASES, rows)
+
+
+def load_documents(session: Session, rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    return load(session, DOCUMENTS, rows)
+
+
+def load_storage_objects(session: Session, rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    return load(session, STORAGE_OBJECTS, rows)
@@ -0,0 +1,226 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    # Collects rows from many threads and hands them to `flush_fn` in batches, either when
+    # `max_items` are pending or `max_delay` seconds after the first pending row, so hot paths
+    # pay for one transaction per batch instead of one per row. A failed flush keeps the rows
+    # and the next attempt waits an exponential backoff (`retry_backoff` doubling up to
+    # `max_backoff`) however full the buffer is. Only after at least `max_failures` attempts
+    # spanning `give_up_after` seconds are the rows written one by one, so a poison row costs
+    # only itself, and those that still fail are dropped and logged. Beyond `max_pending` the
+    # oldest rows are dropped as well.
+    # With `key`/`merge`, rows for the same key are coalesced while pending, so e.g. the
+    # enqueue/start/finish of one message become a single upsert.
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[T]], None],
+        max_items: int = 100,
+        max_delay: float = 2.0,
+        max_pending: int = 10000,
+        max_failures: int = 5,
+        retry_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        give_up_after: float = 120.0,
+        name: str = "write-behind",
+        key: Optional[Callable[[T], Any]] = None,
+        merge: Optional[Callable[[T, T], T]] = None,
+    ) -> None:
+        self.flush_fn = flush_fn
+        self.max_items = max(1, max_items)
+        self.max_delay = max_delay
+        self.max_pending = max(self.max_items, max_pending)
+        self.max_failures = max(1, max_failures)
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.give_up_after = give_up_after
+        self._failures = 0
+        self._failing_since: Optional[float] = None
+        self._retry_at: Optional[float] = None
+        self.name = name
+        self.key = key
+        self.merge = merge or (lambda old, new: new)
+        self._items: List[T] = []
+        self._index: Dict[Any, int] = {}
+        self._first_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        atexit.register(self.close)
+
+    def add(self, item: T) -> None:
+        with self._cond:
+            self._add_locked(item)
+            if len(self._items) > self.max_pending:
+                dropped = len(self._items) - self.max_pending
+                del self._items[:dropped]
+                self._reindex()
+                log.error("%s: dropped %s pending rows", self.name, dropped)
+            self._ensure_thread()
+            if len(self._items) == 1 or len(self._items) >= self.max_items:
+                # the first row starts the max_delay clock of a writer waiting without one
+                self._cond.notify()
+
+    def _add_locked(self, item: T) -> None:
+        k = self.key(item) if self.key is not None else None
+        if k is not None and k in self._index:
+            pos = self._index[k]
+            self._items[pos] = self.merge(self._items[pos], item)
+        else:
+            if k is not None:
+                self._index[k] = len(self._items)
+            self._items.append(item)
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+
+    def _reindex(self) -> None:
+        if self.key is not None:
+            self._index = {self.key(item): i for i, item in enumerate(self._items)}
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._retry_at is not None:
+                        left = self._retry_at - time.monotonic()
+                        if left > 0:
+                            self._cond.wait(left)
+                            continue
+                        if self._items:
+                            break
+                    if len(self._items) >= self.max_items:
+                        break
+                    if self._first_at is not None:
+                        left = self._first_at + self.max_delay - time.monotonic()
+                        if left <= 0:
+                            break
+                        self._cond.wait(left)
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._cond:
+                batch, self._items = self._items, []
+                self._index = {}
+                self._first_at = None
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except Exception as e:
+                now = time.monotonic()
+                self._failures += 1
+                if self._failing_since is None:
+                    self._failing_since = now
+                if self._failures >= self.max_failures and now - self._failing_since >= self.give_up_after:
+                    written = self._flush_rows(batch)
+                    self._recovered()
+                    return written
+                delay = min(self.max_backoff, self.retry_backoff * 2 ** (self._failures - 1))
+                log.warning(
+                    "%s: flush of %s rows failed (%s), keeping them, retry in %.1fs: %s",
+                    self.name,
+                    len(batch),
+                    self._failures,
+                    delay,
+                    e,
+                )
+                with self._cond:
+                    # rows that arrived meanwhile are newer and win when coalescing
+                    newer, self._items, self._index = self._items, [], {}
+                    for item in batch + newer:
+                        self._add_locked(item)
+                    self._retry_at = now + delay
+                return 0
+            self._recovered()
+            return len(batch)
+
+    def _flush_rows(self, batch: List[T]) -> int:
+        # last resort before dropping: one row per flush keeps the good rows of a batch that
+        # fails because of a single bad one; max_failures rows failing in a row with nothing
+        # written means the database itself is down, and the rest is not tried one by one
+        written = 0
+        streak = 0
+        error: Optional[Exception] = None
+        for item in batch:
+            if not written and streak >= self.max_failures:
+                break
+            try:
+                self.flush_fn([item])
+                written += 1
+                streak = 0
+            except Exception as e:
+                error = e
+                streak += 1
+                log.debug("%s: dropping row %r: %s", self.name, item, e)
+        if written < len(batch):
+            log.error(
+                "%s: dropped %s of %s rows after %s failed flushes: %s",
+                self.name,
+                len(batch) - written,
+                len(batch),
+                self._failures,
+                error,
+            )
+        return written
+
+    def _recovered(self) -> None:
+        self._failures = 0
+        self._failing_since = None
+        with self._cond:
+            self._retry_at = None
+
+    def close(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self.flush()
+
+
+def _flush_problem_logs(rows: List[dict]) -> None:
+    from src.core.infrastructure.persistence.sqlalchemy.repositories import ProblemLogRepository
+    from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        ProblemLogRepository(s).add_many(rows)
+        s.commit()
+
+
+_problem_logs: Optional[WriteBehindBuffer[dict]] = None
+
+
+def get_problem_log_buffer() -> WriteBehindBuffer[dict]:
+    global _problem_logs
+    if _problem_logs is None:
+        _problem_logs = WriteBehindBuffer(
+            _flush_problem_logs,
+            max_items=int(os.getenv("PROBLEM_LOG_BATCH", "100")),
+            max_delay=float(os.getenv("PROBLEM_LOG_FLUSH_SECONDS", "2")),
+            name="problem-log-writer",
+        )
+    return _problem_logs
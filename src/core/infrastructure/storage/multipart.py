@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+MIN_PART_SIZE = 5 * _MB  # S3 minimum for every part but the last
+
+
+class MultipartUploadWriter:
+    # Write-only file object that streams into an S3 multipart upload.
+    # At most `concurrency` parts are in flight plus one being filled, so memory stays
+    # bounded by (concurrency + 1) * part_size regardless of the object size.
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        content_type: str = "application/octet-stream",
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(MIN_PART_SIZE, part_size or int(os.getenv("S3_MULTIPART_PART_MB", "16")) * _MB)
+        self.concurrency = concurrency or int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+        self.content_type = content_type
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._buf = bytearray()
+        self._part_no = 0
+        self._futures: Dict[int, Future] = {}
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._upload_id: Optional[str] = None
+        self._closed = False
+
+    def __enter__(self) -> "MultipartUploadWriter":
+        self._start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _start(self) -> None:
+        if self._upload_id is None:
+            resp = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self._upload_id = resp["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="s3-part")
+
+    def tell(self) -> int:
+        return self.size
+
+    @property
+    def parts(self) -> int:
+        return self._part_no
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("write to closed MultipartUploadWriter")
+        self._start()
+        self._buf += data
+        self.size += len(data)
+        self.sha256.update(data)
+        while len(self._buf) >= self.part_size:
+            chunk = bytes(self._buf[: self.part_size])
+            del self._buf[: self.part_size]
+            self._submit(chunk)
+        return len(data)
+
+    def _raise_failed(self) -> None:
+        for fut in list(self._futures.values()):
+            if fut.done() and fut.exception() is not None:
+                raise fut.exception()  # type: ignore[misc]
+
+    def _submit(self, chunk: bytes) -> None:
+        self._raise_failed()
+        # blocks the producer while `concurrency` parts are already uploading
+        self._slots.acquire()
+        self._part_no += 1
+        part_no = self._part_no
+        assert self._executor is not None
+
+        def _upload() -> str:
+            try:
+                resp = self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    PartNumber=part_no,
+                    Body=chunk,
+                )
+                return resp["ETag"]
+            finally:
+                self._slots.release()
+
+        self._futures[part_no] = self._executor.submit(_upload)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._start()
+        try:
+            if self._buf or self._part_no == 0:
+                self._submit(bytes(self._buf))
+                self._buf = bytearray()
+            parts: List[dict] = [
+                {"PartNumber": n, "ETag": self._futures[n].result()} for n in sorted(self._futures)
+            ]
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+        self._closed = True
+        log.info("multipart upload done s3://%s/%s size=%s parts=%s", self.bucket, self.key, self.size, self._part_no)
+
+    def abort(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor is not None:
+            for fut in self._futures.values():
+                fut.cancel()
+            self._executor.shutdown(wait=True)
+        self._buf = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+                log.warning("multipart upload aborted s3://%s/%s", self.bucket, self.key)
+            except Exception as e:
+                log.error("multipart abort failed s3://%s/%s: %s", self.bucket, self.key, e)
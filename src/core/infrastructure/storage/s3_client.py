@@ -1,9 +1,6 @@
 import os
 from typing import Dict, Any
 
-import boto3
-from botocore.client import Config as BotoConfig
-
 
 def _bool_env(name: str, default: bool = False) -> bool:
     v = os.getenv(name)
@@ -13,6 +10,10 @@ def _bool_env(name: str, default: bool = False) -> bool:
 
 
 def create_s3_client():
+    # boto3/botocore are imported lazily: they dominate worker start-up time and RSS
+    import boto3
+    from botocore.client import Config as BotoConfig
+
     endpoint = os.getenv("S3_ENDPOINT")
     region = os.getenv("S3_REGION", "auto")
     access_key = os.getenv("S3_ACCESS_KEY")
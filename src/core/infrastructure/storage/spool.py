@@ -0,0 +1,247 @@
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from src.core.infrastructure.observability import metrics
+
+log = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def _clean_etag(etag: Optional[str]) -> str:
+    return (etag or "").strip('"')
+
+
+class Spool:
+    # Node-local, content-addressed copy of S3 originals shared by all worker processes.
+    # Layout: <root>/objects/<h[:2]>/<h>.<ext>, <root>/locks/<h>.lock (flock: exclusive while
+    # downloading or evicting, shared while a reader uses the file). Eviction deletes the
+    # lock file together with the object.
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        part_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        client=None,
+    ) -> None:
+        self.root = root or os.getenv("SPOOL_DIR", "./.cache/spool")
+        self.max_bytes = max_bytes or int(os.getenv("SPOOL_MAX_MB", "10240")) * _MB
+        self.part_size = part_size or int(os.getenv("SPOOL_PART_MB", "8")) * _MB
+        self.concurrency = concurrency or int(os.getenv("SPOOL_CONCURRENCY", "8"))
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.evict_interval = float(os.getenv("SPOOL_EVICT_INTERVAL_SECONDS", "60"))
+        self._evict_lock = threading.Lock()
+        self._last_evict = 0.0
+        # spool size seen by the last eviction pass, plus what this process fetched since
+        self._known_bytes: Optional[int] = None
+        self._fetched_since = 0
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "locks"), exist_ok=True)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from src.core.infrastructure.storage.s3_client import create_s3_client
+
+                    self._client = create_s3_client()
+        return self._client
+
+    @staticmethod
+    def digest(bucket: str, key: str, etag: str) -> str:
+        return hashlib.sha256(f"{bucket}\0{key}\0{_clean_etag(etag)}".encode("utf-8")).hexdigest()
+
+    def _paths(self, digest: str, key: str) -> Tuple[str, str]:
+        ext = key.rsplit(".", 1)[-1].lower() if "." in key.rsplit("/", 1)[-1] else "bin"
+        obj = os.path.join(self.root, "objects", digest[:2], f"{digest}.{ext}")
+        lock = os.path.join(self.root, "locks", f"{digest}.lock")
+        return obj, lock
+
+    @staticmethod
+    def _flock(lock_path: str, op: int) -> int:
+        # eviction unlinks lock files, and a lock on an unlinked file protects nothing:
+        # retry until the locked file is the one at lock_path
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, op)
+                if os.fstat(fd).st_ino == os.stat(lock_path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            except BaseException:
+                os.close(fd)
+                raise
+            os.close(fd)
+
+    @contextmanager
+    def open(self, so) -> Iterator[str]:
+        bucket = so.bucket or os.getenv("S3_BUCKET")
+        with self.open_object(bucket, so.key, so.etag) as path:
+            yield path
+
+    @contextmanager
+    def open_object(self, bucket: str, key: str, etag: Optional[str] = None) -> Iterator[str]:
+        # yields a local path that stays valid (not evicted) until the block exits;
+        # engines can mmap/open it directly
+        size = None
+        if not etag:
+            head = self.client.head_object(Bucket=bucket, Key=key)
+            etag, size = head.get("ETag"), int(head.get("ContentLength", 0))
+        digest = self.digest(bucket, key, etag)
+        path, lock_path = self._paths(digest, key)
+        fetched = 0
+        fd = self._flock(lock_path, fcntl.LOCK_SH)
+        try:
+            if not os.path.exists(path):
+                # upgrade to exclusive: exactly one process downloads, the rest wait
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                if not os.path.exists(path):
+                    fetched = self._download(bucket, key, _clean_etag(etag), path, size)
+                    metrics.inc("spool_misses_total")
+                else:
+                    metrics.inc("spool_hits_total")
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            else:
+                metrics.inc("spool_hits_total")
+            os.utime(path, None)
+            yield path
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            self._maybe_evict(fetched)
+
+    def _maybe_evict(self, fetched: int) -> None:
+        # Only downloads grow the spool. Walk it when this process may have pushed it over
+        # the limit, or after a download once SPOOL_EVICT_INTERVAL_SECONDS have passed
+        # (other processes' downloads), never on every open.
+        now = time.monotonic()
+        with self._evict_lock:
+            self._fetched_since += fetched
+            over = self._known_bytes is None or self._known_bytes + self._fetched_since > self.max_bytes
+            if not over and not (fetched and now - self._last_evict >= self.evict_interval):
+                return
+            self._last_evict = now
+            self._fetched_since = 0
+        try:
+            self.evict()
+        except Exception as e:
+            log.warning("spool eviction failed: %s", e)
+
+    def _ranges(self, size: int) -> List[Tuple[int, int]]:
+        return [(start, min(size, start + self.part_size) - 1) for start in range(0, size, self.part_size)]
+
+    def _download(self, bucket: str, key: str, etag: str, path: str, size: Optional[int]) -> int:
+        if size is None:
+            kwargs = {"Bucket": bucket, "Key": key}
+            if etag:
+                kwargs["IfMatch"] = f'"{etag}"'
+            size = int(self.client.head_object(**kwargs).get("ContentLength", 0))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.part"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+
+            def _fetch(rng: Tuple[int, int]) -> int:
+                kwargs = {"Bucket": bucket, "Key": key, "Range": f"bytes={rng[0]}-{rng[1]}"}
+                if etag:
+                    # all parts must come from the same object version
+                    kwargs["IfMatch"] = f'"{etag}"'
+                body = self.client.get_object(**kwargs)["Body"]
+                offset = rng[0]
+                for chunk in body.iter_chunks(chunk_size=_MB):
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                if offset != rng[1] + 1:
+                    raise IOError(f"short read for {key} range {rng}: got {offset - rng[0]} bytes")
+                return offset - rng[0]
+
+            ranges = self._ranges(size)
+            if len(ranges) <= 1:
+                written = sum(_fetch(r) for r in ranges)
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.concurrency, len(ranges))) as ex:
+                    written = sum(ex.map(_fetch, ranges))
+            os.fsync(fd)
+        except BaseException:
+            os.close(fd)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        os.close(fd)
+        os.replace(tmp, path)
+        metrics.inc("spool_bytes_downloaded_total", written)
+        log.info("spool fetched s3://%s/%s size=%s parts=%s", bucket, key, size, len(ranges))
+        return written
+
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        objects = os.path.join(self.root, "objects")
+        for dirpath, _dirs, files in os.walk(objects):
+            for fn in files:
+                if fn.endswith(".part"):
+                    continue
+                full = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                total += st.st_size
+                entries.append((st.st_mtime, st.st_size, full))
+        metrics.set_gauge("spool_bytes", total)
+        self._known_bytes = total
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _mtime, size, full in sorted(entries):
+            if total <= target:
+                break
+            digest = os.path.basename(full).split(".", 1)[0]
+            lock_path = os.path.join(self.root, "locks", f"{digest}.lock")
+            try:
+                # skip files a reader currently holds
+                fd = self._flock(lock_path, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            try:
+                os.remove(full)
+                total -= size
+                removed += 1
+                # unlinked while still held, so a waiter re-opens a fresh lock file
+                os.remove(lock_path)
+            except OSError:
+                pass
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        metrics.set_gauge("spool_bytes", total)
+        self._known_bytes = total
+        if removed:
+            log.info("spool evicted files=%s size=%s", removed, total)
+        return removed
+
+
+_spool: Optional[Spool] = None
+
+
+def get_spool() -> Spool:
+    global _spool
+    if _spool is None:
+        _spool = Spool()
+    return _spool
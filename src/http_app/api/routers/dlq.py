@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from src.core.infrastructure.messaging.dlq_consumer import DeadLetterFilter, get_dead_letter_queue
+
+router = APIRouter(prefix="/dlq", tags=["dlq"])
+
+MAX_BULK = 50000
+
+
+class DeadLetterItem(BaseModel):
+    id: str
+    message_id: Optional[str] = None
+    queue_name: str
+    actor_name: Optional[str] = None
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+    retries: int = 0
+    error: Optional[str] = None
+    message_timestamp: Optional[int] = None
+    dead_at: int
+
+
+class DeadLetterPage(BaseModel):
+    items: List[DeadLetterItem]
+    next_cursor: Optional[str] = None
+
+
+class BulkRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    actor: Optional[str] = None
+    error: Optional[str] = None
+    older_than: Optional[float] = None
+    newer_than: Optional[float] = None
+    limit: int = 10000
+
+
+@router.get("/")
+def list_dead_letter_queues():
+    return get_dead_letter_queue().queues()
+
+
+@router.get("/{queue}", response_model=DeadLetterPage)
+def list_dead_letters(
+    queue: str,
+    actor: Optional[str] = None,
+    error: Optional[str] = None,
+    older_than: Optional[float] = None,
+    newer_than: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    # older_than / newer_than are seconds since the message was dead-lettered
+    flt = DeadLetterFilter(actor=actor, error=error, older_than_s=older_than, newer_than_s=newer_than)
+    items, next_cursor = get_dead_letter_queue().page(queue, flt, cursor=cursor, limit=max(1, min(limit, 500)))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _bulk_args(payload: BulkRequest):
+    if payload.limit < 1 or payload.limit > MAX_BULK:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_BULK}")
+    flt = DeadLetterFilter(
+        actor=payload.actor, error=payload.error, older_than_s=payload.older_than, newer_than_s=payload.newer_than
+    )
+    return flt, payload.ids, payload.limit
+
+
+@router.post("/{queue}/requeue")
+def requeue_dead_letters(queue: str, payload: BulkRequest):
+    flt, ids, limit = _bulk_args(payload)
+    # bounded by DLQ_REQUEUE_DEADLINE_SECONDS; "complete": false means repeat the request
+    result = get_dead_letter_queue().requeue(queue, flt, ids=ids, limit=limit)
+    return {"queue": queue, **result}
+
+
+@router.post("/{queue}/discard")
+def discard_dead_letters(queue: str, payload: BulkRequest):
+    flt, ids, limit = _bulk_args(payload)
+    removed = get_dead_letter_queue().discard(queue, flt, ids=ids, limit=limit)
+    return {"queue": queue, "discarded": removed}
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.infrastructure.persistence.sqlalchemy.async_session import get_async_read_session
+from src.core.infrastructure.persistence.sqlalchemy.async_repositories import AsyncDocumentRepository
 from src.core.infrastructure.storage.s3_client import presign_post
 
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -28,3 +33,29 @@ def presign_put(payload: PresignPutRequest):
         return PresignPutResponse(url=resp["url"], fields=resp["fields"], expires_in=600)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"presign error: {e}")
+
+
+class DocumentItem(BaseModel):
+    id: int
+    tenant_id: str
+    case_pk: Optional[int] = None
+    doc_kind: Optional[str] = None
+    title: Optional[str] = None
+    mime: Optional[str] = None
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    storage_ref: Optional[str] = None
+    status: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+@router.get("/{document_id}", response_model=DocumentItem)
+async def get_document(document_id: int, tenant_id: str, s: AsyncSession = Depends(get_async_read_session)):
+    row = await AsyncDocumentRepository(s).get(document_id)
+    if row is None or row.tenant_id != tenant_id:
+        raise HTTPException(status_code=404, detail="document not found")
+    return row
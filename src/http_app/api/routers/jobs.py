@@ -0,0 +1,21 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.infrastructure.persistence.sqlalchemy.async_session import get_async_read_session
+from src.core.infrastructure.persistence.sqlalchemy.async_repositories import AsyncJobRepository
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+class JobStatusCount(BaseModel):
+    tenant_id: Optional[str] = None
+    queue: Optional[str] = None
+    status: Optional[str] = None
+    count: int
+
+
+@router.get("/status", response_model=List[JobStatusCount])
+async def job_status(tenant_id: Optional[str] = None, s: AsyncSession = Depends(get_async_read_session)):
+    return await AsyncJobRepository(s).status_counts(tenant_id=tenant_id)
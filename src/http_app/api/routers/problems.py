@@ -1,12 +1,17 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
-from src.core.infrastructure.persistence.sqlalchemy.repositories import ProblemLogRepository
+from src.core.infrastructure.persistence.sqlalchemy.async_session import get_async_read_session, get_async_session
+from src.core.infrastructure.persistence.sqlalchemy.async_repositories import AsyncProblemLogRepository
+from src.core.infrastructure.persistence.sqlalchemy.repositories import ProblemLogFilter
 
 router = APIRouter(prefix="/problems", tags=["problems"])
 
+MAX_PAGE = 500
+
 
 class ProblemLogItem(BaseModel):
     id: int
@@ -25,11 +30,34 @@ class ProblemLogItem(BaseModel):
 
 
 @router.get("/", response_model=List[ProblemLogItem])
-def list_problems(limit: int = 50):
-    SessionLocal = get_sessionmaker()
-    with SessionLocal() as s:
-        repo = ProblemLogRepository(s)
-        return repo.list(limit=limit)
+async def list_problems(
+    response: Response,
+    tenant_id: Optional[str] = None,
+    queue: Optional[str] = None,
+    error_code: Optional[str] = None,
+    task_type: Optional[str] = None,
+    decision: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+    s: AsyncSession = Depends(get_async_read_session),
+):
+    # newest first; pass the X-Next-Cursor header back as ?cursor= for the next page
+    flt = ProblemLogFilter(
+        tenant_id=tenant_id,
+        queue=queue,
+        error_code=error_code,
+        task_type=task_type,
+        decision=decision,
+        since=since,
+        until=until,
+    )
+    repo = AsyncProblemLogRepository(s)
+    rows, next_cursor = await repo.page(flt, cursor=cursor, limit=max(1, min(limit, MAX_PAGE)))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return rows
 
 
 class DecideRequest(BaseModel):
@@ -38,11 +66,10 @@ class DecideRequest(BaseModel):
 
 
 @router.post("/{pl_id}/decide", response_model=ProblemLogItem)
-def decide_problem(pl_id: int, payload: DecideRequest):
-    SessionLocal = get_sessionmaker()
-    with SessionLocal() as s:
-        repo = ProblemLogRepository(s)
-        row = repo.decide(pl_id, payload.decision, payload.decided_by)
-        if not row:
-            raise HTTPException(status_code=404, detail="problem not found")
-        return row
+async def decide_problem(pl_id: int, payload: DecideRequest, s: AsyncSession = Depends(get_async_session)):
+    repo = AsyncProblemLogRepository(s)
+    row = await repo.decide(pl_id, payload.decision, payload.decided_by)
+    if not row:
+        raise HTTPException(status_code=404, detail="problem not found")
+    await s.commit()
+    return row
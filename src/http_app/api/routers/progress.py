@@ -0,0 +1,47 @@
+import asyncio
+import os
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from src.core.infrastructure.messaging.progress import get_progress_hub
+
+router = APIRouter(prefix="/progress", tags=["progress"])
+
+KEEPALIVE_SECONDS = float(os.getenv("PROGRESS_KEEPALIVE_SECONDS", "15"))
+
+
+async def _stream(request: Request, tenant_id: str, document_id: Optional[int]):
+    hub = get_progress_hub()
+    q = hub.subscribe(tenant_id, document_id)
+    try:
+        # tell EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                data = await asyncio.wait_for(q.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: progress\ndata: {data}\n\n"
+    finally:
+        hub.unsubscribe(tenant_id, document_id, q)
+
+
+def _sse(request: Request, tenant_id: str, document_id: Optional[int]) -> StreamingResponse:
+    return StreamingResponse(
+        _stream(request, tenant_id, document_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{tenant_id}")
+async def tenant_progress(tenant_id: str, request: Request):
+    return _sse(request, tenant_id, None)
+
+
+@router.get("/{tenant_id}/{document_id}")
+async def document_progress(tenant_id: str, document_id: int, request: Request):
+    return _sse(request, tenant_id, document_id)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from src.worker_app.workers.vault_indexer import index_vault_job
+from src.worker_app.workers.vault_jobs import index_vault_job
 
 router = APIRouter(prefix="/vault", tags=["vault"])
 
@@ -4,9 +4,15 @@ from fastapi import FastAPI
 from src.http_app.api.routers import documents
 from src.http_app.api.routers import vault
 from src.http_app.api.routers import problems
+from src.http_app.api.routers import dlq
+from src.http_app.api.routers import jobs
+from src.http_app.api.routers import progress
 
 
 app = FastAPI(title="Consilium Pipeline API")
 app.include_router(documents.router)
 app.include_router(vault.router)
 app.include_router(problems.router)
+app.include_router(dlq.router)
+app.include_router(jobs.router)
+app.include_router(progress.router)
@@ -3,18 +3,19 @@ import logging
 # Ensure broker is initialized
 from src.core.infrastructure.messaging.dramatiq_broker import broker  # noqa
 
-# Import workers to register actors
-from src.worker_app.workers import health  # noqa
-from src.worker_app.workers import ocr_pdf_small  # noqa
-from src.worker_app.workers import ocr_pdf_large  # noqa
-from src.worker_app.workers import ocr_img_small  # noqa
-from src.worker_app.workers import merge_pdf_task  # noqa
-from src.worker_app.workers import vault_indexer  # noqa
+# Register only the actors of the selected profile (WORKER_PROFILE / WORKER_QUEUES)
+from src.worker_app.profiles import load_profile
+
+QUEUES = load_profile()
 
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    logging.info("Workers loaded. Start with: dramatiq src.worker_app.main --watch src")
+    logging.info(
+        "Workers loaded for queues %s. Start with: WORKER_PROFILE=<profile> dramatiq src.worker_app.main -Q %s",
+        QUEUES,
+        " ".join(QUEUES),
+    )
 
 
 if __name__ == "__main__":
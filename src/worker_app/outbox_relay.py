@@ -0,0 +1,109 @@
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dramatiq import Message
+
+from src.core.infrastructure.messaging.dramatiq_broker import broker
+from src.core.infrastructure.messaging.outbox import publish_batch
+from src.core.infrastructure.observability import metrics
+from src.core.infrastructure.persistence.sqlalchemy.repositories import OutboxRepository
+from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+
+log = logging.getLogger(__name__)
+
+# Publishes committed outbox rows to the broker. Each pass claims up to OUTBOX_BATCH rows
+# with FOR UPDATE SKIP LOCKED, publishes them in one pipelined round trip and marks them
+# published in the same transaction, so any number of relay threads/processes can run
+# side by side without handing out a row twice. Start with:
+#   python -m src.worker_app.outbox_relay [--threads N]
+
+
+def relay_once(SessionLocal, batch_size: int, max_attempts: int) -> int:
+    with SessionLocal() as s:
+        repo = OutboxRepository(s)
+        rows = repo.claim(batch_size, max_attempts)
+        if not rows:
+            return 0
+        messages, ids = [], []
+        for row in rows:
+            try:
+                messages.append(Message(**row.message))
+                ids.append(row.id)
+            except Exception as e:
+                # malformed rows are parked after max_attempts instead of blocking the head
+                repo.mark_failed(row, f"{type(e).__name__}: {e}")
+                metrics.inc("outbox_malformed_total")
+        # a broker error propagates and rolls back: the rows are unlocked and retried
+        publish_batch(broker, messages)
+        repo.mark_published(ids)
+        s.commit()
+        oldest = min(r.created_at for r in rows)
+    metrics.inc("outbox_published_total", len(ids))
+    metrics.set_gauge("outbox_lag_seconds", max(0.0, (datetime.utcnow() - oldest).total_seconds()))
+    return len(rows)
+
+
+def purge(SessionLocal, retention_hours: float) -> int:
+    with SessionLocal() as s:
+        n = OutboxRepository(s).purge_published(datetime.utcnow() - timedelta(hours=retention_hours))
+        s.commit()
+    if n:
+        metrics.inc("outbox_purged_total", n)
+    return n
+
+
+def run(stop: threading.Event) -> None:
+    SessionLocal = get_sessionmaker()
+    batch_size = int(os.getenv("OUTBOX_BATCH", "500"))
+    max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    poll = float(os.getenv("OUTBOX_POLL_SECONDS", "0.5"))
+    backoff = float(os.getenv("OUTBOX_ERROR_BACKOFF_SECONDS", "5"))
+    retention = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+    purge_every = float(os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", "300"))
+    next_purge = time.monotonic() + purge_every
+    while not stop.is_set():
+        try:
+            n = relay_once(SessionLocal, batch_size, max_attempts)
+        except Exception as e:
+            log.warning("outbox relay pass failed: %s", e)
+            metrics.inc("outbox_relay_errors_total")
+            stop.wait(backoff)
+            continue
+        if n >= batch_size:
+            # backlog: go straight to the next batch
+            continue
+        if time.monotonic() >= next_purge:
+            next_purge = time.monotonic() + purge_every
+            try:
+                purge(SessionLocal, retention)
+            except Exception as e:
+                log.warning("outbox purge failed: %s", e)
+        stop.wait(poll)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Publish outbox rows to the broker")
+    ap.add_argument("--threads", type=int, default=int(os.getenv("OUTBOX_RELAY_THREADS", "1")))
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    threads = [threading.Thread(target=run, args=(stop,), name=f"outbox-relay-{i}") for i in range(max(1, args.threads))]
+    for t in threads:
+        t.start()
+    log.info("outbox relay running with %d thread(s)", len(threads))
+    while any(t.is_alive() for t in threads):
+        for t in threads:
+            t.join(timeout=1.0)
+    broker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import importlib
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+from src.core.infrastructure.messaging import queues
+
+log = logging.getLogger(__name__)
+
+# queue -> worker modules whose actors consume it
+QUEUE_MODULES: Dict[str, List[str]] = {
+    queues.HEALTH: [
+        "src.worker_app.workers.health",
+        "src.worker_app.workers.vault_jobs",
+        "src.worker_app.workers.maintenance",
+    ],
+    queues.OCR_PDF_SMALL: ["src.worker_app.workers.ocr_pdf_small"],
+    queues.OCR_IMG_SMALL: ["src.worker_app.workers.ocr_img_small"],
+    queues.OCR_PDF_LARGE: ["src.worker_app.workers.ocr_pdf_large"],
+    queues.MERGE_PDF_TASK: ["src.worker_app.workers.merge_pdf_task"],
+}
+
+PROFILES: Dict[str, List[str]] = {
+    "all": list(QUEUE_MODULES),
+    "small": queues.SMALL_PRIORITY,
+    "large": queues.LARGE_PRIORITY,
+    "merge": [queues.MERGE_PDF_TASK],
+    "health": [queues.HEALTH],
+}
+
+
+def resolve_queues(profile: Optional[str] = None, queue_names: Optional[Iterable[str]] = None) -> List[str]:
+    # explicit queue list wins over the named profile
+    if queue_names is None:
+        raw = os.getenv("WORKER_QUEUES", "")
+        queue_names = [q.strip() for q in raw.split(",") if q.strip()] or None
+    if queue_names is not None:
+        return list(queue_names)
+    name = profile or os.getenv("WORKER_PROFILE", "all")
+    if name in PROFILES:
+        return list(PROFILES[name])
+    if name in QUEUE_MODULES:
+        return [name]
+    raise ValueError(f"unknown worker profile: {name}")
+
+
+def load_profile(profile: Optional[str] = None, queue_names: Optional[Iterable[str]] = None) -> List[str]:
+    selected = resolve_queues(profile, queue_names)
+    modules: List[str] = []
+    for q in selected:
+        if q not in QUEUE_MODULES:
+            raise ValueError(f"no actors registered for queue: {q}")
+        for m in QUEUE_MODULES[q]:
+            if m not in modules:
+                modules.append(m)
+    for m in modules:
+        importlib.import_module(m)
+    log.info("worker profile queues=%s modules=%s", selected, len(modules))
+    return selected
@@ -0,0 +1,13 @@
+import dramatiq
+from src.core.infrastructure.messaging.queues import HEALTH
+
+
+@dramatiq.actor(queue_name=HEALTH, max_retries=2)
+def partition_maintenance() -> None:
+    # creates upcoming event/problem_log partitions, moves stray rows out of the default
+    # partitions and drops expired ones. Sent every PARTITION_MAINTENANCE_INTERVAL_SECONDS by
+    # the PeriodicJobs middleware of any worker running the health queue; for a manual run:
+    #   python -c "from src.worker_app.workers.maintenance import partition_maintenance as p; p.send()"
+    from src.core.infrastructure.persistence.sqlalchemy.partitions import run_partition_maintenance
+
+    run_partition_maintenance()
@@ -1,8 +1,12 @@
 import logging
 import dramatiq
-from src.core.infrastructure.messaging.queues import MERGE_PDF_TASK
+from src.core.infrastructure.messaging.queues import MERGE_ACTOR_PRIORITY, MERGE_PDF_TASK
 
 
-@dramatiq.actor(queue_name=MERGE_PDF_TASK)
+@dramatiq.actor(queue_name=MERGE_PDF_TASK, priority=MERGE_ACTOR_PRIORITY)
 def merge_pdf_task(document_id: int) -> None:
     logging.getLogger(__name__).info("merge_pdf_task: document_id=%s", document_id)
+    # deferred: PyMuPDF, SQLAlchemy and boto3 are only needed once a merge runs
+    from src.core.application.services.merge_pdf import merge_document
+
+    merge_document(document_id)
@@ -1,8 +1,15 @@
 import logging
 import dramatiq
-from src.core.infrastructure.messaging.queues import OCR_IMG_SMALL
+from src.core.infrastructure.messaging.queues import SMALL_ACTOR_PRIORITY, OCR_IMG_SMALL
 
 
-@dramatiq.actor(queue_name=OCR_IMG_SMALL)
-def ocr_img_small(document_id: int) -> None:
-    logging.getLogger(__name__).info("ocr_img_small: document_id=%s", document_id)
+@dramatiq.actor(queue_name=OCR_IMG_SMALL, priority=SMALL_ACTOR_PRIORITY)
+def ocr_img_small(storage_object_id: int) -> None:
+    logging.getLogger(__name__).info("ocr_img_small: storage_object_id=%s", storage_object_id)
+    # deferred: pulls in SQLAlchemy, PyMuPDF, the OCR engines and boto3 on first use
+    from src.core.application.services.ocr import get_batched_engine, ocr_storage_object
+
+    # images recognised concurrently by this process' worker threads are micro-batched
+    # (OCR_BATCH_MAX_ITEMS / OCR_BATCH_MAX_WAIT_MS); the result is still written and the
+    # message acked per image
+    ocr_storage_object(storage_object_id, OCR_IMG_SMALL, engine=get_batched_engine())
@@ -1,8 +1,12 @@
 import logging
 import dramatiq
-from src.core.infrastructure.messaging.queues import OCR_PDF_LARGE
+from src.core.infrastructure.messaging.queues import LARGE_ACTOR_PRIORITY, OCR_PDF_LARGE
 
 
-@dramatiq.actor(queue_name=OCR_PDF_LARGE)
-def ocr_pdf_large(document_id: int) -> None:
-    logging.getLogger(__name__).info("ocr_pdf_large: document_id=%s", document_id)
+@dramatiq.actor(queue_name=OCR_PDF_LARGE, priority=LARGE_ACTOR_PRIORITY)
+def ocr_pdf_large(storage_object_id: int) -> None:
+    logging.getLogger(__name__).info("ocr_pdf_large: storage_object_id=%s", storage_object_id)
+    # deferred: pulls in SQLAlchemy, PyMuPDF, the OCR engines and boto3 on first use
+    from src.core.application.services.ocr import ocr_storage_object
+
+    ocr_storage_object(storage_object_id, OCR_PDF_LARGE)
@@ -5,14 +5,14 @@ import logging
 from datetime import datetime
 from typing import Optional, Tuple
 
-import dramatiq
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.core.infrastructure.persistence.sqlalchemy.models import Artifact, StorageObject
 from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
 from src.core.infrastructure.storage.paths import vault_root
-from src.core.infrastructure.messaging.queues import HEALTH
+# actors live in vault_jobs so the health profile does not import SQLAlchemy
+from src.worker_app.workers.vault_jobs import index_vault_job, vault_diff_job  # noqa: F401
 
 log = logging.getLogger(__name__)
 
@@ -116,14 +116,6 @@ def index_vault_once(session: Session, base: Optional[str] = None) -> int:
     return count
 
 
-@dramatiq.actor(queue_name=HEALTH)
-def index_vault_job() -> None:
-    log.info("vault index job invoked (actor)")
-    SessionLocal = get_sessionmaker()
-    with SessionLocal() as s:
-        index_vault_once(s)
-
-
 def _iter_vault_main_md(base: str):
     for root, _dirs, files in os.walk(base):
         for fn in files:
@@ -230,11 +222,3 @@ def report_diffs(session: Session, base: Optional[str] = None) -> None:
             rf.write(json.dumps({"kind": "error_init_s3", "error": str(e)}) + "\n")
 
     log.info("vault diff written entries=%s", written)
-
-
-@dramatiq.actor(queue_name=HEALTH)
-def vault_diff_job() -> None:
-    log.info("vault diff job invoked (actor)")
-    SessionLocal = get_sessionmaker()
-    with SessionLocal() as s:
-        report_diffs(s)
@@ -0,0 +1,27 @@
+import logging
+import dramatiq
+from src.core.infrastructure.messaging.queues import HEALTH
+
+log = logging.getLogger(__name__)
+
+
+@dramatiq.actor(queue_name=HEALTH)
+def index_vault_job() -> None:
+    log.info("vault index job invoked (actor)")
+    from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+    from src.worker_app.workers.vault_indexer import index_vault_once
+
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        index_vault_once(s)
+
+
+@dramatiq.actor(queue_name=HEALTH)
+def vault_diff_job() -> None:
+    log.info("vault diff job invoked (actor)")
+    from src.core.infrastructure.persistence.sqlalchemy.session import get_sessionmaker
+    from src.worker_app.workers.vault_indexer import report_diffs
+
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as s:
+        report_diffs(s)